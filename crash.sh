@@ -27,6 +27,20 @@ Options:
     shorthand for "-r <dir> -m . -d . -D ." and will override preceding
     options.
 
+-c <dir> | --page-cache <dir>
+    Keep decoded pages from compressed dumps in the specified directory
+    so that later sessions on the same dump start faster.  The
+    CRASH_PYTHON_PAGE_CACHE environment variable has the same effect.
+
+--record <file>
+    Save every page read during the session to the specified snapshot
+    file when the session ends.  The snapshot can be used in place of
+    the dump with --replay.
+
+--replay
+    Treat <vmcore> as a snapshot saved with --record.  Reads of pages
+    that were not read while recording fail.
+
 Debugging options:
 --debug
     Enable noisy output for debugging the debugger
@@ -42,7 +56,7 @@ END
 exit 1
 }
 
-TEMP=$(getopt -o 'vr:d:m:D:b:h' --long 'verbose,root:,modules-debuginfo:,modules:,vmlinux-debuginfo:,build-dir:,debug,gdb,valgrind,help' -n "$(basename $0)" -- "$@")
+TEMP=$(getopt -o 'vr:d:m:D:b:c:h' --long 'verbose,root:,modules-debuginfo:,modules:,vmlinux-debuginfo:,build-dir:,page-cache:,record:,replay,debug,gdb,valgrind,help' -n "$(basename $0)" -- "$@")
 
 if [ $? -ne 0 ]; then
     usage
@@ -53,6 +67,7 @@ unset TEMP
 
 VERBOSE=False
 DEBUG=False
+REPLAY=False
 
 while true; do
     case "$1" in
@@ -100,6 +115,21 @@ while true; do
             shift 2
             continue
             ;;
+        '-c'|'--page-cache')
+            PAGE_CACHE="$2"
+            shift 2
+            continue
+            ;;
+        '--record')
+            RECORD="$2"
+            shift 2
+            continue
+            ;;
+        '--replay')
+            REPLAY="True"
+            shift
+            continue
+            ;;
         '-v'|'--verbose')
             VERBOSE="True"
             shift
@@ -207,6 +237,12 @@ else
 fi
 
 VMCORE=$2
+if [ "$REPLAY" = "True" ]; then
+    TARGET=kdumpsnapshot
+else
+    TARGET=kdumpfile
+fi
+
 for path in $SEARCH_DIRS; do
     if test -n "$DFD"; then
         DFD="$DFD:$path"
@@ -226,10 +262,21 @@ file "$KERNEL"
 
 python
 from kdump.target import Target
-target = Target(debug=False)
+from kdump.replay import ReplayTarget
+if $REPLAY:
+    target = ReplayTarget(debug=False)
+else:
+    target = Target(debug=False, disk_cache_dir="$PAGE_CACHE" or None)
 end
 
-target kdumpfile $VMCORE
+target $TARGET $VMCORE
+
+python
+import os
+# Worker sessions started by crash.parallel share this file
+if "$RECORD" and not os.environ.get('CRASH_PYTHON_WORKER'):
+    target.start_recording("$RECORD")
+end
 
 python
 import sys
@@ -285,6 +332,11 @@ target.unregister()
 del target
 EOF
 
+# Used by crash.parallel to start worker sessions on the same dump
+export CRASH_PYTHON_GDB="$GDB"
+export CRASH_PYTHON_GDBINIT="$GDBINIT"
+export CRASH_PYTHON_CWD="$PWD"
+
 # This is how we debug gdb problems when running crash
 if [ "$DEBUGMODE" = "gdb" ]; then
     RUN="run -nx -q -x $GDBINIT"
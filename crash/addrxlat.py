@@ -1,8 +1,17 @@
 # -*- coding: utf-8 -*-
 # vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
 
+from typing import Callable, Dict, Iterable, List, Optional
+
+import struct
+
 import addrxlat
+import addrxlat.exceptions
 import crash
+import kdump.target
+from kdump.target import MissingPageError
+from kdump.pagecache import PageCache
+from kdumpfile.exceptions import AddressTranslationException, EOFException
 from crash.cache.syscache import utsname
 from crash.util import offsetof
 from crash.util.symbols import Types
@@ -11,11 +20,68 @@ import gdb
 
 types = Types(['uint32_t *', 'uint64_t *'])
 
+# Page table pages kept by each translation context
+PAGE_TABLE_CACHE_PAGES = 256
+
 class TranslationContext(addrxlat.Context):
+    """
+    An address translation context that reads through gdb
+
+    When the current target is a kdumpfile target, page table entries
+    are read from whole page table pages fetched directly from the
+    target and kept in a small cache, rather than through a
+    :obj:`gdb.Value` per entry.  Physical addresses are read without
+    translating them to kernel virtual addresses first.
+
+    :class:`CrashAddressTranslation` uses this context for all of its
+    page table walks, including those on a libkdumpfile translation
+    system.
+    """
     def __init__(self, *args: int, **kwargs: int) -> None:
         super().__init__(*args, **kwargs)
         self.read_caps = addrxlat.CAPS(addrxlat.KVADDR)
 
+        self.target: Optional[kdump.target.Target]
+        try:
+            self.target = crash.current_target()
+        except ValueError:
+            self.target = None
+            return
+
+        self.read_caps |= addrxlat.CAPS(addrxlat.KPHYSADDR)
+        self.page_size = self.target.page_size
+        order = '>' if self.target.byteorder == 'big' else '<'
+        self._u32 = struct.Struct(order + 'I')
+        self._u64 = struct.Struct(order + 'Q')
+        self._readers: Dict[int, Callable[[int, int], bytes]] = {
+            addrxlat.KVADDR : self.target.read_memory,
+            addrxlat.KPHYSADDR : self.target.read_phys,
+        }
+        self._pages: Dict[int, PageCache] = {
+            addrxlat.KVADDR : PageCache(PAGE_TABLE_CACHE_PAGES),
+            addrxlat.KPHYSADDR : PageCache(PAGE_TABLE_CACHE_PAGES),
+        }
+
+    def _read_table(self, faddr: addrxlat.FullAddress) -> Optional[bytes]:
+        cache = self._pages[faddr.addrspace]
+        pageaddr = faddr.addr & ~(self.page_size - 1)
+        page = cache.lookup(pageaddr)
+        if page is None:
+            try:
+                page = self._readers[faddr.addrspace](pageaddr, self.page_size)
+            # pylint: disable=no-member
+            except (EOFException, addrxlat.exceptions.NoDataError,
+                    AddressTranslationException, MissingPageError):
+                return None
+            cache.insert(pageaddr, page)
+        return page
+
+    def _read_failed(self, faddr: addrxlat.FullAddress) -> None:
+        # gdb can only report errors for virtual addresses
+        if faddr.addrspace != addrxlat.KVADDR:
+            raise gdb.MemoryError("Cannot access physical memory at {:#x}"
+                                  .format(faddr.addr))
+
     def cb_sym(self, symtype: int, *args: str) -> int:
         if symtype == addrxlat.SYM_VALUE:
             ms = gdb.lookup_minimal_symbol(args[0])
@@ -38,21 +104,60 @@ class TranslationContext(addrxlat.Context):
         return super().cb_sym(symtype, *args)
 
     def cb_read32(self, faddr: addrxlat.FullAddress) -> int:
+        if self.target is not None:
+            page = self._read_table(faddr)
+            if page is not None:
+                offset = faddr.addr & (self.page_size - 1)
+                return self._u32.unpack_from(page, offset)[0]
+            self._read_failed(faddr)
+
+        # Let gdb report the error for pages we can't read
         v = gdb.Value(faddr.addr).cast(types.uint32_t_p_type)
         return int(v.dereference())
 
     def cb_read64(self, faddr: addrxlat.FullAddress) -> int:
+        if self.target is not None:
+            page = self._read_table(faddr)
+            if page is not None:
+                offset = faddr.addr & (self.page_size - 1)
+                return self._u64.unpack_from(page, offset)[0]
+            self._read_failed(faddr)
+
         v = gdb.Value(faddr.addr).cast(types.uint64_t_p_type)
         return int(v.dereference())
 
 class CrashAddressTranslation:
+    """
+    Kernel address translation for the current target
+
+    Translations of kernel virtual addresses are kept in a cache that
+    works like a TLB: once a virtual page has been translated, further
+    addresses in the same page are translated with a dictionary lookup.
+    Pages mapped by huge page table entries are cached at their full
+    size.
+
+    The object should not be created directly.  Use
+    :func:`get_translation` to share one object per target.
+
+    Attributes:
+        target (kdump.target.Target): The target the translation is for
+        context (addrxlat.Context): The address translation context
+        system (addrxlat.System): The address translation system
+        is_non_auto (bool): Whether machine and physical addresses differ
+        hits (int): The number of translations served from the cache
+        misses (int): The number of translations that walked the page
+            tables
+    """
     def __init__(self) -> None:
+        target = crash.current_target()
+        self.target: kdump.target.Target = target
+        # The page tables are walked through our own context so that the
+        # entries are read from the target's page caches.  libkdumpfile
+        # still describes the translation system when it has one.
+        self.context = TranslationContext()
         try:
-            target = crash.current_target()
-            self.context = target.kdump.get_addrxlat_ctx()
             self.system = target.kdump.get_addrxlat_sys()
         except AttributeError:
-            self.context = TranslationContext()
             self.system = addrxlat.System()
             self.system.os_init(self.context,
                                 arch=utsname.machine,
@@ -67,3 +172,129 @@ class CrashAddressTranslation:
             if meth.kind != addrxlat.LINEAR or meth.off != 0:
                 self.is_non_auto = True
                 break
+
+        self.page_shift = target.page_shift
+        # Cached translations by page size, smallest first
+        self._tlb: Dict[int, Dict[int, int]] = dict()
+        self._tlb_shifts: List[int] = list()
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self) -> None:
+        """Forget all cached translations"""
+        self._tlb = dict()
+        self._tlb_shifts = list()
+
+    def _mapping_shift(self, addr: int) -> int:
+        # The size of the mapping is given by the page table level the
+        # walk ended at.  Machine and physical frames only line up
+        # page by page when they differ.
+        if self.is_non_auto:
+            return self.page_shift
+
+        meth = self.system.get_map(addrxlat.SYS_MAP_HW).search(addr)
+        if meth == addrxlat.SYS_METH_NONE:
+            return self.page_shift
+
+        step = addrxlat.Step(self.context, self.system)
+        step.meth = self.system.get_meth(meth)
+        fields = getattr(step.meth, 'fields', None)
+        if step.meth.kind != addrxlat.PGT or not fields:
+            return self.page_shift
+
+        level = 1
+        try:
+            step.launch(addr)
+            while step.remain > 1:
+                level = step.remain - 1
+                step.step()
+        except addrxlat.BaseException:
+            return self.page_shift
+
+        return sum(fields[:level])
+
+    def _fill(self, addr: int) -> int:
+        self.misses += 1
+
+        fulladdr = addrxlat.FullAddress(addrxlat.KVADDR, addr)
+        fulladdr.conv(addrxlat.KPHYSADDR, self.context, self.system)
+        phys = fulladdr.addr
+
+        shift = self._mapping_shift(addr)
+        mask = (1 << shift) - 1
+        if (addr & mask) != (phys & mask):
+            # Not a mapping we understand; cache just this page
+            shift = self.page_shift
+            mask = (1 << shift) - 1
+
+        try:
+            tlb = self._tlb[shift]
+        except KeyError:
+            tlb = dict()
+            self._tlb[shift] = tlb
+            self._tlb_shifts = sorted(self._tlb)
+
+        tlb[addr >> shift] = phys & ~mask
+        return phys
+
+    def translate(self, addr: int) -> int:
+        """
+        Translate a kernel virtual address to a physical address
+
+        Args:
+            addr: The kernel virtual address
+
+        Returns:
+            int: The physical address
+
+        Raises:
+            addrxlat.BaseException: The address could not be translated
+        """
+        for shift in self._tlb_shifts:
+            base = self._tlb[shift].get(addr >> shift)
+            if base is not None:
+                self.hits += 1
+                return base | (addr & ((1 << shift) - 1))
+
+        return self._fill(addr)
+
+    def translate_many(self, addrs: Iterable[int]) -> List[Optional[int]]:
+        """
+        Translate many kernel virtual addresses to physical addresses
+
+        Args:
+            addrs: The kernel virtual addresses
+
+        Returns:
+            list of int: The physical address for each virtual address,
+            or None where the address could not be translated
+        """
+        result: List[Optional[int]] = list()
+        for addr in addrs:
+            try:
+                result.append(self.translate(addr))
+            except addrxlat.BaseException:
+                result.append(None)
+        return result
+
+_translation: Optional[CrashAddressTranslation] = None
+
+def get_translation() -> CrashAddressTranslation:
+    """
+    Returns the address translation for the current target
+
+    The same object, along with its cache of translations, is returned
+    for as long as the target stays the same.
+
+    Returns:
+        CrashAddressTranslation: The address translation object
+
+    Raises:
+        ValueError: There is no usable target
+    """
+    global _translation # pylint: disable=global-statement
+
+    target = crash.current_target()
+    if _translation is None or _translation.target is not target:
+        _translation = CrashAddressTranslation()
+    return _translation
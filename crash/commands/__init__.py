@@ -59,7 +59,9 @@ import glob
 import importlib
 import argparse
 
+import crash
 from crash.exceptions import DelayedAttributeError, ArgumentTypeError
+from kdump.iostats import IOProfiler
 
 import gdb
 
@@ -167,7 +169,24 @@ class Command(gdb.Command):
         """
         argv = gdb.string_to_argv(argstr)
         args = self._parser.parse_args(argv)
-        self.execute(args)
+
+        iostats = self._iostats()
+        if iostats is None or not iostats.enabled:
+            self.execute(args)
+            return
+
+        iostats.begin(self.name)
+        try:
+            self.execute(args)
+        finally:
+            iostats.end()
+
+    @staticmethod
+    def _iostats() -> Optional[IOProfiler]:
+        try:
+            return crash.current_target().iostats
+        except ValueError:
+            return None
 
     def invoke(self, argstr: str, from_tty: bool = False) -> None:
         """
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+"""
+SUMMARY
+-------
+
+Display dump read statistics per command
+
+::
+
+  iostat [-l] [-e] [-r] [--on | --off] [command ...]
+
+DESCRIPTION
+-----------
+
+This command displays how many reads each crash-python command issued
+against the dump, how much data they requested, how many pages were
+served from the page cache, and how long the reads took.  Statistics
+are only collected after they have been enabled with ``--on``.  Reads
+made outside of crash-python commands, e.g. by gdb ``print``, are
+reported as ``(gdb)``.  When commands run other commands, reads are
+attributed to the innermost command.
+
+By specifying one or more command names, only those commands are
+displayed.  The ``py`` prefix may be omitted.
+
+The following options are available:
+
+-l       display a latency histogram for each command
+-e       display the number of failed reads by error for each command
+-r       reset the statistics after displaying them
+--on     start collecting statistics
+--off    stop collecting statistics (the default)
+
+EXAMPLES
+--------
+
+::
+
+  py-crash> iostat --on
+  py-crash> kmem -s
+  ...
+  py-crash> iostat
+  COMMAND         RUNS      READS        BYTES   HIT%    ERRS   TIME(s)  P99(us)
+  pykmem             2     418263     23911424   97.1       0     3.412      128
+  pyps               1       9172       301552   99.6       0     0.048       16
+  (gdb)              -       1211        48813   88.4       3     0.021       64
+  total              3     428646     24261789   97.2       3     3.481      128
+
+"""
+
+from typing import Dict, List
+
+import argparse
+
+from crash.commands import Command, ArgumentParser, CommandError
+from kdump.iostats import IOStats, OTHER
+import crash
+
+class IOStatCommand(Command):
+    """display dump read statistics per command"""
+
+    def __init__(self) -> None:
+        parser = ArgumentParser(prog="iostat")
+
+        parser.add_argument('-l', action='store_true', default=False)
+        parser.add_argument('-e', action='store_true', default=False)
+        parser.add_argument('-r', action='store_true', default=False)
+
+        group = parser.add_mutually_exclusive_group()
+        group.add_argument('--on', action='store_true', default=False)
+        group.add_argument('--off', action='store_true', default=False)
+
+        parser.add_argument('commands', nargs='*')
+
+        Command.__init__(self, "iostat", parser)
+
+    @staticmethod
+    def _select(profiles: Dict[str, IOStats],
+                names: List[str]) -> Dict[str, IOStats]:
+        if not names:
+            return profiles
+
+        selected = dict()
+        for name in names:
+            for candidate in (name, "py" + name):
+                if candidate in profiles:
+                    selected[candidate] = profiles[candidate]
+                    break
+            else:
+                print(f"No statistics for {name}")
+        return selected
+
+    @staticmethod
+    def print_summary(name: str, stats: IOStats) -> None:
+        runs = "-" if name == OTHER else str(stats.invocations)
+        print("{:<15s} {:>5s} {:>10d} {:>12d} {:>6.1f} {:>7d} {:>9.3f} {:>8d}"
+              .format(name, runs, stats.reads, stats.bytes,
+                      stats.hit_rate * 100, sum(stats.errors.values()),
+                      stats.seconds, stats.latency.percentile(99)))
+
+    @staticmethod
+    def print_latency(name: str, stats: IOStats) -> None:
+        print(f"{name}: read latency")
+        total = len(stats.latency)
+        if not total:
+            print("  no reads")
+            return
+
+        for (low, high, count) in stats.latency:
+            if high is None:
+                label = "{:>8d}us and up".format(low)
+            else:
+                label = "{:>8d}us - {:<8d}us".format(low, high)
+            bar = '#' * max(1, count * 40 // total)
+            print("  {} {:>10d} {}".format(label, count, bar))
+
+    @staticmethod
+    def print_errors(name: str, stats: IOStats) -> None:
+        if not stats.errors:
+            return
+        print(f"{name}: failed reads")
+        for (error, count) in stats.errors.most_common():
+            print("  {:<32s} {:>10d}".format(error, count))
+
+    def execute(self, args: argparse.Namespace) -> None:
+        try:
+            iostats = crash.current_target().iostats
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if args.on:
+            iostats.enabled = True
+            return
+        if args.off:
+            iostats.enabled = False
+            return
+
+        # Leave out commands that didn't read anything, like this one
+        profiles = {name: stats for (name, stats) in iostats.profiles.items()
+                    if stats.reads or stats.errors}
+        profiles = self._select(profiles, args.commands)
+
+        if not iostats.enabled:
+            print("Statistics collection is off; use iostat --on to enable")
+
+        ordered = sorted(profiles.items(), key=lambda x: x[1].seconds,
+                         reverse=True)
+
+        print("{:<15s} {:>5s} {:>10s} {:>12s} {:>6s} {:>7s} {:>9s} {:>8s}"
+              .format("COMMAND", "RUNS", "READS", "BYTES", "HIT%", "ERRS",
+                      "TIME(s)", "P99(us)"))
+        for (name, stats) in ordered:
+            self.print_summary(name, stats)
+        if len(ordered) > 1 and not args.commands:
+            total = IOStats()
+            for (name, stats) in ordered:
+                total.merge(stats)
+            self.print_summary("total", total)
+
+        if args.l:
+            for (name, stats) in ordered:
+                print()
+                self.print_latency(name, stats)
+
+        if args.e:
+            for (name, stats) in ordered:
+                if stats.errors:
+                    print()
+                    self.print_errors(name, stats)
+
+        if args.r:
+            iostats.reset()
+
+IOStatCommand()
@@ -10,25 +10,50 @@ Kernel memory inspection
 
   kmem addr             - try to find addr within kmem caches
   kmem -s [slabname]    - check consistency of single or all kmem cache
+  kmem -s -j workers    - check all kmem caches on several worker sessions
+  kmem -s -o json       - report the findings of the check as JSON
   kmem -z               - report zones
   kmem -V               - report vmstats
+  kmem -p               - report page counts by flag, node and zone
 
 DESCRIPTION
 -----------
 
 This command currently offers very basic kmem cache query and checking.
+
+When all kmem caches are checked, the -j option splits the caches
+between the given number of worker sessions that run at the same time.
+Each worker opens the dump in a gdb session of its own, set up like the
+current one, so this pays off for large dumps where the check takes
+longer than starting the sessions.  The reports are printed in the same
+order as without -j once all the workers are done.  It only works in
+sessions started with pycrash.
+
+With -o json, the check prints one JSON object per line for each finding
+instead of a report, with the kind of finding, the name of the cache,
+the address of the slab (or null), the details, and whether the finding
+is an error.
+
+The -p option reads the flags of every page and reports how many pages
+have each page flag set, followed by the number of slab, LRU, anonymous,
+compound and reserved pages in each zone of each node.  It requires
+NumPy, which is installed with the ``pagestats`` extra of crash-python.
 """
 
-from typing import List
+from typing import Any, Dict, Iterable, List, Tuple, Union
 
 import argparse
+import json
 
 from crash.commands import Command, ArgumentParser
 from crash.commands import CommandError, CommandLineError
 from crash.types.slab import kmem_cache_get_all, kmem_cache_from_name
 from crash.types.slab import slab_from_obj_addr, KmemCacheNotFound
+from crash.types.slab import SlabFinding, print_findings
 from crash.types.node import for_each_zone, for_each_populated_zone
 from crash.types.vmstat import VmStat
+from crash.types.pagestats import page_flag_stats, CATEGORIES
+from crash.parallel import run_parallel, ParallelError
 from crash.util import get_symbol_value
 from crash.exceptions import MissingSymbolError
 
@@ -43,11 +68,24 @@ class KmemCommand(Command):
                            dest='slabname')
         group.add_argument('-z', action='store_true', default=False)
         group.add_argument('-V', action='store_true', default=False)
+        group.add_argument('-p', action='store_true', default=False)
         group.add_argument('address', nargs='?')
 
+        parser.add_argument('-j', type=int, default=1, metavar='workers',
+                            dest='workers')
+        parser.add_argument('-o', choices=['json'])
+
         super().__init__(name, parser)
 
     def execute(self, args: argparse.Namespace) -> None:
+        if args.workers < 1:
+            raise CommandLineError("the number of workers must be positive")
+        if args.workers > 1 and args.slabname is not True:
+            raise CommandLineError("-j can only be used to check all kmem caches")
+
+        if args.o and not args.slabname:
+            raise CommandLineError("-o can only be used with -s")
+
         if args.z:
             self.print_zones()
             return
@@ -56,22 +94,12 @@ class KmemCommand(Command):
             self.print_vmstats()
             return
 
-        if args.slabname:
-            if args.slabname is True:
-                print("Checking all kmem caches...")
-                for cache in kmem_cache_get_all():
-                    print(cache.name)
-                    cache.check_all()
-            else:
-                cache_name = args.slabname
-                print(f"Checking kmem cache {cache_name}")
-                try:
-                    cache = kmem_cache_from_name(cache_name)
-                except KmemCacheNotFound:
-                    raise CommandError(f"Cache {cache_name} not found.")
-                cache.check_all()
+        if args.p:
+            self.print_page_stats()
+            return
 
-            print("Checking done.")
+        if args.slabname:
+            self.check_caches(args.slabname, args.workers, args.o == 'json')
             return
 
         if not args.address:
@@ -87,6 +115,7 @@ class KmemCommand(Command):
             raise CommandError("Address not found in any kmem cache.")
 
         obj = slab.contains_obj(addr)
+        print_findings(slab.pop_findings())
         name = slab.kmem_cache.name
 
         if obj[0]:
@@ -117,6 +146,48 @@ class KmemCommand(Command):
             else:
                 raise RuntimeError("odd return value from contains_obj")
 
+    def check_caches(self, slabname: Union[str, bool], workers: int,
+                     as_json: bool) -> None:
+        if slabname is True:
+            caches = list(kmem_cache_get_all())
+            header = "Checking all kmem caches..."
+        else:
+            try:
+                caches = [kmem_cache_from_name(str(slabname))]
+            except KmemCacheNotFound:
+                raise CommandError(f"Cache {slabname} not found.")
+            header = f"Checking kmem cache {slabname}"
+
+        if not as_json:
+            print(header)
+
+        results: Iterable[Tuple[str, Iterable[SlabFinding]]]
+        if workers > 1:
+            names = [cache.name for cache in caches]
+            try:
+                found = run_parallel('crash.commands.kmem:check_kmem_cache',
+                                     names, workers)
+            except ParallelError as e:
+                raise CommandError(f"Parallel check failed:\n{e}")
+            results = zip(names, ([SlabFinding.from_dict(f) for f in cache]
+                                  for cache in found))
+        else:
+            results = ((cache.name, cache.check()) for cache in caches)
+
+        for (name, findings) in results:
+            if as_json:
+                for finding in findings:
+                    print(json.dumps(finding.to_dict()))
+                continue
+
+            if slabname is True:
+                print(name)
+            for finding in findings:
+                print(finding.render())
+
+        if not as_json:
+            print("Checking done.")
+
     def __print_vmstat(self, vmstat: List[int], diffs: List[int]) -> None:
         vmstat_names = VmStat.get_stat_names()
         just = max(map(len, vmstat_names))
@@ -181,4 +252,47 @@ class KmemCommand(Command):
 
             print()
 
+    def print_page_stats(self) -> None:
+        try:
+            stats = page_flag_stats()
+        except NotImplementedError as e:
+            raise CommandError(str(e))
+
+        just = max([len(name) for (name, count) in stats.flag_counts()] +
+                   [len("PAGE FLAG")])
+        print("{}  {:>12}".format("PAGE FLAG".ljust(just), "PAGES"))
+        for (name, count) in stats.flag_counts():
+            print("{}  {:>12}".format(name.ljust(just), count))
+        print("{}  {:>12}".format("(total)".ljust(just), stats.total))
+        print()
+
+        names = dict()
+        for zone in for_each_zone():
+            names[(zone.nid, zone.zid)] = zone.gdb_obj["name"].string()
+
+        columns = ('total',) + CATEGORIES
+        print("NODE  ZONE  {:8}".format("NAME") +
+              "".join(" {:>12}".format(c.upper()) for c in columns))
+        for (nid, zid) in sorted(stats.zones):
+            counts = stats.zones[(nid, zid)]
+            name = names.get((nid, zid), "?")
+            print("{:4}  {:4}  {:8}".format(nid, zid, name) +
+                  "".join(" {:>12}".format(counts[c]) for c in columns))
+
+def check_kmem_cache(name: str) -> List[Dict[str, Any]]:
+    """
+    Check the consistency of a kmem cache
+
+    This is run by the worker sessions of ``kmem -s -j``.
+
+    Args:
+        name: The name of the kmem cache
+
+    Returns:
+        list of dict: The findings, as serialized by
+        :meth:`.SlabFinding.to_dict`
+    """
+    return [finding.to_dict()
+            for finding in kmem_cache_from_name(name).check()]
+
 KmemCommand("kmem")
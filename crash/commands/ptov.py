@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+"""
+SUMMARY
+-------
+
+Find the virtual addresses that map a physical address
+
+::
+
+  ptov [-a | -p pid ...] address ...
+
+DESCRIPTION
+-----------
+
+This command displays the virtual addresses that map each physical
+address given as a hexadecimal number.  By default, the kernel direct
+map and the vmalloc area are searched.  The user address spaces of tasks
+can be searched as well.
+
+The page tables of each area are walked the first time the area is
+searched and kept in an index for the rest of the session, so later
+lookups are fast.  Task address spaces added to the index by earlier
+commands are searched as well.  Building the index for every task with
+``-a`` may take a while on systems with many large processes.
+
+The following options are available:
+
+-a       also search the user address spaces of all tasks
+-p pid   also search the user address space of the task with this pid;
+         may be given more than once
+
+EXAMPLES
+--------
+
+::
+
+  py-crash> ptov 1a4c100
+  PHYSICAL          VIRTUAL           SOURCE
+  1a4c100           ffff888001a4c100  direct map
+
+  py-crash> ptov -a 2b593040
+  PHYSICAL          VIRTUAL           SOURCE
+  2b593040          601040            PID 1359 (sshd)
+                    ffff88802b593040  direct map
+
+"""
+
+from typing import Optional
+
+import argparse
+import addrxlat
+
+from crash.commands import Command, ArgumentParser
+from crash.commands import CommandError, CommandLineError
+from crash.reversemap import get_reverse_map, SOURCE_TASK
+import crash.cache.tasks
+
+class PTOVCommand(Command):
+    """find the virtual addresses of a physical address"""
+
+    def __init__(self) -> None:
+        parser = ArgumentParser(prog="ptov")
+
+        group = parser.add_mutually_exclusive_group()
+        group.add_argument('-a', action='store_true', default=False)
+        group.add_argument('-p', type=int, action='append', metavar='pid')
+
+        parser.add_argument('args', nargs=argparse.ONE_OR_MORE)
+
+        super().__init__("ptov", parser)
+
+    @staticmethod
+    def _source(source: str, pid: Optional[int]) -> str:
+        if source != SOURCE_TASK or pid is None:
+            return source
+        try:
+            name = crash.cache.tasks.get_task(pid).task_name()
+        except KeyError:
+            return f"PID {pid}"
+        return f"PID {pid} ({name})"
+
+    def execute(self, args: argparse.Namespace) -> None:
+        addrs = list()
+        for arg in args.args:
+            try:
+                addrs.append(int(arg, 16))
+            except ValueError:
+                raise CommandLineError(f"{arg} is not a hex address")
+
+        try:
+            rmap = get_reverse_map()
+            rmap.add_kernel()
+            if args.a:
+                rmap.add_all_tasks()
+            elif args.p:
+                for pid in args.p:
+                    try:
+                        task = crash.cache.tasks.get_task(pid)
+                    except KeyError:
+                        raise CommandError(f"No such task with pid {pid}")
+                    rmap.add_task(task)
+        except (ValueError, NotImplementedError) as e:
+            raise CommandError(f"Couldn't walk the page tables: {e}")
+        except addrxlat.BaseException as e:
+            raise CommandError(f"Couldn't locate the page directory: {e}")
+
+        print('{:16}  {:16}  {}'.format('PHYSICAL', 'VIRTUAL', 'SOURCE'))
+        for addr in addrs:
+            mappings = rmap.lookup(addr)
+            if not mappings:
+                print('{:<16x}  {:16}'.format(addr, '(not mapped)'))
+                continue
+
+            first = f"{addr:x}"
+            for (vaddr, source, pid) in mappings:
+                print('{:<16}  {:<16x}  {}'.format(first, vaddr,
+                                                   self._source(source, pid)))
+                first = ''
+
+PTOVCommand()
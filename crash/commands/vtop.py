@@ -9,6 +9,8 @@ Translate virtual addresses to physical addresses
 ::
 
   vtop [-c [pid | taskp]] [-u|-k] address ...
+  vtop [-c [pid | taskp]] [-u|-k] -m
+  vtop [-o tsv|json] [-f file] [address ...]
 
 
 DESCRIPTION
@@ -36,15 +38,35 @@ as the base page directory unless the -c option is used.
                     However, if this command is invoked from "foreach vtop",
                     the pid or taskp argument should NOT be entered; the
                     address will be translated using the page directory of
-                    each task specified by "foreach".
+                    each task specified by "foreach".  If only one
+                    argument follows, it is translated using the page
+                    directory of the current task.  Kernel threads are
+                    walked with the page directory of their active_mm,
+                    or of init_mm if they have none.  -u and -k are only
+                    accepted together with -m.
+ -m                 Instead of translating addresses, print every mapped
+                    range of the user address space, or of the kernel
+                    address space with -k, of the current task or the
+                    task given with -c.  Pages that map contiguous
+                    physical memory with the same flags are printed as one
+                    range, and unpopulated parts of the page tables are
+                    skipped without reading them.
+ -f file            Read the addresses to translate from a file, one or
+                    more per line, and print one line per address instead
+                    of the full page table walk.  Lines starting with #
+                    are ignored.  Use - to read from the standard input.
+ -o tsv|json        Print one line per address in the given format instead
+                    of the full page table walk.  tsv (the default with -f)
+                    prints tab-separated columns; json prints one JSON
+                    object per line.
 
 ``address``        A hexadecimal user or kernel virtual address.
 
-NOTE
-----
-
-Although the ``-c`` option is referenced in the documentation, it
-is currently unimplemented and will cause a command error.
+In batch mode (``-f`` or ``-o``), all of the addresses are read first,
+then sorted with duplicates removed so that the page tables shared by
+neighboring addresses are read only once.  One line is printed for each
+distinct address, in that order.  Batch mode uses the kernel page tables
+and does not accept -u, -k, -c, or -m.
 
 EXAMPLES
 --------
@@ -110,6 +132,31 @@ of PID 1359:
     PAGE    PHYSICAL   INODE     OFFSET  CNT FLAGS
   c02e9370   2216000         0         0  1
 
+Print the user address space of PID 1359:
+
+::
+
+  py-crash> vtop -c 1359 -m
+  PAGE DIRECTORY: ffff88003f4e2000
+  VIRTUAL START     VIRTUAL END       PHYSICAL START    PHYSICAL END      FLAGS
+  400000            401000            2b6a1000          2b6a2000          PRESENT|USER
+  600000            601000            2b4c5000          2b4c6000          PRESENT|USER|NX
+  601000            602000            2b593000          2b594000          PRESENT|RW|USER|NX
+  7fffb6a3d000      7fffb6a40000      3a012000          3a015000          PRESENT|RW|USER|NX
+
+Translate a list of kernel addresses in batch mode:
+
+::
+
+  py-crash> vtop -f /tmp/addrs
+  VIRTUAL\tPHYSICAL\tSIZE\tPTE\tFLAGS
+  ffffffff81000000\t1000000\t2097152\t1e1\tPRESENT|ACCESSED|DIRTY|PSE|GLOBAL
+  ffffffff81a4c100\t1a4c100\t2097152\t8000000001a001e1\tPRESENT|ACCESSED|DIRTY|PSE|GLOBAL|NX
+  ffffffffa0000000\t-\t-\t-\t-
+
+  py-crash> vtop -o json ffffffff81000000
+  {"virtual": "ffffffff81000000", "physical": "1000000", "size": 2097152, "pte": "1e1", "flags": ["PRESENT", "ACCESSED", "DIRTY", "PSE", "GLOBAL"]}
+
 Determine swap location of user virtual address 40104000:
 
 ::
@@ -132,13 +179,30 @@ Determine swap location of user virtual address 40104000:
   SWAP: /dev/sda8  OFFSET: 22716
 """
 
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+from typing import Tuple
+
+from sys import stdin
+import json
 import argparse
 import addrxlat
 import addrxlat.exceptions
 
 from crash.commands import Command, ArgumentParser
 from crash.commands import CommandError, CommandLineError
-from crash.addrxlat import CrashAddressTranslation
+from crash.addrxlat import get_translation
+from crash.pgtable import PageTableWalker, page_table_walker, pte_flag_names
+from crash.pgtable import PAGE_PRESENT
+from crash.types.task import LinuxTask
+from crash.util.symbols import Symvals
+import crash.cache.tasks
+
+import gdb
+
+symvals = Symvals(['init_mm'])
+
+# A batch translation, as (physical address, mapping size, entry value)
+BatchResult = Optional[Tuple[int, Optional[int], Optional[int]]]
 
 class LinuxPGT:
     table_names = ('PTE', 'PMD', 'PUD', 'PGD')
@@ -204,7 +268,9 @@ class LinuxNonAutoPGT(LinuxPGT):
 
 class _Parser(ArgumentParser):
     def format_usage(self) -> str:
-        return "vtop [-c [pid | taskp]] [-u|-k] address ...\n"
+        return ("vtop [-c [pid | taskp]] [-u|-k] address ...\n"
+                "vtop [-c [pid | taskp]] [-u|-k] -m\n"
+                "vtop [-o tsv|json] [-f file] [address ...]\n")
 
 class VTOPCommand(Command):
     """convert virtual address to physical"""
@@ -217,16 +283,31 @@ class VTOPCommand(Command):
         group.add_argument('-k', action='store_true', default=False)
 
         parser.add_argument('-c', action='store_true', default=False)
+        parser.add_argument('-m', action='store_true', default=False)
 
-        parser.add_argument('args', nargs=argparse.ONE_OR_MORE)
+        parser.add_argument('-f', metavar='file')
+        parser.add_argument('-o', choices=['tsv', 'json'])
+
+        parser.add_argument('args', nargs=argparse.ZERO_OR_MORE)
 
         super().__init__("vtop", parser)
 
     def execute(self, args: argparse.Namespace) -> None:
-        if args.c:
-            raise CommandError("support for the -c argument is unimplemented")
+        if args.f is not None or args.o is not None:
+            self._execute_batch(args)
+            return
+
+        if args.c or args.m:
+            self._execute_task(args)
+            return
 
-        trans = CrashAddressTranslation()
+        if not args.args:
+            raise CommandLineError("no addresses specified")
+
+        try:
+            trans = get_translation()
+        except ValueError as e:
+            raise CommandError(str(e))
         # Silly mypy bug means the base class needs come first
         if not trans.is_non_auto:
             pgt = LinuxPGT(trans.context, trans.system)
@@ -238,11 +319,9 @@ class VTOPCommand(Command):
                 addr = int(addr, 16)
             except ValueError:
                 raise CommandLineError(f"{addr} is not a hex address")
-            fulladdr = addrxlat.FullAddress(addrxlat.KVADDR, addr)
             print('{:16}  {:16}'.format('VIRTUAL', 'PHYSICAL'))
             try:
-                fulladdr.conv(addrxlat.KPHYSADDR, trans.context, trans.system)
-                phys = '{:x}'.format(fulladdr.addr)
+                phys = '{:x}'.format(trans.translate(addr))
             except addrxlat.BaseException:
                 phys = '---'
             print('{:<16x}  {:<16}\n'.format(addr, phys))
@@ -258,4 +337,219 @@ class VTOPCommand(Command):
 
             print()
 
+    @staticmethod
+    def _parse_addresses(words: List[str]) -> List[int]:
+        addrs = list()
+        for word in words:
+            try:
+                addrs.append(int(word, 16))
+            except ValueError:
+                raise CommandLineError(f"{word} is not a hex address")
+        return addrs
+
+    def _parse_lines(self, lines: Iterable[str]) -> List[int]:
+        addrs = list()
+        for line in lines:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                addrs += self._parse_addresses(line.split())
+        return addrs
+
+    def _read_addresses(self, filename: str) -> List[int]:
+        try:
+            if filename == '-':
+                return self._parse_lines(stdin)
+            with open(filename) as f:
+                return self._parse_lines(f)
+        except OSError as e:
+            raise CommandError(f"Couldn't read addresses from {filename}: {e}")
+
+    @staticmethod
+    def _batch_translator() -> Callable[[int], BatchResult]:
+        try:
+            walker = page_table_walker()
+
+            def walk(addr: int) -> BatchResult:
+                result = walker.translate(addr)
+                if result is None:
+                    return None
+                (phys, shift, pte) = result
+                return (phys, 1 << shift, pte)
+            return walk
+        except ValueError as e:
+            raise CommandError(str(e))
+        except (NotImplementedError, addrxlat.BaseException):
+            pass
+
+        # Fall back to addrxlat, without the page table details
+        trans = get_translation()
+
+        def translate(addr: int) -> BatchResult:
+            try:
+                return (trans.translate(addr), None, None)
+            except addrxlat.BaseException:
+                return None
+        return translate
+
+    @staticmethod
+    def _find_task(word: str) -> LinuxTask:
+        try:
+            return crash.cache.tasks.get_task(int(word, 10))
+        except (ValueError, KeyError):
+            pass
+
+        try:
+            addr = int(word, 16)
+        except ValueError:
+            raise CommandLineError(f"{word} is not a pid or task address")
+
+        for task in crash.cache.tasks.tasks.values():
+            if task.task_address() == addr:
+                return task
+        raise CommandError(f"No such task {word}")
+
+    @staticmethod
+    def _task_pgd(task: LinuxTask) -> int:
+        task.update_mem_usage()
+        if task.pgd_addr:
+            return task.pgd_addr
+
+        # Kernel threads have no mm and run on the page tables of the
+        # last task they borrowed, or on those of init_mm
+        active_mm = task.task_struct['active_mm']
+        if active_mm:
+            return int(active_mm['pgd'])
+        return int(symvals.init_mm['pgd'])
+
+    @staticmethod
+    def _task_walker(pgd: int) -> PageTableWalker:
+        try:
+            return page_table_walker(pgd)
+        except (ValueError, NotImplementedError) as e:
+            raise CommandError(f"Couldn't walk the page tables: {e}")
+        except addrxlat.BaseException as e:
+            raise CommandError(f"Couldn't locate the page directory: {e}")
+
+    def _execute_task(self, args: argparse.Namespace) -> None:
+        # The address space of a walk is given by the task's page tables
+        if not args.m and (args.u or args.k):
+            raise CommandLineError("-u and -k are not supported with -c without -m")
+
+        words = list(args.args)
+        if args.c and (len(words) > 1 or (args.m and words)):
+            task = self._find_task(words.pop(0))
+        else:
+            thread = gdb.selected_thread()
+            if thread is None:
+                raise CommandError("No task is selected")
+            task = thread.info
+
+        pgd = self._task_pgd(task)
+        walker = self._task_walker(pgd)
+        if not task.task_struct['mm']:
+            print("KERNEL THREAD: using {}".format(
+                "active_mm" if task.task_struct['active_mm'] else "init_mm"))
+        print(f"PAGE DIRECTORY: {pgd:x}")
+
+        if args.m:
+            if words:
+                raise CommandLineError("-m does not take addresses")
+            self._show_mappings(walker, args.k)
+            return
+
+        if not words:
+            raise CommandLineError("no addresses specified")
+        for addr in self._parse_addresses(words):
+            self._show_walk(walker, addr)
+
+    @staticmethod
+    def _show_walk(walker: PageTableWalker, addr: int) -> None:
+        print('{:16}  {:16}'.format('VIRTUAL', 'PHYSICAL'))
+        result = walker.translate(addr)
+        if result is None:
+            print('{:<16x}  {:<16}\n'.format(addr, '(not mapped)'))
+        else:
+            print('{:<16x}  {:<16x}\n'.format(addr, result[0]))
+
+        for (level, entry, pte) in walker.walk(addr):
+            note = '' if pte & PAGE_PRESENT else ' (NOT PRESENT)'
+            print('{:>4}: {:16x} => {:x}{}'.format(walker.table_name(level),
+                                                   entry, pte, note))
+        if result is not None:
+            (phys, shift, pte) = result
+            print('PAGE: {:16x}\n'.format(phys & ~((1 << shift) - 1)))
+            print('{:>16}  {:>16}  FLAGS'.format('PTE', 'PHYSICAL'))
+            print('{:16x}  {:16x}  ({})'.format(pte, phys,
+                                                '|'.join(pte_flag_names(pte))))
+        print()
+
+    @staticmethod
+    def _show_mappings(walker: PageTableWalker, kernel: bool) -> None:
+        half = 1 << (walker.va_bits - 1)
+        if kernel:
+            mappings = walker.mappings(walker.canonical(half))
+        else:
+            mappings = walker.mappings(0, half)
+
+        print('{:16}  {:16}  {:16}  {:16}  FLAGS'.format(
+            'VIRTUAL START', 'VIRTUAL END', 'PHYSICAL START', 'PHYSICAL END'))
+        for ((vstart, vend), (pstart, pend), flags) in mappings:
+            print('{:<16x}  {:<16x}  {:<16x}  {:<16x}  {}'.format(
+                vstart, vend, pstart, pend, '|'.join(pte_flag_names(flags))))
+
+    def _execute_batch(self, args: argparse.Namespace) -> None:
+        if args.c or args.m:
+            raise CommandError("-c and -m are not supported in batch mode")
+        # Batch mode always translates with the kernel page tables
+        if args.u or args.k:
+            raise CommandLineError("-u and -k are not supported in batch mode")
+
+        addrs = self._parse_addresses(args.args)
+        if args.f is not None:
+            addrs += self._read_addresses(args.f)
+
+        # Neighboring addresses share page tables; each is printed once
+        addrs = sorted(set(addrs))
+
+        translate = self._batch_translator()
+        if args.o == 'json':
+            for line in self._format_json(translate, addrs):
+                print(line)
+        else:
+            print('VIRTUAL\tPHYSICAL\tSIZE\tPTE\tFLAGS')
+            for line in self._format_tsv(translate, addrs):
+                print(line)
+
+    @staticmethod
+    def _format_tsv(translate: Callable[[int], BatchResult],
+                    addrs: List[int]) -> Iterator[str]:
+        for addr in addrs:
+            result = translate(addr)
+            if result is None:
+                yield f"{addr:x}\t-\t-\t-\t-"
+                continue
+            (phys, size, pte) = result
+            if pte is None:
+                yield f"{addr:x}\t{phys:x}\t-\t-\t-"
+            else:
+                flags = '|'.join(pte_flag_names(pte))
+                yield f"{addr:x}\t{phys:x}\t{size}\t{pte:x}\t{flags}"
+
+    @staticmethod
+    def _format_json(translate: Callable[[int], BatchResult],
+                     addrs: List[int]) -> Iterator[str]:
+        for addr in addrs:
+            result = translate(addr)
+            entry: Dict[str, Any]
+            if result is None:
+                entry = {'virtual': f"{addr:x}", 'physical': None}
+            else:
+                (phys, size, pte) = result
+                entry = {'virtual': f"{addr:x}", 'physical': f"{phys:x}"}
+                if pte is not None:
+                    entry['size'] = size
+                    entry['pte'] = f"{pte:x}"
+                    entry['flags'] = pte_flag_names(pte)
+            yield json.dumps(entry)
+
 VTOPCommand()
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+"""
+The crash.parallel module runs work on several crash-python sessions at
+once.
+
+gdb runs Python on a single thread and a session can't be shared
+between processes, so every worker process starts its own gdb session
+on the same dump, set up exactly like the interactive one, and runs a
+share of the jobs there.  A job is a JSON-serializable argument to a
+function that is looked up by name in the worker.  The results are
+written to a file by each worker and handed back in the order of the
+jobs, regardless of which worker ran them or when it finished.
+
+Workers can only be started from sessions started with ``pycrash``,
+which exports the gdb binary, the session's gdbinit file, and the
+directory it was started in as the ``CRASH_PYTHON_GDB``,
+``CRASH_PYTHON_GDBINIT`` and ``CRASH_PYTHON_CWD`` environment variables.
+"""
+
+from typing import Any, Callable, Dict, List, Sequence, Tuple, TypeVar
+
+import importlib
+import json
+import os
+import subprocess
+import tempfile
+
+# Set in the environment of worker sessions
+WORKER_ENV = 'CRASH_PYTHON_WORKER'
+
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+T = TypeVar('T')
+
+class ParallelError(RuntimeError):
+    """A worker session failed"""
+
+def partition(jobs: Sequence[T], workers: int) -> List[List[int]]:
+    """
+    Split jobs between workers
+
+    Jobs are dealt out in turn so that neighboring jobs, which are often
+    of similar size, end up on different workers.
+
+    Args:
+        jobs: The jobs
+        workers: The number of workers
+
+    Returns:
+        list of list of int: The indices of the jobs for each worker.
+        Workers without any jobs are left out.
+
+    Raises:
+        ValueError: The number of workers is not positive
+    """
+    if workers < 1:
+        raise ValueError("at least one worker is required")
+    shares = [list(range(i, len(jobs), workers)) for i in range(workers)]
+    return [share for share in shares if share]
+
+def is_worker() -> bool:
+    """
+    Returns whether this session is a worker session
+
+    Returns:
+        bool: Whether the session was started by :func:`run_parallel`
+    """
+    return bool(os.environ.get(WORKER_ENV))
+
+def _lookup(function: str) -> Callable[[Any], Any]:
+    (modname, _, name) = function.partition(':')
+    return getattr(importlib.import_module(modname), name)
+
+def run_jobs(spec_path: str) -> None:
+    """
+    Run the jobs of a worker and save the results
+
+    This is the entry point of worker sessions.  The spec is a JSON
+    object naming the function as ``module:name``, the jobs, and the
+    file the results are written to.  An exception raised by a job is
+    saved as its result instead of stopping the worker.
+
+    Args:
+        spec_path: The path to the spec file
+    """
+    with open(spec_path) as spec_file:
+        spec = json.load(spec_file)
+
+    func = _lookup(spec['function'])
+    results: List[Dict[str, Any]] = list()
+    for job in spec['jobs']:
+        try:
+            results.append({'result': func(job)})
+        except Exception as e: # pylint: disable=broad-except
+            results.append({'error': "{}: {}".format(type(e).__name__, e)})
+
+    tmpname = spec['output'] + '.tmp'
+    with open(tmpname, 'w') as output:
+        json.dump(results, output)
+    os.rename(tmpname, spec['output'])
+
+def _session_command() -> List[str]:
+    gdb_binary = os.environ.get('CRASH_PYTHON_GDB')
+    gdbinit = os.environ.get('CRASH_PYTHON_GDBINIT')
+    if not gdb_binary or not gdbinit or not os.path.exists(gdbinit):
+        raise ParallelError("worker sessions can only be started from "
+                            "sessions started by pycrash")
+    return [gdb_binary, '-nx', '-batch', '-x', gdbinit]
+
+def _tail(path: str, lines: int = 5) -> str:
+    try:
+        with open(path, errors='replace') as log:
+            return ''.join(log.readlines()[-lines:]).rstrip()
+    except OSError:
+        return ''
+
+def _start_worker(command: List[str], env: Dict[str, str], tmpdir: str,
+                  num: int, spec: Dict[str, Any]
+                 ) -> Tuple['subprocess.Popen[bytes]', str, str]:
+    output = os.path.join(tmpdir, f'results.{num}')
+    spec = dict(spec, output=output)
+    spec_path = os.path.join(tmpdir, f'spec.{num}')
+    with open(spec_path, 'w') as spec_file:
+        json.dump(spec, spec_file)
+
+    log_path = os.path.join(tmpdir, f'log.{num}')
+    with open(log_path, 'w') as log:
+        script = "python import crash.parallel; " \
+                 f"crash.parallel.run_jobs({spec_path!r})"
+        proc = subprocess.Popen(command + ['-ex', script], env=env,
+                                cwd=os.environ.get('CRASH_PYTHON_CWD'),
+                                stdin=subprocess.DEVNULL,
+                                stdout=log, stderr=subprocess.STDOUT)
+    return (proc, output, log_path)
+
+def run_parallel(function: str, jobs: Sequence[Any],
+                 workers: int = DEFAULT_WORKERS) -> List[Any]:
+    """
+    Run jobs on worker sessions
+
+    Args:
+        function: The function that runs a job, as ``module:name``.  It
+            is called in the worker session with the job as its only
+            argument and must return a JSON-serializable result.
+        jobs: The JSON-serializable arguments of each job
+        workers (optional, default=DEFAULT_WORKERS): The number of
+            worker sessions to start
+
+    Returns:
+        list: The result of each job, in the order of the jobs
+
+    Raises:
+        ValueError: The number of workers is not positive
+        ParallelError: The sessions can't be started, a worker session
+            failed, or a job raised an exception
+    """
+    shares = partition(jobs, workers)
+    command = _session_command()
+
+    env = dict(os.environ)
+    env[WORKER_ENV] = '1'
+
+    results: List[Any] = [None] * len(jobs)
+    with tempfile.TemporaryDirectory(prefix='crash-workers.') as tmpdir:
+        procs = list()
+        failed: List[str] = list()
+        try:
+            for (num, share) in enumerate(shares):
+                spec = {
+                    'function': function,
+                    'jobs': [jobs[idx] for idx in share],
+                }
+                procs.append(_start_worker(command, env, tmpdir, num, spec))
+
+            for (num, (proc, output, log_path)) in enumerate(procs):
+                proc.wait()
+                try:
+                    with open(output) as result_file:
+                        saved = json.load(result_file)
+                except (OSError, ValueError):
+                    failed.append("worker {} exited with status {}: {}"
+                                  .format(num, proc.returncode,
+                                          _tail(log_path)))
+                    continue
+
+                for (idx, result) in zip(shares[num], saved):
+                    if 'error' in result:
+                        failed.append("job {!r} failed: {}"
+                                      .format(jobs[idx], result['error']))
+                    results[idx] = result.get('result')
+        finally:
+            # Don't leave workers running on a removed spec directory
+            # when waiting failed or was interrupted
+            for (proc, _, _) in procs:
+                if proc.poll() is None:
+                    proc.kill()
+                    proc.wait()
+
+        if failed:
+            raise ParallelError('\n'.join(failed))
+
+    return results
@@ -0,0 +1,367 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+"""
+The crash.pgtable module walks page tables by reading the table pages
+from the dump directly.
+
+Every table page that is read is decoded once and kept for the life of
+the walker, so walks of neighboring addresses share the upper levels of
+the tree.  Only x86-64 style tables are supported; callers should fall
+back to :func:`crash.addrxlat.get_translation` when
+:func:`page_table_walker` raises :obj:`NotImplementedError`.
+"""
+
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+from typing import Tuple
+
+import struct
+
+import addrxlat
+
+import crash
+from crash.addrxlat import get_translation
+from kdump.target import READ_ERRORS
+
+# x86-64 page table entry bits
+PAGE_PRESENT = 1 << 0
+PAGE_RW = 1 << 1
+PAGE_USER = 1 << 2
+PAGE_PWT = 1 << 3
+PAGE_PCD = 1 << 4
+PAGE_ACCESSED = 1 << 5
+PAGE_DIRTY = 1 << 6
+PAGE_PSE = 1 << 7
+PAGE_GLOBAL = 1 << 8
+PAGE_NX = 1 << 63
+
+PTE_ADDR_MASK = 0x000ffffffffff000
+
+# The flags that must match for neighboring pages to be reported as one
+# range; the accessed and dirty bits differ between pages all the time
+RANGE_FLAGS = (PAGE_PRESENT | PAGE_RW | PAGE_USER | PAGE_PWT | PAGE_PCD |
+               PAGE_GLOBAL | PAGE_NX)
+
+PTE_FLAG_NAMES = (
+    (PAGE_PRESENT, 'PRESENT'),
+    (PAGE_RW, 'RW'),
+    (PAGE_USER, 'USER'),
+    (PAGE_PWT, 'PWT'),
+    (PAGE_PCD, 'PCD'),
+    (PAGE_ACCESSED, 'ACCESSED'),
+    (PAGE_DIRTY, 'DIRTY'),
+    (PAGE_PSE, 'PSE'),
+    (PAGE_GLOBAL, 'GLOBAL'),
+    (PAGE_NX, 'NX'),
+)
+
+# Names of the table levels, from the bottom
+TABLE_NAMES = ('PTE', 'PMD', 'PUD', 'P4D')
+
+# A visited entry, as (level, physical address of the entry, value)
+TableEntry = Tuple[int, int, int]
+
+# A translation, as (physical address, mapping size shift, entry value)
+Translation = Tuple[int, int, int]
+
+# A mapped range, as ((virtual start, end), (physical start, end), flags)
+Mapping = Tuple[Tuple[int, int], Tuple[int, int], int]
+
+def pte_flag_names(pte: int) -> List[str]:
+    """
+    Returns the names of the flags set in a page table entry
+
+    Args:
+        pte: The value of the page table entry
+
+    Returns:
+        list of str: The names of the flags that are set
+    """
+    return [name for (bit, name) in PTE_FLAG_NAMES if pte & bit]
+
+class PageTableWalker:
+    """
+    Walk a tree of x86-64 style page tables
+
+    Args:
+        root: The physical address of the top-level table
+        fields: The number of address bits resolved at each level, page
+            offset first, as reported by :mod:`addrxlat`
+        read_phys: A callable that reads a range of physical memory
+        byteorder (optional, default='little'): The byte order of the
+            entries
+
+    Attributes:
+        tables_read (int): The number of table pages read from the dump
+    """
+    # Bound the memory used by decoded tables; 32 MiB of 4k tables
+    max_tables = 8192
+
+    def __init__(self, root: int, fields: Sequence[int],
+                 read_phys: Callable[[int, int], bytes],
+                 byteorder: str = 'little') -> None:
+        if len(fields) < 2:
+            raise ValueError("page tables need at least one level")
+
+        self.root = root
+        self.fields = tuple(fields)
+        self.levels = len(self.fields) - 1
+        self.page_shift = self.fields[0]
+        self.va_bits = sum(self.fields)
+        self._va_mask = (1 << self.va_bits) - 1
+        self.read_phys = read_phys
+        self.tables_read = 0
+
+        order = '>' if byteorder == 'big' else '<'
+        # The shift and mask of the table index at each level
+        self._shifts = [sum(self.fields[:i + 1]) for i in range(self.levels)]
+        self._masks = [(1 << self.fields[i + 1]) - 1
+                       for i in range(self.levels)]
+        self._formats = [struct.Struct("{}{}Q".format(order, mask + 1))
+                         for mask in self._masks]
+        self._tables: Dict[int, Optional[Tuple[int, ...]]] = dict()
+
+    def table_name(self, level: int) -> str:
+        """
+        Returns the name of the tables at a level
+
+        Args:
+            level: The level, 0 being the lowest
+
+        Returns:
+            str: The name of the table, e.g. ``PTE`` or ``PGD``
+        """
+        if level == self.levels - 1:
+            return 'PGD'
+        return TABLE_NAMES[level]
+
+    def mapping_shift(self, level: int) -> int:
+        """
+        Returns the size of the memory mapped by one entry at a level
+
+        Args:
+            level: The level, 0 being the lowest
+
+        Returns:
+            int: The base-2 logarithm of the size in bytes
+        """
+        return self._shifts[level]
+
+    def _table(self, paddr: int, level: int) -> Optional[Tuple[int, ...]]:
+        try:
+            return self._tables[paddr]
+        except KeyError:
+            pass
+
+        fmt = self._formats[level]
+        try:
+            table: Optional[Tuple[int, ...]]
+            table = fmt.unpack(self.read_phys(paddr, fmt.size))
+        except READ_ERRORS:
+            table = None
+
+        self.tables_read += 1
+        if len(self._tables) >= self.max_tables:
+            self._tables.clear()
+        self._tables[paddr] = table
+        return table
+
+    @staticmethod
+    def is_leaf(level: int, pte: int) -> bool:
+        """
+        Returns whether an entry maps memory rather than a lower table
+
+        Args:
+            level: The level of the entry, 0 being the lowest
+            pte: The value of the entry
+
+        Returns:
+            bool: Whether the entry maps a page
+        """
+        return level == 0 or (level in (1, 2) and bool(pte & PAGE_PSE))
+
+    def walk(self, vaddr: int) -> List[TableEntry]:
+        """
+        Walk the page tables for an address
+
+        Args:
+            vaddr: The virtual address
+
+        Returns:
+            list of (int, int, int): The level, physical address, and
+            value of each entry visited, from the top.  The walk stops at
+            an entry that is not present, maps a page, or points to a
+            table that can't be read.
+        """
+        entries: List[TableEntry] = list()
+        table_addr = self.root
+        for level in range(self.levels - 1, -1, -1):
+            table = self._table(table_addr, level)
+            if table is None:
+                break
+
+            idx = (vaddr >> self._shifts[level]) & self._masks[level]
+            pte = table[idx]
+            entries.append((level, table_addr + idx * 8, pte))
+            if not pte & PAGE_PRESENT or self.is_leaf(level, pte):
+                break
+            table_addr = pte & PTE_ADDR_MASK
+
+        return entries
+
+    def translate(self, vaddr: int) -> Optional[Translation]:
+        """
+        Translate a virtual address to a physical address
+
+        Args:
+            vaddr: The virtual address
+
+        Returns:
+            (int, int, int): The physical address, the base-2 logarithm
+            of the size of the mapping, and the value of the entry that
+            maps it, or None if the address is not mapped
+        """
+        entries = self.walk(vaddr)
+        if not entries:
+            return None
+
+        (level, _, pte) = entries[-1]
+        if not pte & PAGE_PRESENT or not self.is_leaf(level, pte):
+            return None
+
+        shift = self._shifts[level]
+        mask = (1 << shift) - 1
+        return ((pte & PTE_ADDR_MASK & ~mask) | (vaddr & mask), shift, pte)
+
+    def canonical(self, vaddr: int) -> int:
+        """
+        Returns the canonical form of an address within the tables
+
+        Args:
+            vaddr: The address, with or without the upper bits set
+
+        Returns:
+            int: The address with the top bit of the table address
+            range copied into the upper bits
+        """
+        vaddr &= self._va_mask
+        if vaddr >> (self.va_bits - 1):
+            vaddr |= ~self._va_mask & 0xffffffffffffffff
+        return vaddr
+
+    def _leaves(self, table_addr: int, level: int, base: int, start: int,
+                end: int) -> Iterator[Tuple[int, int, int]]:
+        table = self._table(table_addr, level)
+        if table is None:
+            return
+
+        shift = self._shifts[level]
+        first = max(start - base, 0) >> shift
+        last = min((end - 1 - base) >> shift, self._masks[level])
+        for idx in range(first, last + 1):
+            pte = table[idx]
+            if not pte & PAGE_PRESENT:
+                continue
+            vaddr = base + (idx << shift)
+            if self.is_leaf(level, pte):
+                yield (vaddr, level, pte)
+            else:
+                # Tables with nothing present are skipped at this level
+                yield from self._leaves(pte & PTE_ADDR_MASK, level - 1,
+                                        vaddr, start, end)
+
+    def mappings(self, start: int = 0,
+                 end: Optional[int] = None) -> Iterator[Mapping]:
+        """
+        Iterate over the mapped ranges of an address range
+
+        Neighboring pages that map contiguous physical memory with the
+        same :data:`RANGE_FLAGS` are reported as one range.  Ranges are
+        produced as the tables are read, in address order.
+
+        Args:
+            start (optional, default=0): The first virtual address
+            end (optional, default=None): The virtual address after the
+                last one; None for the end of the address space
+
+        Yields:
+            ((int, int), (int, int), int): The canonical virtual start
+            and end, the physical start and end, and the
+            :data:`RANGE_FLAGS` of each range
+        """
+        start &= self._va_mask
+        if end is None:
+            end = self._va_mask + 1
+        else:
+            end = ((end - 1) & self._va_mask) + 1
+        if start >= end:
+            return
+
+        current: Optional[List[int]] = None
+        for (vaddr, level, pte) in self._leaves(self.root, self.levels - 1,
+                                                0, start, end):
+            size = 1 << self._shifts[level]
+            paddr = pte & PTE_ADDR_MASK & ~(size - 1)
+            flags = pte & RANGE_FLAGS
+            if vaddr < start:
+                paddr += start - vaddr
+                size -= start - vaddr
+                vaddr = start
+            size = min(size, end - vaddr)
+
+            if current is not None:
+                if vaddr == current[1] and paddr == current[3] and \
+                   flags == current[4]:
+                    current[1] += size
+                    current[3] += size
+                    continue
+                yield self._mapping(current)
+            current = [vaddr, vaddr + size, paddr, paddr + size, flags]
+
+        if current is not None:
+            yield self._mapping(current)
+
+    def _mapping(self, current: List[int]) -> Mapping:
+        vstart = self.canonical(current[0])
+        return ((vstart, vstart + current[1] - current[0]),
+                (current[2], current[3]), current[4])
+
+def page_table_walker(pgd: Optional[int] = None) -> PageTableWalker:
+    """
+    Create a page table walker for the current target
+
+    Args:
+        pgd (optional, default=None): The kernel virtual address of the
+            top-level table, e.g. a task's ``mm->pgd``.  If not given,
+            the kernel page tables are walked.
+
+    Returns:
+        PageTableWalker: A walker reading tables from the current target
+
+    Raises:
+        NotImplementedError: The page table format is not supported
+        ValueError: There is no usable target
+        addrxlat.BaseException: The top-level table could not be located
+    """
+    trans = get_translation()
+    if trans.is_non_auto:
+        raise NotImplementedError("page tables contain machine addresses")
+
+    meth = trans.system.get_meth(addrxlat.SYS_METH_PGT)
+    if meth.kind != addrxlat.PGT or \
+       getattr(meth, 'pte_format', None) != addrxlat.PTE_X86_64:
+        raise NotImplementedError("unsupported page table format")
+
+    fields = getattr(meth, 'fields', None)
+    if not fields:
+        raise NotImplementedError("page table layout is not available")
+
+    if pgd is None:
+        root = meth.root.copy()
+        root.conv(addrxlat.KPHYSADDR, trans.context, trans.system)
+        root_paddr = root.addr
+    else:
+        root_paddr = trans.translate(pgd)
+
+    target = crash.current_target()
+    return PageTableWalker(root_paddr, fields, target.read_phys,
+                           target.byteorder)
@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+"""
+The crash.reversemap module finds the virtual addresses that map a
+physical address.
+
+The index is built from the page tables one source at a time: the
+kernel direct map, the vmalloc area, and the user address space of each
+task.  A source is walked only when it is first needed and only once
+per session.  Mapped ranges rather than single pages are stored, in
+sorted arrays, so a direct map of terabytes takes a handful of entries.
+"""
+
+from typing import Hashable, Iterable, List, Optional, Set, Tuple
+
+from array import array
+from bisect import bisect_right
+
+import crash
+import crash.cache.tasks
+import kdump.target
+from crash.pgtable import Mapping, PageTableWalker, page_table_walker
+from crash.types.page import Page
+from crash.types.task import LinuxTask
+from crash.util.symbols import Symvals, SymbolCallbacks
+
+import gdb
+
+symvals = Symvals(['max_pfn'])
+
+SOURCE_DIRECT = 'direct map'
+SOURCE_VMALLOC = 'vmalloc'
+SOURCE_TASK = 'task'
+
+# A reverse mapping, as (virtual address, source, pid or None)
+ReverseMapping = Tuple[int, str, Optional[int]]
+
+class ReverseMap:
+    """
+    An index from physical addresses to the virtual addresses that map
+    them
+
+    The object should not be created directly.  Use
+    :func:`get_reverse_map` to share one index per target.
+
+    Args:
+        target: The target to index
+
+    Attributes:
+        target (kdump.target.Target): The target the index is for
+        visited (int): The number of index nodes visited by lookups
+    """
+    # The start of the vmalloc area, randomized with KASLR
+    vmalloc_base = 0xffffc90000000000
+
+    def __init__(self, target: kdump.target.Target) -> None:
+        self.target = target
+        self._sources: Set[Hashable] = set()
+        self._owners: List[Tuple[str, Optional[int]]] = list()
+        self._pending: List[Tuple[int, int, int, int]] = list()
+        self.visited = 0
+
+        # Sorted by physical start address
+        self._pstart = array('Q')
+        self._pend = array('Q')
+        self._vstart = array('Q')
+        self._owner = array('L')
+
+        # A segment tree over the ranges holding the largest physical
+        # end address below each node, so that a lookup only descends
+        # into the nodes that have a range containing the address.  The
+        # leaves start at _leaves; the root is the node at index 1.
+        self._maxend = array('Q', [0, 0])
+        self._leaves = 1
+
+        self._kernel_walker: Optional[PageTableWalker] = None
+
+    @classmethod
+    def setup_vmalloc_base(cls, symbol: gdb.Symbol) -> None:
+        cls.vmalloc_base = int(symbol.value())
+
+    def __len__(self) -> int:
+        return len(self._pstart) + len(self._pending)
+
+    def has_source(self, key: Hashable) -> bool:
+        """
+        Returns whether a source has been added to the index
+
+        Args:
+            key: The key the source was added with
+
+        Returns:
+            bool: Whether the source is indexed
+        """
+        return key in self._sources
+
+    def add_mappings(self, key: Hashable, mappings: Iterable[Mapping],
+                     source: str, pid: Optional[int] = None) -> int:
+        """
+        Add the mapped ranges of a source to the index
+
+        A source that was already added is ignored.
+
+        Args:
+            key: A key that identifies the source
+            mappings: The mapped ranges, as produced by
+                :meth:`crash.pgtable.PageTableWalker.mappings`
+            source: The name of the kind of mapping
+            pid (optional, default=None): The pid of the task that owns
+                the mappings
+
+        Returns:
+            int: The number of ranges added
+        """
+        if key in self._sources:
+            return 0
+
+        owner = len(self._owners)
+        self._owners.append((source, pid))
+        count = 0
+        for ((vstart, _), (pstart, pend), _) in mappings:
+            self._pending.append((pstart, pend, vstart, owner))
+            count += 1
+        self._sources.add(key)
+        return count
+
+    def _merge(self) -> None:
+        if not self._pending:
+            return
+
+        ranges = list(zip(self._pstart, self._pend, self._vstart,
+                          self._owner))
+        ranges += self._pending
+        ranges.sort()
+        self._pending = list()
+
+        self._pstart = array('Q', [r[0] for r in ranges])
+        self._pend = array('Q', [r[1] for r in ranges])
+        self._vstart = array('Q', [r[2] for r in ranges])
+        self._owner = array('L', [r[3] for r in ranges])
+
+        leaves = 1
+        while leaves < len(ranges):
+            leaves <<= 1
+        maxend = array('Q', bytes(8 * leaves)) + self._pend
+        maxend.extend(array('Q', bytes(8 * (leaves - len(ranges)))))
+        for node in range(leaves - 1, 0, -1):
+            maxend[node] = max(maxend[2 * node], maxend[2 * node + 1])
+        self._maxend = maxend
+        self._leaves = leaves
+
+    def lookup(self, paddr: int) -> List[ReverseMapping]:
+        """
+        Look up the indexed virtual addresses of a physical address
+
+        Only the sources added so far are searched.
+
+        Args:
+            paddr: The physical address
+
+        Returns:
+            list of (int, str, int): The virtual address, the source, and
+            the pid of the owning task or None, sorted by virtual address
+        """
+        self._merge()
+
+        results: List[ReverseMapping] = list()
+        # Only the ranges starting at or below the address can contain it
+        limit = bisect_right(self._pstart, paddr)
+        nodes = [(1, 0, self._leaves)]
+        while nodes:
+            (node, first, end) = nodes.pop()
+            self.visited += 1
+            if first >= limit or self._maxend[node] <= paddr:
+                continue
+
+            if node < self._leaves:
+                middle = (first + end) // 2
+                nodes.append((2 * node, first, middle))
+                nodes.append((2 * node + 1, middle, end))
+                continue
+
+            (source, pid) = self._owners[self._owner[first]]
+            vaddr = self._vstart[first] + paddr - self._pstart[first]
+            results.append((vaddr, source, pid))
+        results.sort()
+        return results
+
+    def _walker(self) -> PageTableWalker:
+        if self._kernel_walker is None:
+            self._kernel_walker = page_table_walker()
+        return self._kernel_walker
+
+    def add_kernel(self) -> None:
+        """
+        Add the kernel direct map and the vmalloc area to the index
+
+        Raises:
+            NotImplementedError: The page table format is not supported
+            ValueError: There is no usable target
+        """
+        if self.has_source(SOURCE_DIRECT) and self.has_source(SOURCE_VMALLOC):
+            return
+
+        walker = self._walker()
+        direct_end = Page.directmap_base + \
+                     (int(symvals.max_pfn) << Page.PAGE_SHIFT)
+        self.add_mappings(SOURCE_DIRECT,
+                          walker.mappings(Page.directmap_base, direct_end),
+                          SOURCE_DIRECT)
+
+        # The vmalloc area is followed by a hole and the vmemmap area
+        vmalloc_end = Page.vmemmap_base
+        self.add_mappings(SOURCE_VMALLOC,
+                          walker.mappings(self.vmalloc_base, vmalloc_end),
+                          SOURCE_VMALLOC)
+
+    def add_task(self, task: LinuxTask) -> None:
+        """
+        Add the user address space of a task to the index
+
+        Threads that share an address space are indexed once, under the
+        pid of the first one added.  Kernel threads have no user address
+        space and are skipped.
+
+        Args:
+            task: The task to add
+
+        Raises:
+            NotImplementedError: The page table format is not supported
+            ValueError: There is no usable target
+        """
+        task.update_mem_usage()
+        if not task.pgd_addr or self.has_source(('mm', task.pgd_addr)):
+            return
+
+        walker = page_table_walker(task.pgd_addr)
+        user_end = 1 << (walker.va_bits - 1)
+        self.add_mappings(('mm', task.pgd_addr), walker.mappings(0, user_end),
+                          SOURCE_TASK, task.task_pid())
+
+    def add_all_tasks(self) -> None:
+        """
+        Add the user address spaces of all tasks to the index
+
+        Raises:
+            NotImplementedError: The page table format is not supported
+            ValueError: There is no usable target
+        """
+        for pid in sorted(crash.cache.tasks.tasks):
+            self.add_task(crash.cache.tasks.tasks[pid])
+
+symbol_cbs = SymbolCallbacks([('vmalloc_base',
+                               ReverseMap.setup_vmalloc_base)])
+
+_reverse_map: Optional[ReverseMap] = None
+
+def get_reverse_map() -> ReverseMap:
+    """
+    Returns the reverse mapping index for the current target
+
+    The same index, with every source added to it, is returned for as
+    long as the target stays the same.
+
+    Returns:
+        ReverseMap: The reverse mapping index
+
+    Raises:
+        ValueError: There is no usable target
+    """
+    global _reverse_map # pylint: disable=global-statement
+
+    target = crash.current_target()
+    if _reverse_map is None or _reverse_map.target is not target:
+        _reverse_map = ReverseMap(target)
+    return _reverse_map
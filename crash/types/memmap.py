@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+"""
+The crash.types.memmap module reads the ``struct page`` array in bulk.
+
+Instead of creating a :obj:`gdb.Value` for each page, runs of
+``struct page`` are read from the dump as one buffer and the fields that
+page scans use most are decoded into arrays, thousands of pages at a
+time.
+"""
+
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import struct
+from array import array
+
+import crash
+from crash.types.page import Page, types, symvals
+from crash.types.page import get_section_index
+from crash.util import find_member_variant, offsetof
+from kdump.target import READ_ERRORS
+
+import gdb
+
+# The number of pages decoded at once
+DEFAULT_CHUNK_PAGES = 4096
+
+class PageChunk:
+    """
+    The decoded fields of a run of consecutive pages
+
+    The arrays are indexed by the pfn relative to :attr:`start_pfn`.
+
+    Attributes:
+        start_pfn (int): The pfn of the first page
+        flags (array of int): The ``flags`` word of each page
+        mapping (array of int): The ``mapping`` pointer of each page
+        refcount (array of int): The ``_refcount`` (or ``_count``) of
+            each page
+        compound_head (array of int): The raw ``compound_head`` (or
+            ``first_page``) word of each page
+    """
+    __slots__ = ('start_pfn', 'flags', 'mapping', 'refcount',
+                 'compound_head')
+
+    def __init__(self, start_pfn: int, flags: array, mapping: array,
+                 refcount: array, compound_head: array) -> None:
+        self.start_pfn = start_pfn
+        self.flags = flags
+        self.mapping = mapping
+        self.refcount = refcount
+        self.compound_head = compound_head
+
+    def __len__(self) -> int:
+        return len(self.flags)
+
+    @property
+    def end_pfn(self) -> int:
+        """The pfn after the last page"""
+        return self.start_pfn + len(self.flags)
+
+    def pfns(self) -> range:
+        """
+        Returns the pfns of the pages in the chunk
+
+        Returns:
+            range: The pfns of the pages
+        """
+        return range(self.start_pfn, self.end_pfn)
+
+class MemMapReader:
+    """
+    Read ``struct page`` arrays in bulk
+
+    Pages are read from the vmemmap, or from the ``section_mem_map`` of
+    each memory section with classic sparsemem.  Only the pfns in present
+    memory sections are read when the kernel uses them.  Ranges of the
+    array that are missing from the dump are left out of the chunks.
+
+    Args:
+        chunk_pages (optional, default=DEFAULT_CHUNK_PAGES): The number
+            of pages to read and decode at once
+
+    Attributes:
+        page_struct_size (int): The size of ``struct page``
+    """
+    def __init__(self, chunk_pages: int = DEFAULT_CHUNK_PAGES) -> None:
+        if chunk_pages <= 0:
+            raise ValueError("chunk_pages must be positive")
+
+        self.chunk_pages = chunk_pages
+        self.target = crash.current_target()
+
+        page_type = types.page_type
+        self.page_struct_size = page_type.sizeof
+        word = 'Q' if types.unsigned_long_type.sizeof == 8 else 'I'
+        refcount_name = find_member_variant(page_type, ['_refcount', '_count'])
+        head_name = find_member_variant(page_type,
+                                        ['compound_head', 'first_page'])
+        fields = [('flags', offsetof(page_type, 'flags'), word),
+                  ('mapping', offsetof(page_type, 'mapping'), word),
+                  ('refcount', offsetof(page_type, refcount_name), 'i'),
+                  ('compound_head', offsetof(page_type, head_name), word)]
+        (self._format, self._columns) = self._build_format(fields)
+
+        self._sections = get_section_index()
+
+    def _build_format(self, fields: List[Tuple[str, Optional[int], str]]
+                      ) -> Tuple[struct.Struct, Dict[str, int]]:
+        # Fields sharing an offset, like members of a union, are decoded
+        # once
+        offsets: Dict[int, str] = dict()
+        for (_, offset, code) in fields:
+            assert offset is not None
+            offsets.setdefault(offset, code)
+
+        fmt = '>' if self.target.byteorder == 'big' else '<'
+        pos = 0
+        order: List[int] = list()
+        for offset in sorted(offsets):
+            if offset > pos:
+                fmt += f'{offset - pos}x'
+            fmt += offsets[offset]
+            pos = offset + struct.calcsize('<' + offsets[offset])
+            order.append(offset)
+        if self.page_struct_size > pos:
+            fmt += f'{self.page_struct_size - pos}x'
+
+        columns = {name: order.index(offset)
+                   for (name, offset, _) in fields if offset is not None}
+        return (struct.Struct(fmt), columns)
+
+    def page_address(self, pfn: int) -> Optional[int]:
+        """
+        Returns the address of the ``struct page`` of a pfn
+
+        Args:
+            pfn: The page frame number
+
+        Returns:
+            int: The address, or None if the memory section of the pfn
+            is not present
+        """
+        try:
+            return Page.page_address(pfn)
+        except gdb.MemoryError:
+            return None
+
+    def _read_runs(self, start_pfn: int,
+                   count: int) -> Iterator[Tuple[int, bytes]]:
+        addr = self.page_address(start_pfn)
+        if addr is None:
+            return
+
+        size = self.page_struct_size
+        length = count * size
+        try:
+            yield (start_pfn, self.target.read_memory(addr, length))
+            return
+        except READ_ERRORS:
+            pass
+
+        # Find the parts of the array that are in the dump, one dump page
+        # at a time
+        page_size = self.target.page_size
+        first_page = addr // page_size
+        data = bytearray(length)
+        present: List[bool] = list()
+        for pageaddr in range(first_page * page_size, addr + length,
+                              page_size):
+            start = max(pageaddr, addr)
+            end = min(pageaddr + page_size, addr + length)
+            try:
+                data[start - addr:end - addr] = \
+                    self.target.read_memory(start, end - start)
+                present.append(True)
+            except READ_ERRORS:
+                present.append(False)
+
+        run_start: Optional[int] = None
+        for idx in range(count + 1):
+            valid = False
+            if idx < count:
+                first = (addr + idx * size) // page_size - first_page
+                last = (addr + (idx + 1) * size - 1) // page_size - first_page
+                valid = all(present[first:last + 1])
+            if valid and run_start is None:
+                run_start = idx
+            elif not valid and run_start is not None:
+                yield (start_pfn + run_start,
+                       bytes(data[run_start * size:idx * size]))
+                run_start = None
+
+    def _decode(self, start_pfn: int, data: bytes) -> PageChunk:
+        rows = self._format.iter_unpack(data)
+        decoded = list(zip(*rows))
+        columns = self._columns
+        return PageChunk(start_pfn,
+                         array('Q', decoded[columns['flags']]),
+                         array('Q', decoded[columns['mapping']]),
+                         array('i', decoded[columns['refcount']]),
+                         array('Q', decoded[columns['compound_head']]))
+
+    def read(self, start_pfn: int, count: int) -> Iterator[PageChunk]:
+        """
+        Read the pages in a range of pfns
+
+        Args:
+            start_pfn: The first pfn to read
+            count: The number of pages to read
+
+        Yields:
+            PageChunk: The decoded pages, for each run of pages whose
+            ``struct page`` could be read
+        """
+        for (pfn, data) in self._read_runs(start_pfn, count):
+            if data:
+                yield self._decode(pfn, data)
+
+    def chunks(self, start_pfn: int = 0,
+               end_pfn: Optional[int] = None) -> Iterator[PageChunk]:
+        """
+        Read the pages in a range of pfns, a chunk at a time
+
+        Chunks are aligned to the chunk size and never cross memory
+        sections with classic sparsemem.
+
+        Args:
+            start_pfn (optional, default=0): The first pfn to read
+            end_pfn (optional, default=None): The pfn after the last one
+                to read, or None for ``max_pfn``
+
+        Yields:
+            PageChunk: The decoded pages
+        """
+        if end_pfn is None:
+            end_pfn = int(symvals.max_pfn)
+
+        if self._sections is not None:
+            # Holes between the present sections are never read
+            ranges = self._sections.pfn_ranges(start_pfn, end_pfn)
+            section = 1 << self._sections.pfn_section_shift
+        else:
+            ranges = [(start_pfn, end_pfn)]
+            section = 0
+
+        step = self.chunk_pages
+        for (pfn, range_end) in ranges:
+            while pfn < range_end:
+                end = min((pfn // step + 1) * step, range_end)
+                if section:
+                    end = min(end, (pfn // section + 1) * section)
+                yield from self.read(pfn, end - pfn)
+                pfn = end
+
+def for_each_page_chunk(start_pfn: int = 0, end_pfn: Optional[int] = None,
+                        chunk_pages: int = DEFAULT_CHUNK_PAGES
+                        ) -> Iterator[PageChunk]:
+    """
+    Iterate over the pages of the system in decoded chunks
+
+    Args:
+        start_pfn (optional, default=0): The first pfn to read
+        end_pfn (optional, default=None): The pfn after the last one to
+            read, or None for ``max_pfn``
+        chunk_pages (optional, default=DEFAULT_CHUNK_PAGES): The number
+            of pages to read and decode at once
+
+    Yields:
+        PageChunk: The decoded pages
+    """
+    return MemMapReader(chunk_pages).chunks(start_pfn, end_pfn)
@@ -1,12 +1,20 @@
 #!/usr/bin/python3
 # vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
 
-from typing import Dict, Union, TypeVar, Iterable, Callable
+from typing import Dict, Union, TypeVar, Iterable, Callable, List, Optional
+from typing import Tuple, ClassVar
 
 from math import log, ceil
+from collections import OrderedDict
+from bisect import bisect_right
+from itertools import islice
+import struct
 
 import crash
-from crash.util import find_member_variant
+import kdump.target
+from crash.util import find_member_variant, offsetof, offsetof_type
+from crash.util import read_scatter, target_byteorder
+from crash.util import safe_get_symbol_value
 from crash.util.symbols import Types, Symvals, TypeCallbacks
 from crash.util.symbols import SymbolCallbacks, MinimalSymbolCallbacks
 from crash.cache.syscache import config
@@ -17,6 +25,27 @@ import gdb
 #TODO debuginfo won't tell us, depends on version?
 PAGE_MAPPING_ANON = 1
 
+# Flags in the low bits of mem_section.section_mem_map.  The number of
+# flag bits grows with the kernel version; kernels that define it as an
+# enumerator give it as SECTION_MAP_LAST_BIT.
+SECTION_MARKED_PRESENT = 1 << 0
+SECTION_HAS_MEM_MAP = 1 << 1
+SECTION_MAP_LAST_BIT_DEFAULT = 5
+
+# The number of decoded Page objects kept for reuse
+PAGE_CACHE_ENTRIES = 65536
+
+# The number of compound page ranges kept for resolving tail pages
+COMPOUND_RANGE_ENTRIES = 1 << 20
+
+# Compound orders above this are treated as garbage
+MAX_COMPOUND_ORDER = 18
+
+# The section size on architectures that don't export it in vmcoreinfo
+SECTION_SIZE_BITS_DEFAULT = {
+    'i386:x86-64': 27,
+}
+
 types = Types(['unsigned long', 'struct page', 'enum pageflags',
                'enum zone_type', 'struct mem_section'])
 symvals = Symvals(['mem_section', 'max_pfn'])
@@ -24,11 +53,34 @@ symvals = Symvals(['mem_section', 'max_pfn'])
 PageType = TypeVar('PageType', bound='Page')
 
 class Page:
+    """
+    A decoded ``struct page``
+
+    The fields used by the page and slab helpers are read from the dump
+    in one read when the object is created.  The :obj:`gdb.Value` for the
+    page is only created when :attr:`gdb_obj` is used.  Use
+    :func:`pfn_to_page`, :func:`page_from_addr` or :meth:`lookup` to
+    share the objects of recently used pages.
+
+    Args:
+        obj: The ``struct page``, or None to locate it by pfn
+        pfn: The page frame number
+        address (optional, default=None): The address of the
+            ``struct page`` if obj is None
+
+    Attributes:
+        pfn (int): The page frame number
+        address (int): The address of the ``struct page``
+        flags (int): The ``flags`` word
+    """
+    __slots__ = ('pfn', 'address', 'flags', '_obj', '_mapping', '_head',
+                 '_slab_cache', '_slab_page')
+
     slab_cache_name = None
     slab_page_name = None
     compound_head_name = None
     vmemmap_base = 0xffffea0000000000
-    vmemmap: gdb.Value
+    vmemmap: ClassVar[gdb.Value]
     directmap_base = 0xffff880000000000
     pageflags: Dict[str, int] = dict()
 
@@ -52,8 +104,15 @@ class Page:
     SECTION_SIZE_BITS = -1 # Depends on sparsemem=True
     SECTIONS_PER_ROOT = -1 # Depends on SPARSEMEM_EXTREME
 
-    _is_tail: Callable[['Page'], bool]
-    _compound_head: Callable[['Page'], int]
+    _is_tail: ClassVar[Callable[['Page'], bool]]
+    _compound_head: ClassVar[Callable[['Page'], int]]
+
+    # The format of a word and the offsets of the flags, mapping,
+    # compound head, slab cache, and slab page words
+    _layout: Optional[Tuple[struct.Struct, Tuple[int, ...]]] = None
+
+    _cache: 'OrderedDict[int, Page]' = OrderedDict()
+    _cache_target: Optional[gdb.Target] = None
 
     @classmethod
     def setup_page_type(cls, gdbtype: gdb.Type) -> None:
@@ -87,13 +146,8 @@ class Page:
     @classmethod
     def pfn_to_page(cls, pfn: int) -> gdb.Value:
         if cls.sparsemem:
-            section_nr = pfn >> (cls.SECTION_SIZE_BITS - cls.PAGE_SHIFT)
-            root_idx = section_nr // cls.SECTIONS_PER_ROOT
-            offset = section_nr & (cls.SECTIONS_PER_ROOT - 1)
-            section = symvals.mem_section[root_idx][offset]
-
-            pagemap = section["section_mem_map"] & ~3
-            return (pagemap.cast(types.page_type.pointer()) + pfn).dereference()
+            page = gdb.Value(cls.page_address(pfn))
+            return page.cast(types.page_type.pointer()).dereference()
 
         # pylint doesn't have the visibility it needs to evaluate this
         # pylint: disable=unsubscriptable-object
@@ -165,20 +219,182 @@ class Page:
                 cls.PG_tail = 1 << cls.pageflags['PG_compound'] | 1 << cls.pageflags['PG_reclaim']
                 cls._is_tail = cls.__is_tail_flagcombo
 
+    @classmethod
+    def page_address(cls, pfn: int) -> int:
+        """
+        Returns the address of the ``struct page`` of a pfn
+
+        Args:
+            pfn: The page frame number
+
+        Returns:
+            int: The address of the ``struct page``
+
+        Raises:
+            gdb.MemoryError: The pfn is not in a present memory section
+        """
+        if cls.sparsemem:
+            index = get_section_index()
+            if index is None:
+                raise gdb.MemoryError("memory sections are not available")
+            addr = index.page_address(pfn)
+            if addr is None:
+                raise gdb.MemoryError(f"pfn {pfn:#x} is not in a present memory section")
+            return addr
+        return cls.vmemmap_base + pfn * types.page_type.sizeof
+
+    @classmethod
+    def pfn_from_address(cls, addr: int) -> Optional[int]:
+        """
+        Returns the pfn described by the ``struct page`` at an address
+
+        Args:
+            addr: The address of the ``struct page``
+
+        Returns:
+            int: The page frame number, or None if the address is not
+            the start of a ``struct page`` in the mem_map
+        """
+        if cls.sparsemem:
+            index = get_section_index()
+            if index is None:
+                return None
+            return index.pfn_of_page(addr)
+
+        (pfn, rem) = divmod(addr - cls.vmemmap_base, types.page_type.sizeof)
+        if pfn < 0 or rem:
+            return None
+        return pfn
+
+    @classmethod
+    def lookup(cls, pfn: int, obj: Optional[gdb.Value] = None) -> 'Page':
+        """
+        Returns the page for a pfn, reusing a recently decoded one
+
+        Args:
+            pfn: The page frame number
+            obj (optional, default=None): The ``struct page`` of the pfn,
+                if the caller has it already
+
+        Returns:
+            Page: The decoded page
+        """
+        target = gdb.current_target()
+        if Page._cache_target is not target:
+            Page._cache.clear()
+            Page._cache_target = target
+
+        try:
+            page = Page._cache[pfn]
+            Page._cache.move_to_end(pfn)
+            return page
+        except KeyError:
+            pass
+
+        page = cls(obj, pfn)
+        Page._cache[pfn] = page
+        if len(Page._cache) > PAGE_CACHE_ENTRIES:
+            Page._cache.popitem(last=False)
+        return page
+
+    @classmethod
+    def from_page_addr(cls, addr: int,
+                       obj: Optional[gdb.Value] = None) -> 'Page':
+        """
+        Returns the page for the ``struct page`` at an address
+
+        Pages found in the mem_map are shared with :meth:`lookup`.  A
+        ``struct page`` outside of it is decoded on its own, since it
+        has no pfn to share it under.
+
+        Args:
+            addr: The address of the ``struct page``
+            obj (optional, default=None): The ``struct page``, if the
+                caller has it already
+
+        Returns:
+            Page: The decoded page
+        """
+        pfn = cls.pfn_from_address(addr)
+        if pfn is None:
+            pfn = (addr - Page.vmemmap_base) // types.page_type.sizeof
+            return cls(obj, pfn, addr)
+        return cls.lookup(pfn, obj)
+
     @classmethod
     def from_obj(cls, page: gdb.Value) -> 'Page':
-        pfn = (int(page.address) - Page.vmemmap_base) // types.page_type.sizeof
-        return Page(page, pfn)
+        return cls.from_page_addr(int(page.address), page)
 
     @classmethod
-    def from_page_addr(cls, addr: int) -> 'Page':
-        page_ptr = gdb.Value(addr).cast(types.page_type.pointer())
-        return cls.from_obj(page_ptr.dereference())
+    def _setup_layout(cls) -> Tuple[struct.Struct, Tuple[int, ...]]:
+        page_type = types.page_type
+        word_size = types.unsigned_long_type.sizeof
+        order = '>' if target_byteorder() == 'big' else '<'
+        word = struct.Struct(order + ('Q' if word_size == 8 else 'I'))
+
+        def member(name: Optional[str], index: int = 0) -> int:
+            assert name is not None
+            offset = offsetof(page_type, name)
+            assert offset is not None
+            return offset + index * word_size
+
+        if cls.slab_cache_name == 'lru':
+            slab_cache = member('lru')
+        else:
+            slab_cache = member(cls.slab_cache_name)
+        if cls.slab_page_name == 'lru':
+            slab_page = member('lru', 1)
+        else:
+            slab_page = member(cls.slab_page_name)
+
+        return (word, (member('flags'), member('mapping'),
+                       member(cls.compound_head_name), slab_cache, slab_page))
 
-    def __init__(self, obj: gdb.Value, pfn: int) -> None:
-        self.gdb_obj = obj
+    @classmethod
+    def raw_layout(cls) -> Tuple[struct.Struct, Tuple[int, ...]]:
+        """
+        Returns how to decode the words of a raw ``struct page``
+
+        Returns:
+            (struct.Struct, tuple of int): The format of a word, and the
+            offsets of the flags, mapping, compound head, slab cache, and
+            slab page words
+        """
+        layout = Page._layout
+        if layout is None:
+            layout = cls._setup_layout()
+            Page._layout = layout
+        return layout
+
+    def __init__(self, obj: Optional[gdb.Value], pfn: int,
+                 address: Optional[int] = None) -> None:
         self.pfn = pfn
-        self.flags = int(obj["flags"])
+        self._obj = obj
+        if obj is not None:
+            self.address = int(obj.address)
+        elif address is not None:
+            self.address = address
+        else:
+            self.address = self.page_address(pfn)
+
+        (word, offsets) = self.raw_layout()
+        size = types.page_type.sizeof
+        data = read_scatter([(self.address, size)])[0]
+        if data is None:
+            # Let gdb raise the error callers expect for unreadable pages
+            inferior = gdb.selected_inferior()
+            data = inferior.read_memory(self.address, size).tobytes()
+        (self.flags, self._mapping, self._head, self._slab_cache,
+         self._slab_page) = [word.unpack_from(data, offset)[0]
+                             for offset in offsets]
+
+    @property
+    def gdb_obj(self) -> gdb.Value:
+        """The ``struct page`` as a :obj:`gdb.Value`"""
+        if self._obj is None:
+            ptr = gdb.Value(self.address).cast(types.page_type.pointer())
+            self._obj = ptr.dereference()
+        return self._obj
 
     def __is_tail_flagcombo(self) -> bool:
         return bool((self.flags & self.PG_tail) == self.PG_tail)
@@ -187,7 +403,7 @@ class Page:
         return bool(self.flags & self.PG_tail)
 
     def __is_tail_compound_head_bit(self) -> bool:
-        return bool(self.gdb_obj['compound_head'] & 1)
+        return bool(self._head & 1)
 
     def is_tail(self) -> bool:
         return self._is_tail()
@@ -199,21 +415,29 @@ class Page:
         return bool(self.flags & self.PG_lru)
 
     def is_anon(self) -> bool:
-        mapping = int(self.gdb_obj["mapping"])
-        return (mapping & PAGE_MAPPING_ANON) != 0
+        return (self._mapping & PAGE_MAPPING_ANON) != 0
 
-    def get_slab_cache(self) -> gdb.Value:
-        if Page.slab_cache_name == "lru":
-            return self.gdb_obj["lru"]["next"]
-        return self.gdb_obj[Page.slab_cache_name]
+    def get_slab_cache(self) -> int:
+        return self._slab_cache
 
-    def get_slab_page(self) -> gdb.Value:
-        if Page.slab_page_name == "lru":
-            return self.gdb_obj["lru"]["prev"]
-        return self.gdb_obj[Page.slab_page_name]
+    def get_slab_page(self) -> int:
+        return self._slab_page
 
     def get_nid(self) -> int:
-        return self.flags >> (self.BITS_PER_LONG - self.NODES_WIDTH)
+        return self.nid_from_flags(self.flags)
+
+    @classmethod
+    def nid_from_flags(cls, flags: int) -> int:
+        """
+        Returns the node id encoded in the ``flags`` word of a page
+
+        Args:
+            flags: The ``flags`` word
+
+        Returns:
+            int: The node id
+        """
+        return flags >> (cls.BITS_PER_LONG - cls.NODES_WIDTH)
 
     def get_zid(self) -> int:
         shift = self.BITS_PER_LONG - self.NODES_WIDTH - self.ZONES_WIDTH
@@ -221,14 +445,37 @@ class Page:
         return zid
 
     def __compound_head_first_page(self) -> int:
-        return int(self.gdb_obj['first_page'])
+        return self._head
 
     def __compound_head_uses_low_bit(self) -> int:
-        return int(self.gdb_obj['compound_head']) - 1
+        return self._head - 1
 
     def __compound_head(self) -> int:
         return self._compound_head()
 
+    @classmethod
+    def tail_head_address(cls, flags: int, head: int) -> Optional[int]:
+        """
+        Decode the head of a compound page from the raw words of a page
+
+        Args:
+            flags: The ``flags`` word of the page
+            head: The ``compound_head`` (or ``first_page``) word
+
+        Returns:
+            int: The address of the ``struct page`` of the head page, or
+            None if the page is not a tail page
+        """
+        if cls.PG_tail == -1:
+            if not head & 1:
+                return None
+        elif flags & cls.PG_tail != cls.PG_tail:
+            return None
+
+        if cls.compound_head_name == 'first_page':
+            return head
+        return head - 1
+
     def compound_head(self) -> 'Page':
         if not self.is_tail():
             return self
@@ -250,17 +497,509 @@ symbol_cbs = SymbolCallbacks([('vmemmap_base', Page.setup_vmemmap_base),
 
 
 def pfn_to_page(pfn: int) -> 'Page':
-    return Page(Page.pfn_to_page(pfn), pfn)
+    return Page.lookup(pfn)
 
 def page_from_addr(addr: int) -> 'Page':
     pfn = (addr - Page.directmap_base) // Page.PAGE_SIZE
     return pfn_to_page(pfn)
 
 def page_from_gdb_obj(gdb_obj: gdb.Value) -> 'Page':
-    pfn = (int(gdb_obj.address) - Page.vmemmap_base) // types.page_type.sizeof
-    return Page(gdb_obj, pfn)
+    return Page.from_obj(gdb_obj)
+
+def page_flags(pfns: Iterable[int]) -> List[Optional[int]]:
+    """
+    Read the ``flags`` word of many pages at once
+
+    Args:
+        pfns: The page frame numbers
+
+    Returns:
+        list of int: The ``flags`` word of each page, in the order given,
+        or None if the ``struct page`` can't be read
+    """
+    (word, offsets) = Page.raw_layout()
+    located = list()
+    flags: List[Optional[int]] = list()
+    for pfn in pfns:
+        flags.append(None)
+        try:
+            located.append((len(flags) - 1, Page.page_address(pfn)))
+        except gdb.MemoryError:
+            pass
+
+    data = read_scatter([(addr + offsets[0], word.size)
+                         for (_, addr) in located])
+    for ((idx, _), buf) in zip(located, data):
+        if buf is not None:
+            flags[idx] = word.unpack(buf)[0]
+    return flags
+
+class SectionIndex:
+    """
+    The present memory sections and their ``struct page`` arrays
+
+    The ``mem_section`` roots are read once, when the index is created,
+    so that pfns can be checked and located without reading them again.
+
+    The object should not be created directly.  Use
+    :func:`get_section_index` to share one index per target.
+
+    Args:
+        target: The target the index is for
+
+    Attributes:
+        target (kdump.target.Target): The target the index is for
+        section_size_bits (int): The base-2 logarithm of the size of a
+            memory section in bytes
+        pfn_section_shift (int): The base-2 logarithm of the number of
+            pages in a memory section
+        mem_maps (dict): The encoded ``section_mem_map`` of each present
+            section with a mem_map, by section number
+
+    Raises:
+        NotImplementedError: The kernel doesn't use memory sections or
+            their size is unknown
+    """
+    def __init__(self, target: kdump.target.Target) -> None:
+        self.target = target
+        try:
+            symvals.mem_section # pylint: disable=pointless-statement
+            section_type = types.mem_section_type
+        except DelayedAttributeError:
+            raise NotImplementedError("kernel does not use memory sections")
+
+        self.section_size_bits = self._section_size_bits()
+        self.pfn_section_shift = self.section_size_bits - Page.PAGE_SHIFT
+        self.mem_maps: Dict[int, int] = dict()
+        self._ranges: List[Tuple[int, int]] = list()
+
+        # The address of the first struct page of each section and the
+        # section number, sorted by address
+        self._map_starts: List[int] = list()
+        self._map_sections: List[int] = list()
+
+        self._word_mask = (1 << (types.unsigned_long_type.sizeof * 8)) - 1
+        self._page_size = types.page_type.sizeof
+        self._map_mask = ~((1 << self._section_map_last_bit()) - 1) & \
+                         self._word_mask
+        self._read_sections(section_type)
+
+    @staticmethod
+    def _section_map_last_bit() -> int:
+        last_bit = safe_get_symbol_value('SECTION_MAP_LAST_BIT')
+        if last_bit is None:
+            return SECTION_MAP_LAST_BIT_DEFAULT
+        return int(last_bit)
+
+    def _section_size_bits(self) -> int:
+        if Page.SECTION_SIZE_BITS > 0:
+            return Page.SECTION_SIZE_BITS
+
+        key = 'linux.vmcoreinfo.lines.NUMBER(SECTION_SIZE_BITS)'
+        try:
+            return int(self.target.kdump.attr.get(key, ''))
+        except (AttributeError, ValueError):
+            pass
+
+        try:
+            return SECTION_SIZE_BITS_DEFAULT[self.target.arch.name()]
+        except KeyError:
+            raise NotImplementedError("memory section size is unknown")
+
+    def _read_sections(self, section_type: gdb.Type) -> None:
+        word_size = types.unsigned_long_type.sizeof
+        order = '>' if self.target.byteorder == 'big' else '<'
+        word = struct.Struct(order + ('Q' if word_size == 8 else 'I'))
+        offset = offsetof(section_type, 'section_mem_map')
+        assert offset is not None
+        size = section_type.sizeof
+
+        per_root = Page.SECTIONS_PER_ROOT
+        if per_root <= 0:
+            per_root = Page.PAGE_SIZE // size
+        pages = 1 << self.pfn_section_shift
+        nr_sections = (int(symvals.max_pfn) + pages - 1) // pages
+
+        for root_idx in range((nr_sections + per_root - 1) // per_root):
+            # Roots that were never allocated are NULL pointers
+            try:
+                root = int(symvals.mem_section[root_idx][0].address)
+            except gdb.error:
+                continue
+            if not root:
+                continue
+
+            count = min(per_root, nr_sections - root_idx * per_root)
+            try:
+                data = self.target.read_memory(root, count * size)
+            except kdump.target.READ_ERRORS:
+                continue
+
+            for idx in range(count):
+                (mem_map,) = word.unpack_from(data, idx * size + offset)
+                if mem_map & SECTION_HAS_MEM_MAP and \
+                   mem_map & SECTION_MARKED_PRESENT:
+                    section_nr = root_idx * per_root + idx
+                    self.mem_maps[section_nr] = mem_map & self._map_mask
+
+        for section_nr in sorted(self.mem_maps):
+            start = section_nr << self.pfn_section_shift
+            end = start + pages
+            if self._ranges and self._ranges[-1][1] == start:
+                self._ranges[-1] = (self._ranges[-1][0], end)
+            else:
+                self._ranges.append((start, end))
+
+        self._index_mem_maps()
+
+    def _index_mem_maps(self) -> None:
+        starts = sorted(((mem_map + (nr << self.pfn_section_shift) *
+                          self._page_size) & self._word_mask, nr)
+                        for (nr, mem_map) in self.mem_maps.items())
+        self._map_starts = [start for (start, _) in starts]
+        self._map_sections = [nr for (_, nr) in starts]
+
+    def is_valid(self, pfn: int) -> bool:
+        """
+        Returns whether a pfn is in a present memory section
+
+        Args:
+            pfn: The page frame number
+
+        Returns:
+            bool: Whether the pfn has a ``struct page``
+        """
+        return (pfn >> self.pfn_section_shift) in self.mem_maps
+
+    def page_address(self, pfn: int) -> Optional[int]:
+        """
+        Returns the address of the ``struct page`` of a pfn from the
+        section's mem_map
+
+        Args:
+            pfn: The page frame number
+
+        Returns:
+            int: The address, or None if the pfn is not in a present
+            memory section
+        """
+        try:
+            mem_map = self.mem_maps[pfn >> self.pfn_section_shift]
+        except KeyError:
+            return None
+        # The mem_map is encoded relative to the first pfn of memory
+        return (mem_map + pfn * self._page_size) & self._word_mask
+
+    def pfn_of_page(self, address: int) -> Optional[int]:
+        """
+        Returns the pfn whose ``struct page`` is at an address
+
+        Args:
+            address: The address of the ``struct page``
+
+        Returns:
+            int: The page frame number, or None if the address is not
+            the start of a ``struct page`` of a present memory section
+        """
+        idx = bisect_right(self._map_starts, address) - 1
+        if idx < 0:
+            return None
+
+        (pfn, rem) = divmod(address - self._map_starts[idx], self._page_size)
+        if rem or pfn >> self.pfn_section_shift:
+            return None
+        return (self._map_sections[idx] << self.pfn_section_shift) + pfn
+
+    def pfn_ranges(self, start_pfn: int = 0,
+                   end_pfn: Optional[int] = None) -> List[Tuple[int, int]]:
+        """
+        Returns the ranges of pfns in present memory sections
+
+        Args:
+            start_pfn (optional, default=0): The first pfn of interest
+            end_pfn (optional, default=None): The pfn after the last one
+                of interest, or None for ``max_pfn``
+
+        Returns:
+            list of (int, int): The first pfn and the pfn after the last
+            one of each range, in order
+        """
+        if end_pfn is None:
+            end_pfn = int(symvals.max_pfn)
+
+        ranges = list()
+        for (start, end) in self._ranges:
+            start = max(start, start_pfn)
+            end = min(end, end_pfn)
+            if start < end:
+                ranges.append((start, end))
+        return ranges
+
+_section_index: Optional[Tuple[kdump.target.Target, Optional[SectionIndex]]]
+_section_index = None
+
+def get_section_index() -> Optional[SectionIndex]:
+    """
+    Returns the memory section index for the current target
+
+    The index is built the first time it is needed and kept for as long
+    as the target stays the same.
+
+    Returns:
+        SectionIndex: The index, or None if the kernel doesn't use memory
+        sections or their size is unknown
+    """
+    global _section_index # pylint: disable=global-statement
+
+    target = crash.current_target()
+    if _section_index is None or _section_index[0] is not target:
+        try:
+            _section_index = (target, SectionIndex(target))
+        except NotImplementedError:
+            _section_index = (target, None)
+    return _section_index[1]
+
+class CompoundHeadIndex:
+    """
+    Resolve the head pages of many pages at once
+
+    The ``struct page`` of every pfn that isn't already known to be part
+    of a compound page is read in one bulk read.  The pfn ranges of the
+    compound pages found are kept, so later lookups of any of their tail
+    pages are answered without reading the dump again.  The range of a
+    compound page is taken from its order when the kernel stores
+    ``compound_order`` in the first tail page, and otherwise grows to
+    cover the tail pages seen so far.  When the index is full, the
+    ranges found first are forgotten.
+
+    The object should not be created directly.  Use
+    :func:`get_compound_head_index` to share one index per target.
+
+    Args:
+        target: The target the index is for
+
+    Attributes:
+        target (kdump.target.Target): The target the index is for
+        pages_read (int): The number of ``struct page`` read from the dump
+    """
+    def __init__(self, target: kdump.target.Target) -> None:
+        self.target = target
+        self.pages_read = 0
+
+        # The pfn after the last tail page, by head pfn, oldest first
+        self._ends: Dict[int, int] = dict()
+
+        self._order: Optional[Tuple[int, int]] = None
+        self._order_done = False
+
+    def __len__(self) -> int:
+        return len(self._ends)
+
+    def lookup(self, pfn: int) -> Optional[int]:
+        """
+        Returns the head of a page from the known compound pages
+
+        Args:
+            pfn: The page frame number
+
+        Returns:
+            int: The pfn of the head page, or None if the pfn isn't part
+            of a known compound page
+        """
+        # Compound pages are aligned to their size, so the head is the
+        # pfn rounded down to one of the possible compound sizes
+        ends = self._ends
+        head = -1
+        for order in range(MAX_COMPOUND_ORDER + 1):
+            candidate = pfn & ~((1 << order) - 1)
+            if candidate == head:
+                continue
+            head = candidate
+            end = ends.get(head)
+            if end is not None and pfn < end:
+                return head
+        return None
+
+    def add(self, head: int, end: int) -> None:
+        """
+        Record the pfn range of a compound page
+
+        A range that is already known is extended if needed.
+
+        Args:
+            head: The pfn of the head page
+            end: The pfn after the last tail page
+        """
+        ends = self._ends
+        known = ends.get(head)
+        if known is not None:
+            ends[head] = max(known, end)
+            return
+
+        # Forget the oldest quarter of the ranges when the index is full
+        if len(ends) >= COMPOUND_RANGE_ENTRIES:
+            for old in list(islice(ends, COMPOUND_RANGE_ENTRIES // 4)):
+                del ends[old]
+        ends[head] = end
+
+    def _order_field(self) -> Optional[Tuple[int, int]]:
+        if not self._order_done:
+            self._order_done = True
+            found = offsetof_type(types.page_type, 'compound_order',
+                                  error=False)
+            if found is not None:
+                (offset, gdbtype) = found
+                self._order = (offset, gdbtype.sizeof)
+        return self._order
+
+    def _read_orders(self, heads: List[int]) -> Dict[int, int]:
+        field = self._order_field()
+        if field is None or not heads:
+            return dict()
+
+        (offset, size) = field
+        located = list()
+        for head in heads:
+            try:
+                located.append((head, Page.page_address(head + 1)))
+            except gdb.MemoryError:
+                pass
+
+        orders = dict()
+        data = read_scatter([(addr + offset, size) for (_, addr) in located])
+        for ((head, _), buf) in zip(located, data):
+            if buf:
+                order = int.from_bytes(buf, self.target.byteorder)
+                if 0 < order <= MAX_COMPOUND_ORDER:
+                    orders[head] = order
+        self.pages_read += len(located)
+        return orders
+
+    def resolve(self, pfns: Iterable[int]) -> List[Optional[int]]:
+        """
+        Returns the head page of each of many pages
+
+        Args:
+            pfns: The page frame numbers
+
+        Returns:
+            list of int: The pfn of the head page of each pfn, in the
+            order given.  Pages that aren't tail pages are their own head.
+            The entry of a pfn whose ``struct page`` can't be read is
+            None.
+        """
+        # pylint: disable=too-many-locals
+        pfns = list(pfns)
+        heads: Dict[int, Optional[int]] = dict()
+        unknown = list()
+        for pfn in sorted(set(pfns)):
+            head = self.lookup(pfn)
+            if head is not None:
+                heads[pfn] = head
+            else:
+                unknown.append(pfn)
+
+        if unknown:
+            size = types.page_type.sizeof
+            (word, offsets) = Page.raw_layout()
+            (flags_offset, head_offset) = (offsets[0], offsets[2])
+            pg_head = 0
+            if 'PG_head' in Page.pageflags:
+                pg_head = 1 << Page.pageflags['PG_head']
+
+            located = list()
+            for pfn in unknown:
+                heads[pfn] = None
+                try:
+                    located.append((pfn, Page.page_address(pfn)))
+                except gdb.MemoryError:
+                    pass
+            data = read_scatter([(addr, size) for (_, addr) in located])
+            self.pages_read += len(located)
+
+            # The last tail page seen of each compound page
+            spans: Dict[int, int] = dict()
+            for ((pfn, addr), buf) in zip(located, data):
+                if buf is None:
+                    continue
+
+                (flags,) = word.unpack_from(buf, flags_offset)
+                (head_word,) = word.unpack_from(buf, head_offset)
+                head_addr = Page.tail_head_address(flags, head_word)
+                if head_addr is None:
+                    heads[pfn] = pfn
+                    if flags & pg_head:
+                        spans.setdefault(pfn, pfn)
+                    continue
+
+                # Compound pages never cross a memory section, so the
+                # head is found relative to the tail
+                head = pfn - (addr - head_addr) // size
+                heads[pfn] = head
+                # Don't let a corrupted page poison the index
+                if 0 < pfn - head < 1 << MAX_COMPOUND_ORDER:
+                    spans[head] = max(spans.get(head, head), pfn)
+
+            orders = self._read_orders([head for head in sorted(spans)
+                                        if self.lookup(head) is None])
+            for (head, last) in spans.items():
+                end = last + 1
+                if head in orders:
+                    end = max(end, head + (1 << orders[head]))
+                if end > head + 1:
+                    self.add(head, end)
+
+        return [heads[pfn] for pfn in pfns]
+
+_compound_heads: Optional[CompoundHeadIndex] = None
+
+def get_compound_head_index() -> CompoundHeadIndex:
+    """
+    Returns the compound page index for the current target
+
+    The same index, with the compound pages found so far, is returned
+    for as long as the target stays the same.
+
+    Returns:
+        CompoundHeadIndex: The compound page index
+    """
+    global _compound_heads # pylint: disable=global-statement
+
+    target = crash.current_target()
+    if _compound_heads is None or _compound_heads.target is not target:
+        _compound_heads = CompoundHeadIndex(target)
+    return _compound_heads
+
+def compound_heads(pfns: Iterable[int]) -> List[Optional[int]]:
+    """
+    Returns the head page of each of many pages
+
+    The ``struct page`` of the pages are read in bulk, and tail pages of
+    compound pages found by earlier calls are resolved without reading
+    the dump.
+
+    Args:
+        pfns: The page frame numbers
+
+    Returns:
+        list of int: The pfn of the head page of each pfn, in the order
+        given, or None if the ``struct page`` of the pfn can't be read.
+        Pages that aren't tail pages are their own head.
+    """
+    return get_compound_head_index().resolve(pfns)
 
 def for_each_page() -> Iterable[gdb.Value]:
+    index = get_section_index()
+    if index is not None:
+        # Holes between the present sections are skipped
+        for (start, end) in index.pfn_ranges():
+            for pfn in range(start, end):
+                try:
+                    yield Page.pfn_to_page(pfn)
+                except gdb.error:
+                    pass
+        return
+
     # TODO works only on x86?
     max_pfn = int(symvals.max_pfn)
     for pfn in range(max_pfn):
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+"""
+The crash.types.pagestats module computes page flag statistics over all
+of memory.
+
+The ``flags`` words of a chunk of pages are loaded into a NumPy array and
+the flag, node and zone histograms are computed for the whole chunk at
+once.  NumPy is optional; :data:`HAVE_NUMPY` reports whether it is
+available, and :class:`PageFlagStats` raises :obj:`NotImplementedError`
+without it.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from crash.types.page import Page, PAGE_MAPPING_ANON
+from crash.types.memmap import MemMapReader, PageChunk
+
+try:
+    import numpy
+    HAVE_NUMPY = True
+except ImportError:
+    HAVE_NUMPY = False
+
+# The pages read and counted at once; a memory section on x86-64
+DEFAULT_STATS_CHUNK_PAGES = 1 << 15
+
+# The page categories counted per node and zone
+CATEGORIES = ('slab', 'lru', 'anon', 'compound', 'reserved')
+
+NodeZone = Tuple[int, int]
+
+class PageFlagStats:
+    """
+    Page counts by flag, and by category for each node and zone
+
+    The layout of the ``flags`` word defaults to what :class:`.Page`
+    discovered from the kernel.
+
+    Args:
+        pageflags (optional, default=None): The bit number of each page
+            flag by name
+        nodes_width (optional, default=None): The number of bits of the
+            node id in the ``flags`` word
+        zones_width (optional, default=None): The number of bits of the
+            zone id in the ``flags`` word
+        bits_per_long (optional, default=None): The size of the
+            ``flags`` word in bits
+
+    Attributes:
+        total (int): The number of pages counted
+        flags (dict): The number of pages with each flag set, by flag name
+        zones (dict): The number of pages in each category of
+            :data:`CATEGORIES` and in total (as ``total``), by
+            (node id, zone id)
+
+    Raises:
+        NotImplementedError: NumPy is not available
+    """
+    def __init__(self, pageflags: Optional[Dict[str, int]] = None,
+                 nodes_width: Optional[int] = None,
+                 zones_width: Optional[int] = None,
+                 bits_per_long: Optional[int] = None) -> None:
+        if not HAVE_NUMPY:
+            raise NotImplementedError("page flag statistics require NumPy")
+
+        if pageflags is None:
+            pageflags = Page.pageflags
+        if nodes_width is None:
+            nodes_width = Page.NODES_WIDTH
+        if zones_width is None:
+            zones_width = Page.ZONES_WIDTH
+        if bits_per_long is None:
+            bits_per_long = Page.BITS_PER_LONG
+
+        self.total = 0
+        self.flags: Dict[str, int] = dict()
+        self.zones: Dict[NodeZone, Dict[str, int]] = dict()
+
+        # Aliases share a bit; the first name in the enum is reported
+        nr_flags = pageflags.get('__NR_PAGEFLAGS', bits_per_long)
+        self._flag_names: Dict[int, str] = dict()
+        for (name, bit) in pageflags.items():
+            if not name.startswith('__') and 0 <= bit < nr_flags:
+                self._flag_names.setdefault(bit, name)
+
+        def mask(*names: str) -> int:
+            for name in names:
+                if name in pageflags:
+                    return 1 << pageflags[name]
+            return 0
+
+        self._masks = {
+            'slab': mask('PG_slab'),
+            'lru': mask('PG_lru'),
+            'reserved': mask('PG_reserved'),
+            'compound': mask('PG_head', 'PG_compound') | mask('PG_tail'),
+        }
+        # Without PG_tail, tail pages have bit 0 of compound_head set
+        self._tail_bit = 'PG_tail' not in pageflags and \
+                         'PG_compound' not in pageflags
+
+        self._zones_width = zones_width
+        self._zone_shift = bits_per_long - nodes_width - zones_width
+        self._nodezone_mask = (1 << (nodes_width + zones_width)) - 1
+
+    def add(self, flags: Any, mapping: Any, compound_head: Any) -> None:
+        """
+        Count a set of pages
+
+        Args:
+            flags: The ``flags`` word of each page, as a sequence or
+                buffer of unsigned 64-bit integers
+            mapping: The ``mapping`` pointer of each page
+            compound_head: The ``compound_head`` word of each page
+        """
+        # pylint: disable=too-many-locals
+        flags = numpy.asarray(flags, dtype=numpy.uint64)
+        if not flags.size:
+            return
+        mapping = numpy.asarray(mapping, dtype=numpy.uint64)
+        compound_head = numpy.asarray(compound_head, dtype=numpy.uint64)
+        self.total += int(flags.size)
+
+        # One bit per column, bit 0 first
+        bits = numpy.unpackbits(flags.astype('<u8').view(numpy.uint8)
+                                .reshape(-1, 8), axis=1, bitorder='little')
+        counts = bits.sum(axis=0, dtype=numpy.int64)
+        for (bit, name) in self._flag_names.items():
+            if counts[bit]:
+                self.flags[name] = self.flags.get(name, 0) + int(counts[bit])
+
+        nodezone = ((flags >> numpy.uint64(self._zone_shift)) &
+                    numpy.uint64(self._nodezone_mask)).astype(numpy.int64)
+        width = int(nodezone.max()) + 1
+
+        selected = {
+            'total': numpy.ones(flags.size, dtype=bool),
+            'anon': (mapping & numpy.uint64(PAGE_MAPPING_ANON)) != 0,
+        }
+        for (category, mask) in self._masks.items():
+            selected[category] = (flags & numpy.uint64(mask)) != 0
+        if self._tail_bit:
+            selected['compound'] |= (compound_head & numpy.uint64(1)) != 0
+
+        histograms = {category: numpy.bincount(nodezone, weights=pages,
+                                               minlength=width)
+                      for (category, pages) in selected.items()}
+        for key in numpy.nonzero(histograms['total'])[0]:
+            nid = int(key) >> self._zones_width
+            zid = int(key) & ((1 << self._zones_width) - 1)
+            zone = self.zones.setdefault((nid, zid), dict())
+            for (category, histogram) in histograms.items():
+                zone[category] = zone.get(category, 0) + int(histogram[key])
+
+    def add_chunk(self, chunk: PageChunk) -> None:
+        """
+        Count the pages of a chunk read by :class:`.MemMapReader`
+
+        Args:
+            chunk: The decoded pages
+        """
+        self.add(chunk.flags, chunk.mapping, chunk.compound_head)
+
+    def flag_counts(self) -> List[Tuple[str, int]]:
+        """
+        Returns the number of pages with each flag set, in bit order
+
+        Returns:
+            list of (str, int): The flag name and the number of pages
+        """
+        return [(name, self.flags.get(name, 0))
+                for (_, name) in sorted(self._flag_names.items())]
+
+def page_flag_stats(start_pfn: int = 0, end_pfn: Optional[int] = None,
+                    chunk_pages: int = DEFAULT_STATS_CHUNK_PAGES
+                    ) -> PageFlagStats:
+    """
+    Compute page flag statistics for a range of pfns
+
+    Args:
+        start_pfn (optional, default=0): The first pfn to count
+        end_pfn (optional, default=None): The pfn after the last one to
+            count, or None for ``max_pfn``
+        chunk_pages (optional, default=DEFAULT_STATS_CHUNK_PAGES): The
+            number of pages to count at once
+
+    Returns:
+        PageFlagStats: The statistics
+
+    Raises:
+        NotImplementedError: NumPy is not available
+    """
+    stats = PageFlagStats()
+    for chunk in MemMapReader(chunk_pages).chunks(start_pfn, end_pfn):
+        stats.add_chunk(chunk)
+    return stats
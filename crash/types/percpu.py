@@ -4,6 +4,7 @@
 from typing import Dict, Union, List, Tuple
 
 from crash.util import array_size, struct_has_member
+from crash.util import read_scatter, unpack_words
 from crash.util.symbols import Types, Symvals, MinimalSymvals
 from crash.util.symbols import MinimalSymbolCallbacks, SymbolCallbacks
 from crash.types.list import list_for_each_entry
@@ -43,6 +44,7 @@ class PerCPUState:
     _dynamic_offset_cache: List[Tuple[int, int]] = list()
     _static_ranges: Dict[int, int] = dict()
     _module_ranges: Dict[int, int] = dict()
+    _cpu_offsets: List[int] = list()
     _last_cpu = -1
     _nr_cpus = 0
 
@@ -69,6 +71,7 @@ class PerCPUState:
     # pylint: disable=unused-argument
     def setup_nr_cpus(cls, unused: gdb.Symbol) -> None:
         cls._nr_cpus = array_size(symvals['__per_cpu_offset'])
+        cls._cpu_offsets = list()
 
         if cls._last_cpu == -1:
             cls._last_cpu = cls._nr_cpus
@@ -84,6 +87,27 @@ class PerCPUState:
             size = int(module['percpu_size'])
             cls._module_ranges[start] = size
 
+    @classmethod
+    def _load_cpu_offsets(cls) -> None:
+        offsets = symvals['__per_cpu_offset']
+        size = offsets[0].type.sizeof
+        nr_cpus = array_size(offsets)
+
+        buf = read_scatter([(int(offsets.address), nr_cpus * size)])[0]
+        if buf is not None:
+            cls._cpu_offsets = list(unpack_words(buf, size))
+        else:
+            cls._cpu_offsets = [int(offsets[cpu]) for cpu in range(nr_cpus)]
+
+    @classmethod
+    def _per_cpu_offset(cls, cpu: int) -> int:
+        if not cls._cpu_offsets:
+            cls._load_cpu_offsets()
+        try:
+            return cls._cpu_offsets[cpu]
+        except IndexError:
+            return int(symvals['__per_cpu_offset'][cpu])
+
     def _add_to_offset_cache(self, base: int, start: int, end: int) -> None:
         self._dynamic_offset_cache.append((base + start, base + end))
 
@@ -195,7 +219,7 @@ class PerCPUState:
         for start in self._static_ranges:
             size = self._static_ranges[start]
             for cpu in range(0, self._last_cpu):
-                offset = int(symvals['__per_cpu_offset'][cpu]) + start
+                offset = self._per_cpu_offset(cpu) + start
                 if offset <= addr < offset + size:
                     return True
         return False
@@ -308,7 +332,7 @@ class PerCPUState:
         if cpu < 0:
             raise ValueError("cpu must be >= 0")
 
-        addr = symvals['__per_cpu_offset'][cpu]
+        addr = self._per_cpu_offset(cpu)
         if addr > 0:
             addr += self._relocated_offset(var)
 
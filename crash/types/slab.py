@@ -2,16 +2,17 @@
 # vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
 
 from typing import TypeVar, Union, Tuple, Iterable, Dict, Optional, Set
-from typing import ValuesView
+from typing import Any, Generator, Iterator, List, ValuesView
 
-import sys
-import traceback
+from array import array
+from bisect import bisect_left
 
-from crash.util import container_of, find_member_variant
+from crash.util import container_of, find_member_variant, read_array
 from crash.util.symbols import Types, TypeCallbacks, SymbolCallbacks
 from crash.types.percpu import get_percpu_var
 from crash.types.list import list_for_each, list_for_each_entry, ListError
 from crash.types.page import page_from_gdb_obj, page_from_addr, Page
+from crash.types.page import compound_heads, pfn_to_page, page_flags
 from crash.types.node import for_each_nid
 from crash.types.cpu import for_each_online_cpu
 from crash.types.node import numa_node_id
@@ -33,12 +34,125 @@ slab_list_fullname = {0: "slabs_partial", 1: "slabs_full", 2: "slabs_free"}
 
 BUFCTL_END = ~0 & 0xffffffff
 
+def set_bits(bitmap: int) -> Iterator[int]:
+    """
+    Iterate over the set bits of a bitmap
+
+    Args:
+        bitmap: The bitmap
+
+    Yields:
+        int: The number of each set bit, lowest first
+    """
+    while bitmap:
+        low = bitmap & -bitmap
+        yield low.bit_length() - 1
+        bitmap ^= low
+
 def col_error(msg: str) -> str:
     return "\033[1;31;40m {}\033[0;37;40m ".format(msg)
 
 def col_bold(msg: str) -> str:
     return "\033[1;37;40m {}\033[0;37;40m ".format(msg)
 
+# The kinds of findings of a kmem cache check
+FINDING_SLAB = 'slab'                # a slab is inconsistent
+FINDING_MISPLACED = 'misplaced'      # a slab is on the wrong list
+FINDING_LIST = 'list'                # a slab list can't be walked
+FINDING_NODE = 'node'                # the lists of a node are inconsistent
+FINDING_ARRAY_CACHE = 'array_cache'  # an array cache is inconsistent
+FINDING_OK = 'ok'                    # a run of slabs is consistent
+FINDING_INFO = 'info'                # progress of the check
+
+class SlabFinding:
+    """
+    A result of checking a kmem cache
+
+    Args:
+        kind: What the finding is about, one of the ``FINDING_*`` kinds
+        cache: The name of the kmem cache
+        details: A description of the finding
+        slab (optional, default=None): The address of the slab
+        error (optional, default=True): Whether the finding reports an
+            inconsistency
+
+    Attributes:
+        kind (str): What the finding is about
+        cache (str): The name of the kmem cache
+        details (str): A description of the finding
+        slab (int): The address of the slab, or None if the finding is
+            not about one slab
+        error (bool): Whether the finding reports an inconsistency
+    """
+    __slots__ = ('kind', 'cache', 'details', 'slab', 'error')
+
+    def __init__(self, kind: str, cache: str, details: str,
+                 slab: Optional[int] = None, error: bool = True) -> None:
+        self.kind = kind
+        self.cache = cache
+        self.details = details
+        self.slab = slab
+        self.error = error
+
+    def __repr__(self) -> str:
+        return "SlabFinding({!r}, {!r}, {!r}, slab={}, error={})".format(
+            self.kind, self.cache, self.details,
+            None if self.slab is None else hex(self.slab), self.error)
+
+    def render(self) -> str:
+        """
+        Returns the finding as a line of text for a terminal
+
+        Returns:
+            str: The description, highlighted if it is an error
+        """
+        if self.slab is not None:
+            msg = "cache {} slab {:x}: {}".format(self.cache, self.slab,
+                                                  self.details)
+        else:
+            msg = self.details
+        return col_error(msg) if self.error else msg
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns the finding as a dictionary that can be serialized
+
+        Returns:
+            dict: The kind, cache, slab, details, and error flag
+        """
+        return {'kind': self.kind, 'cache': self.cache, 'slab': self.slab,
+                'details': self.details, 'error': self.error}
+
+    @classmethod
+    def from_dict(cls, finding: Dict[str, Any]) -> 'SlabFinding':
+        """
+        Create a finding from the result of :meth:`to_dict`
+
+        Args:
+            finding: The serialized finding
+
+        Returns:
+            SlabFinding: The finding
+        """
+        return cls(finding['kind'], finding['cache'], finding['details'],
+                   finding['slab'], finding['error'])
+
+# A check that reports findings and returns a count
+SlabCheck = Generator[SlabFinding, None, int]
+
+def print_findings(findings: Iterable[SlabFinding]) -> None:
+    """
+    Print findings as lines of text for a terminal
+
+    This is how inconsistencies found outside of a check, such as while
+    looking up an object, are reported.
+
+    Args:
+        findings: The findings to print
+    """
+    for finding in findings:
+        print(finding.render())
+
 types = Types(['kmem_cache', 'struct kmem_cache'])
 
 SlabType = TypeVar('SlabType', bound='Slab')
@@ -98,9 +212,12 @@ class Slab:
         self.error = error
         self.gdb_obj = gdb_obj
         self.kmem_cache = kmem_cache
-        self.free: Set[int] = set()
+        self.free_map = 0
+        self.num_free = 0
+        self.free_populated = False
+        self.findings: List[SlabFinding] = list()
         self.misplaced_list: Optional[str]
-        self.misplaced_error: Optional[str]
+        self.misplaced_error: Optional[SlabFinding]
 
         self.misplaced_list = None
         self.misplaced_error = None
@@ -117,52 +234,53 @@ class Slab:
 
     def __add_free_obj_by_idx(self, idx: int) -> bool:
         objs_per_slab = self.kmem_cache.objs_per_slab
-        bufsize = self.kmem_cache.buffer_size
 
         if idx >= objs_per_slab:
-            self.__error(": free object index %d overflows %d" %
+            self.__error("free object index %d overflows %d" %
                          (idx, objs_per_slab))
             return False
 
-        obj_addr = self.s_mem + idx * bufsize
-        if obj_addr in self.free:
-            self.__error(": object %x duplicated on freelist" % obj_addr)
+        bit = 1 << idx
+        if self.free_map & bit:
+            obj_addr = self.s_mem + idx * self.kmem_cache.buffer_size
+            self.__error("object %x duplicated on freelist" % obj_addr)
             return False
 
-        self.free.add(obj_addr)
+        self.free_map |= bit
+        self.num_free += 1
         return True
 
     def __populate_free(self) -> None:
-        if self.free:
+        if self.free_populated:
             return
 
         objs_per_slab = self.kmem_cache.objs_per_slab
+        size = self.bufctl_type.sizeof
 
+        # The whole array is read at once rather than an entry at a time
         if self.page_slab:
-            page = self.gdb_obj
-            freelist = page["freelist"].cast(self.bufctl_type.pointer())
-            for i in range(self.inuse, objs_per_slab):
-                obj_idx = int(freelist[i])
+            freelist = int(self.gdb_obj["freelist"])
+            for obj_idx in read_array(freelist + self.inuse * size,
+                                      objs_per_slab - self.inuse, size):
                 self.__add_free_obj_by_idx(obj_idx)
             # XXX not generally useful and reliable
             if False and objs_per_slab > 1:
-                all_zeroes = True
-                for i in range(objs_per_slab):
-                    obj_idx = int(freelist[i])
-                    if obj_idx != 0:
-                        all_zeroes = False
-                if all_zeroes:
-                    self.__error(": freelist full of zeroes")
+                if not any(read_array(freelist, objs_per_slab, size)):
+                    self.__error("freelist full of zeroes")
 
         else:
-            bufctl = self.gdb_obj.address[1].cast(self.bufctl_type).address
+            # The bufctl array follows struct slab
+            addr = int(self.gdb_obj.address) + self.real_slab_type.sizeof
+            bufctl = read_array(addr, objs_per_slab, size)
             f = int(self.gdb_obj["free"])
             while f != BUFCTL_END:
                 if not self.__add_free_obj_by_idx(f):
-                    self.__error(": bufctl cycle detected")
+                    self.__error("bufctl cycle detected")
                     break
 
-                f = int(bufctl[f])
+                f = bufctl[f]
+
+        self.free_populated = True
 
     def find_obj(self, addr: int) -> Union[int, None]:
         bufsize = self.kmem_cache.buffer_size
@@ -185,31 +303,86 @@ class Slab:
             return (False, 0, None)
 
         self.__populate_free()
-        if obj_addr in self.free:
+        idx = (obj_addr - self.s_mem) // self.kmem_cache.buffer_size
+        if self.free_map & (1 << idx):
             return (False, int(obj_addr), None)
 
-        ac = self.kmem_cache.get_array_caches()
+        ac = self.kmem_cache.array_cache_entry(obj_addr)
 
-        if obj_addr in ac:
-            return (False, int(obj_addr), ac[obj_addr])
+        if ac is not None:
+            return (False, int(obj_addr), ac)
 
         return (True, int(obj_addr), None)
 
     def __error(self, msg: str, misplaced: bool = False) -> None:
-        msg = col_error("cache %s slab %x%s" % (self.kmem_cache.name,
-                                                int(self.gdb_obj.address), msg))
+        kind = FINDING_MISPLACED if misplaced else FINDING_SLAB
+        finding = SlabFinding(kind, self.kmem_cache.name, msg,
+                              int(self.gdb_obj.address))
         self.error = True
         if misplaced:
-            self.misplaced_error = msg
+            self.misplaced_error = finding
         else:
-            print(msg)
+            self.findings.append(finding)
+
+    def pop_findings(self) -> List[SlabFinding]:
+        """
+        Returns the inconsistencies found in the slab so far and forgets
+        them
+
+        The slab being on the wrong list is kept in
+        :attr:`misplaced_error` instead.
+
+        Returns:
+            list of SlabFinding: The findings, in the order found
+        """
+        findings = self.findings
+        self.findings = list()
+        return findings
 
     def __free_error(self, list_name: str) -> None:
         self.misplaced_list = list_name
-        self.__error(": is on list %s, but has %d of %d objects allocated" %
+        self.__error("is on list %s, but has %d of %d objects allocated" %
                      (list_name, self.inuse, self.kmem_cache.objs_per_slab),
                      misplaced=True)
 
+    @property
+    def free(self) -> Set[int]:
+        """The addresses of the free objects"""
+        self.__populate_free()
+        bufsize = self.kmem_cache.buffer_size
+        return {self.s_mem + idx * bufsize for idx in set_bits(self.free_map)}
+
+    def array_cache_map(self) -> int:
+        """
+        Returns the objects of the slab that are in array caches
+
+        Returns:
+            int: A bitmap with the bit of each object's index set
+        """
+        bufsize = self.kmem_cache.buffer_size
+        end = self.s_mem + self.kmem_cache.objs_per_slab * bufsize
+        bitmap = 0
+        for addr in self.kmem_cache.array_cache_objects(self.s_mem, end):
+            (idx, offset) = divmod(addr - self.s_mem, bufsize)
+            # Pointers into the middle of objects are not cached objects
+            if not offset:
+                bitmap |= 1 << idx
+        return bitmap
+
+    def allocated_map(self) -> int:
+        """
+        Returns the allocated objects of the slab
+
+        Objects that are neither on the freelist nor in an array cache
+        are allocated.
+
+        Returns:
+            int: A bitmap with the bit of each object's index set
+        """
+        self.__populate_free()
+        everything = (1 << self.kmem_cache.objs_per_slab) - 1
+        return everything & ~(self.free_map | self.array_cache_map())
+
     def get_objects(self) -> Iterable[int]:
         bufsize = self.kmem_cache.buffer_size
         obj = self.s_mem
@@ -219,43 +392,68 @@ class Slab:
             obj += bufsize
 
     def get_allocated_objects(self) -> Iterable[int]:
-        for obj in self.get_objects():
-            c = self.contains_obj(obj)
-            if c[0]:
-                yield obj
+        bufsize = self.kmem_cache.buffer_size
+        for idx in set_bits(self.allocated_map()):
+            yield self.s_mem + idx * bufsize
+
+    def check(self, slabtype: int, nid: int) -> SlabCheck:
+        """
+        Check the consistency of the slab
+
+        Being on the wrong list is not reported but kept in
+        :attr:`misplaced_error`, so that runs of misplaced slabs can be
+        summarized.
+
+        Args:
+            slabtype: The list the slab was found on, ``slab_partial``,
+                ``slab_full`` or ``slab_free``
+            nid: The node of the list
+
+        Yields:
+            SlabFinding: The inconsistencies found
+
+        Returns:
+            int: The number of free objects in the slab
+        """
+        num_free = self.__check(slabtype, nid)
+        yield from self.pop_findings()
+        return num_free
 
-    def check(self, slabtype: int, nid: int) -> int:
+    def __check(self, slabtype: int, nid: int) -> int:
         self.__populate_free()
-        num_free = len(self.free)
+        num_free = self.num_free
         max_free = self.kmem_cache.objs_per_slab
 
         if self.kmem_cache.off_slab and not Slab.page_slab:
             struct_slab_slab = slab_from_obj_addr(int(self.gdb_obj.address))
             if not struct_slab_slab:
-                self.__error(": OFF_SLAB struct slab is not a slab object itself")
+                self.__error("OFF_SLAB struct slab is not a slab object itself")
             else:
                 struct_slab_cache = struct_slab_slab.kmem_cache.name
                 if not self.kmem_cache.off_slab_cache:
                     if struct_slab_cache not in ("size-64", "size-128"):
-                        self.__error(": OFF_SLAB struct slab is in a wrong cache %s" %
+                        self.__error("OFF_SLAB struct slab is in a wrong cache %s" %
                                      struct_slab_cache)
                     else:
                         self.kmem_cache.off_slab_cache = struct_slab_cache
                 elif struct_slab_cache != self.kmem_cache.off_slab_cache:
-                    self.__error(": OFF_SLAB struct slab is in a wrong cache %s" %
+                    self.__error("OFF_SLAB struct slab is in a wrong cache %s" %
                                  struct_slab_cache)
 
+                self.findings += self.kmem_cache.other_array_cache_findings(
+                    struct_slab_slab.kmem_cache)
                 addr = int(self.gdb_obj.address)
                 struct_slab_obj = struct_slab_slab.contains_obj(addr)
+                self.findings += struct_slab_slab.pop_findings()
                 if not struct_slab_obj[0]:
-                    self.__error(": OFF_SLAB struct slab is not allocated")
-                    print(struct_slab_obj)
+                    self.__error("OFF_SLAB struct slab is not allocated: {}"
+                                 .format(struct_slab_obj))
                 elif struct_slab_obj[1] != int(self.gdb_obj.address):
-                    self.__error(": OFF_SLAB struct slab at wrong offset{}"
+                    self.__error("OFF_SLAB struct slab at wrong offset{}"
                                  .format(int(self.gdb_obj.address) - struct_slab_obj[1]))
 
         if self.inuse + num_free != max_free:
-            self.__error(": inuse=%d free=%d adds up to %d (should be %d)" %
+            self.__error("inuse=%d free=%d adds up to %d (should be %d)" %
                          (self.inuse, num_free,
                           self.inuse + num_free, max_free))
 
@@ -272,35 +470,43 @@ class Slab:
         if self.page_slab:
             slab_nid = self.page.get_nid()
             if nid != slab_nid:
-                self.__error(": slab is on nid %d instead of %d" %
-                             (slab_nid, nid))
-                print("free objects %d" % num_free)
+                self.__error("slab is on nid %d instead of %d, free objects %d" %
+                             (slab_nid, nid, num_free))
 
-        ac = self.kmem_cache.get_array_caches()
+        bufsize = self.kmem_cache.buffer_size
+        for idx in set_bits(self.free_map & self.array_cache_map()):
+            obj = self.s_mem + idx * bufsize
+            self.__error("obj %x is marked as free but in array cache: %s" %
+                         (obj, self.kmem_cache.array_cache_entry(obj)))
+
+        objs = list(self.get_objects())
+        heads = compound_heads([(obj - Page.directmap_base) // Page.PAGE_SIZE
+                                for obj in objs])
         last_page_addr = 0
-        for obj in self.get_objects():
-            if obj in self.free and obj in ac:
-                self.__error(": obj %x is marked as free but in array cache:" % obj)
-                print(ac[obj])
-            try:
-                page = page_from_addr(obj).compound_head()
-            except gdb.NotAvailableError:
-                self.__error(": failed to get page for object %x" % obj)
+        for (obj, head) in zip(objs, heads):
+            page = None
+            if head is not None:
+                try:
+                    page = pfn_to_page(head)
+                except (gdb.NotAvailableError, gdb.MemoryError):
+                    pass
+            if page is None:
+                self.__error("failed to get page for object %x" % obj)
                 continue
 
-            if int(page.gdb_obj.address) == last_page_addr:
+            if page.address == last_page_addr:
                 continue
 
-            last_page_addr = int(page.gdb_obj.address)
+            last_page_addr = page.address
 
             if page.get_nid() != nid:
-                self.__error(": obj %x is on nid %d instead of %d" %
+                self.__error("obj %x is on nid %d instead of %d" %
                              (obj, page.get_nid(), nid))
             if not page.is_slab():
-                self.__error(": obj %x is not on PageSlab page" % obj)
+                self.__error("obj %x is not on PageSlab page" % obj)
             kmem_cache_addr = int(page.get_slab_cache())
             if kmem_cache_addr != int(self.kmem_cache.gdb_obj.address):
-                self.__error(": obj %x is on page where pointer to kmem_cache points to %x instead of %x" %
+                self.__error("obj %x is on page where pointer to kmem_cache points to %x instead of %x" %
                              (obj, kmem_cache_addr,
                               int(self.kmem_cache.gdb_obj.address)))
 
@@ -309,7 +515,7 @@ class Slab:
 
             slab_addr = int(page.get_slab_page())
             if slab_addr != self.gdb_obj.address:
-                self.__error(": obj %x is on page where pointer to slab wrongly points to %x" %
+                self.__error("obj %x is on page where pointer to slab wrongly points to %x" %
                              (obj, slab_addr))
         return num_free
 
@@ -348,7 +554,17 @@ class KmemCache:
         else:
             self.off_slab = False
 
-        self.array_caches: Dict[int, Dict] = dict()
+        self.array_cache_findings: List[SlabFinding] = list()
+        # The objects in array caches, sorted by address, with the index
+        # of the array cache each one is in
+        self.array_cache_addrs = array('Q')
+        self.array_cache_owners = array('L')
+        self.array_cache_infos: List[ArrayCacheEntry] = list()
+        self.array_caches_filled = False
+        self.__ac_pending: List[Tuple[Tuple[int, ...], ArrayCacheEntry,
+                                      int]] = list()
+        # Other caches whose array cache findings this check has reported
+        self.__reported_caches: Set[str] = set()
 
     def __get_nodelist(self, node: int) -> gdb.Value:
         return self.gdb_obj[KmemCache.nodelists_name][node]
@@ -376,28 +592,58 @@ class KmemCache:
         if avail == 0:
             return
 
-        cache_dict = {"ac_type" : ac_type,
-                      "nid_src" : nid_src,
-                      "nid_tgt" : nid_tgt}
+        cache_dict: ArrayCacheEntry = {"ac_type" : ac_type,
+                                       "nid_src" : nid_src,
+                                       "nid_tgt" : nid_tgt}
 
-#        print(cache_dict)
         if ac_type == AC_PERCPU:
             nid_tgt = numa_node_id(nid_tgt)
 
-        for i in range(avail):
-            ptr = int(acache["entry"][i])
-#            print(hex(ptr))
-            if ptr in self.array_caches:
-                print(col_error("WARNING: array cache duplicity detected!"))
-            else:
-                self.array_caches[ptr] = cache_dict
+        # The entries are read at once and checked with those of all the
+        # other array caches of the cache
+        entry = acache["entry"]
+        entries = read_array(int(entry.address), avail,
+                             entry.type.target().sizeof)
+        self.__ac_pending.append((entries, cache_dict, nid_tgt))
+
+    def __index_array_caches(self) -> None:
+        pending = self.__ac_pending
+        self.__ac_pending = list()
+
+        ptrs = [ptr for (entries, _, _) in pending for ptr in entries]
+        flags = page_flags([(ptr - Page.directmap_base) // Page.PAGE_SIZE
+                            for ptr in ptrs])
+
+        owners: Dict[int, int] = dict()
+        pos = 0
+        for (entries, cache_dict, nid_tgt) in pending:
+            owner = len(self.array_cache_infos)
+            self.array_cache_infos.append(cache_dict)
+            for ptr in entries:
+                page_flags_word = flags[pos]
+                pos += 1
+                if ptr in owners:
+                    self.__array_cache_error("WARNING: array cache duplicity detected for {:#x}!"
+                                             .format(ptr))
+                else:
+                    owners[ptr] = owner
+
+                if page_flags_word is None:
+                    self.__array_cache_error("Object {:#x} in cache {} has no readable page"
+                                             .format(ptr, cache_dict))
+                    continue
+                obj_nid = Page.nid_from_flags(page_flags_word)
+                if obj_nid != nid_tgt:
+                    self.__array_cache_error("Object {:#x} in cache {} is on wrong nid {} instead of {}"
+                                             .format(ptr, cache_dict, obj_nid, nid_tgt))
 
-            page = page_from_addr(ptr)
-            obj_nid = page.get_nid()
+        ordered = sorted(owners.items())
+        self.array_cache_addrs = array('Q', [ptr for (ptr, _) in ordered])
+        self.array_cache_owners = array('L', [owner for (_, owner) in ordered])
 
-            if obj_nid != nid_tgt:
-                print(col_error("Object {:#x} in cache {} is on wrong nid {} instead of {}"
-                                .format(ptr, cache_dict, obj_nid, nid_tgt)))
+    def __array_cache_error(self, msg: str) -> None:
+        self.array_cache_findings.append(SlabFinding(FINDING_ARRAY_CACHE,
+                                                     self.name, msg))
 
     def __fill_alien_caches(self, node: gdb.Value, nid_src: int) -> None:
         alien_cache = node["alien"]
@@ -407,35 +653,37 @@ class KmemCache:
             return
 
         for nid in for_each_nid():
-            array = alien_cache[nid].dereference()
+            acache = alien_cache[nid].dereference()
 
             # TODO: limit should prevent this?
-            if array.address == 0:
+            if acache.address == 0:
                 continue
 
             if self.alien_cache_type_exists:
-                array = array["ac"]
+                acache = acache["ac"]
 
             # A node cannot have alien cache on the same node, but some
             # kernels (xen) seem to have a non-null pointer there anyway
             if nid_src == nid:
                 continue
 
-            self.__fill_array_cache(array, AC_ALIEN, nid_src, nid)
+            self.__fill_array_cache(acache, AC_ALIEN, nid_src, nid)
 
     def __fill_percpu_caches(self) -> None:
         cpu_cache = self.gdb_obj[KmemCache.percpu_name]
 
         for cpu in for_each_online_cpu():
             if KmemCache.percpu_cache:
-                array = get_percpu_var(cpu_cache, cpu)
+                acache = get_percpu_var(cpu_cache, cpu)
             else:
-                array = cpu_cache[cpu].dereference()
+                acache = cpu_cache[cpu].dereference()
 
-            self.__fill_array_cache(array, AC_PERCPU, -1, cpu)
+            self.__fill_array_cache(acache, AC_PERCPU, -1, cpu)
 
     def __fill_all_array_caches(self) -> None:
-        self.array_caches = dict()
+        self.array_cache_findings = list()
+        self.array_cache_infos = list()
+        self.__ac_pending = list()
 
         self.__fill_percpu_caches()
 
@@ -447,17 +695,94 @@ class KmemCache:
 
             self.__fill_alien_caches(node, nid)
 
-    def get_array_caches(self) -> Dict[int, ArrayCacheEntry]:
-        if not self.array_caches:
+        self.__index_array_caches()
+        self.array_caches_filled = True
+
+    def __array_caches(self, report: bool = True) -> None:
+        if not self.array_caches_filled:
             self.__fill_all_array_caches()
+            # Checks report the findings themselves
+            if report:
+                print_findings(self.array_cache_findings)
+
+    def other_array_cache_findings(self,
+                                   cache: 'KmemCache') -> List[SlabFinding]:
+        """
+        Returns the findings about the array caches of another cache
+        used while checking this one
+
+        The array caches of the other cache are read without printing
+        anything.  Their findings are returned the first time the cache
+        is used during a check, so they reach the caller of
+        :meth:`check` no matter which caches were read before.
+
+        Args:
+            cache: The other cache
+
+        Returns:
+            list of SlabFinding: The findings, or an empty list if they
+            were already returned during this check
+        """
+        cache.__array_caches(report=False)
+        if cache is self or cache.name in self.__reported_caches:
+            return list()
+        self.__reported_caches.add(cache.name)
+        return list(cache.array_cache_findings)
+
+    def get_array_caches(self) -> Dict[int, ArrayCacheEntry]:
+        """
+        Returns the objects in array caches
+
+        The dictionary is built for each call; use
+        :meth:`array_cache_entry` to look up single objects.
+
+        Returns:
+            dict: The array cache of each object, by address
+        """
+        self.__array_caches()
+        return {ptr: self.array_cache_infos[owner]
+                for (ptr, owner) in zip(self.array_cache_addrs,
+                                        self.array_cache_owners)}
+
+    def array_cache_entry(self, addr: int) -> Optional[ArrayCacheEntry]:
+        """
+        Returns the array cache an object is in
+
+        Args:
+            addr: The address of the object
+
+        Returns:
+            dict: The type of the array cache and its source and target
+            node or cpu, or None if the object isn't in an array cache
+        """
+        self.__array_caches()
+        addrs = self.array_cache_addrs
+        idx = bisect_left(addrs, addr)
+        if idx < len(addrs) and addrs[idx] == addr:
+            return self.array_cache_infos[self.array_cache_owners[idx]]
+        return None
 
-        return self.array_caches
+    def array_cache_objects(self, start: int, end: int) -> array:
+        """
+        Returns the objects in array caches within a range of addresses
+
+        Args:
+            start: The first address of the range
+            end: The address after the last one of the range
+
+        Returns:
+            array of int: The addresses of the objects, sorted
+        """
+        self.__array_caches()
+        addrs = self.array_cache_addrs
+        return addrs[bisect_left(addrs, start):bisect_left(addrs, end)]
 
     def __get_allocated_objects(self, node: gdb.Value,
                                 slabtype: int) -> Iterable[int]:
         for slab in self.get_slabs_of_type(node, slabtype):
             for obj in slab.get_allocated_objects():
                 yield obj
+            print_findings(slab.pop_findings())
 
     def get_allocated_objects(self) -> Iterable[int]:
         # pylint: disable=unused-variable
@@ -470,6 +795,32 @@ class KmemCache:
     def get_slabs_of_type(self, node: gdb.Value, slabtype: int,
                           reverse: bool = False,
                           exact_cycles: bool = False) -> Iterable[Slab]:
+        """
+        Returns the slabs on a slab list
+
+        Problems walking the list are printed.
+
+        Args:
+            node: The ``struct kmem_cache_node`` the list belongs to
+            slabtype: The list, ``slab_partial``, ``slab_full`` or
+                ``slab_free``
+            reverse (optional, default=False): Whether to walk the list
+                backwards
+            exact_cycles (optional, default=False): Whether to detect
+                cycles exactly
+
+        Yields:
+            Slab: The slabs on the list
+        """
+        for slab in self.__walk_slabs(node, slabtype, reverse, exact_cycles):
+            if isinstance(slab, Slab):
+                yield slab
+            else:
+                print_findings([slab])
+
+    def __walk_slabs(self, node: gdb.Value, slabtype: int, reverse: bool,
+                     exact_cycles: bool
+                     ) -> Iterator[Union[Slab, SlabFinding]]:
         wrong_list_nodes = dict()
         for stype in range(3):
             if stype != slabtype:
@@ -480,158 +831,224 @@ class KmemCache:
             try:
                 if int(list_head) in wrong_list_nodes.keys():
                     wrong_type = wrong_list_nodes[int(list_head)]
-                    print(col_error("Encountered head of {} slab list while traversing {} slab list, skipping"
-                                    .format(slab_list_name[wrong_type],
-                                            slab_list_name[slabtype])))
+                    yield SlabFinding(FINDING_LIST, self.name,
+                                      "Encountered head of {} slab list while traversing {} slab list, skipping"
+                                      .format(slab_list_name[wrong_type],
+                                              slab_list_name[slabtype]))
                     continue
 
                 slab = Slab.from_list_head(list_head, self)
-            except gdb.NotAvailableError:
-                traceback.print_exc()
-                print("failed to initialize slab object from list_head {:#x}: {}"
-                      .format(int(list_head), sys.exc_info()[0]))
+            except (gdb.NotAvailableError, gdb.MemoryError) as e:
+                yield SlabFinding(FINDING_LIST, self.name,
+                                  "failed to initialize slab object from list_head {:#x}: {}"
+                                  .format(int(list_head), e))
                 continue
             yield slab
 
-
     def __check_slab(self, slab: Slab, slabtype: int, nid: int,
-                     errors: Dict) -> int:
+                     runs: '_SlabRuns') -> SlabCheck:
         addr = int(slab.gdb_obj.address)
         free = 0
 
         if slab.error is False:
-            free = slab.check(slabtype, nid)
+            free = yield from slab.check(slabtype, nid)
 
-        if slab.misplaced_error is None and errors['num_misplaced'] > 0:
-            if errors['num_misplaced'] > 0:
-                print(col_error("{} slab objects were misplaced, printing the last:"
-                                .format(errors['num_misplaced'])))
-                print(errors['last_misplaced'])
-                errors['num_misplaced'] = 0
-                errors['last_misplaced'] = None
+        if slab.misplaced_error is None:
+            yield from runs.end_misplaced()
 
         if slab.error is False:
-            errors['num_ok'] += 1
-            errors['last_ok'] = addr
-            if not errors['first_ok']:
-                errors['first_ok'] = addr
+            runs.ok(addr)
         else:
-            if errors['num_ok'] > 0:
-                print("{} slab objects were ok between {:#x} and {:#x}"
-                      .format(errors['num_ok'], errors['first_ok'], errors['last_ok']))
-                errors['num_ok'] = 0
-                errors['first_ok'] = None
-                errors['last_ok'] = None
-
+            yield from runs.end_ok()
             if slab.misplaced_error is not None:
-                if errors['num_misplaced'] == 0:
-                    print(slab.misplaced_error)
-                errors['num_misplaced'] += 1
-                errors['last_misplaced'] = slab.misplaced_error
+                yield from runs.misplaced(slab.misplaced_error)
 
         return free
 
     def ___check_slabs(self, node: gdb.Value, slabtype: int, nid: int,
-                       reverse: bool = False) -> Tuple[bool, int, int]:
+                       reverse: bool = False
+                       ) -> Generator[SlabFinding, None, Tuple[bool, int, int]]:
         slabs = 0
         free = 0
         check_ok = True
-
-        errors = {'first_ok': None,
-                  'last_ok': None,
-                  'num_ok': 0,
-                  'first_misplaced': None,
-                  'last_misplaced': None,
-                  'num_misplaced': 0}
+        runs = _SlabRuns(self.name)
 
         try:
-            for slab in self.get_slabs_of_type(node, slabtype, reverse,
-                                               exact_cycles=True):
+            for slab in self.__walk_slabs(node, slabtype, reverse,
+                                          exact_cycles=True):
+                if isinstance(slab, SlabFinding):
+                    yield slab
+                    continue
                 try:
-                    free += self.__check_slab(slab, slabtype, nid, errors)
-                except gdb.NotAvailableError as e:
-                    print(col_error("Exception when checking slab {:#x}:{}"
-                                    .format(int(slab.gdb_obj.address), e)))
-                    traceback.print_exc()
+                    free += yield from self.__check_slab(slab, slabtype, nid,
+                                                         runs)
+                except (gdb.NotAvailableError, gdb.MemoryError) as e:
+                    yield from slab.pop_findings()
+                    yield SlabFinding(FINDING_SLAB, self.name,
+                                      "exception when checking slab: {}".format(e),
+                                      int(slab.gdb_obj.address))
                 slabs += 1
 
-        except (gdb.NotAvailableError, ListError) as e:
-            print(col_error("Unrecoverable error when traversing {} slab list: {}"
-                            .format(slab_list_name[slabtype], e)))
+        except (gdb.NotAvailableError, gdb.MemoryError, ListError) as e:
+            yield SlabFinding(FINDING_LIST, self.name,
+                              "Unrecoverable error when traversing {} slab list: {}"
+                              .format(slab_list_name[slabtype], e))
             check_ok = False
 
-        count = errors['num_ok']
-        if count:
-            print("{} slab objects were ok between {:#x} and {:#x}"
-                  .format(errors['num_ok'], errors['first_ok'], errors['last_ok']))
-
-        count = errors['num_misplaced']
-        if count:
-            print(col_error("{} slab objects were misplaced, printing the last:"
-                            .format(errors['num_misplaced'])))
-            print(errors['last_misplaced'])
+        yield from runs.end_ok()
+        yield from runs.end_misplaced()
 
         return (check_ok, slabs, free)
 
-    def __check_slabs(self, node: gdb.Value, slabtype: int, nid: int) -> int:
+    def __check_slabs(self, node: gdb.Value, slabtype: int,
+                      nid: int) -> SlabCheck:
 
         slab_list = node[slab_list_fullname[slabtype]]
 
-        print("checking {} slab list {:#x}".format(slab_list_name[slabtype],
-                                                   int(slab_list.address)))
+        yield SlabFinding(FINDING_INFO, self.name,
+                          "checking {} slab list {:#x}"
+                          .format(slab_list_name[slabtype],
+                                  int(slab_list.address)), error=False)
 
-        (check_ok, slabs, free) = self.___check_slabs(node, slabtype, nid)
+        (check_ok, slabs, free) = yield from self.___check_slabs(node, slabtype,
+                                                                 nid)
 
         if not check_ok:
-            print("Retrying the slab list in reverse order")
+            yield SlabFinding(FINDING_INFO, self.name,
+                              "Retrying the slab list in reverse order",
+                              error=False)
             (check_ok, slabs_rev, free_rev) = \
-                self.___check_slabs(node, slabtype, nid, reverse=True)
+                yield from self.___check_slabs(node, slabtype, nid,
+                                               reverse=True)
             slabs += slabs_rev
             free += free_rev
 
-        #print("checked {} slabs in {} slab list".format(
-#                    slabs, slab_list_name[slabtype]))
-
         return free
 
-    def check_array_caches(self) -> None:
+    def check_array_caches(self) -> Iterator[SlabFinding]:
+        """
+        Check that the objects in the array caches are allocated objects
+        of this cache
+
+        Yields:
+            SlabFinding: The inconsistencies found
+        """
+        self.__array_caches(report=False)
         acs = self.get_array_caches()
-        for ac_ptr in acs:
+        yield from self.array_cache_findings
+
+        for ac_ptr in self.array_cache_addrs:
             ac_obj_slab = slab_from_obj_addr(ac_ptr)
+            msg = None
             if not ac_obj_slab:
-                print("cached pointer {:#x} in {} not found in slab"
-                      .format(ac_ptr, acs[ac_ptr]))
+                msg = ("cached pointer {:#x} in {} not found in slab"
+                       .format(ac_ptr, acs[ac_ptr]))
             elif ac_obj_slab.kmem_cache.name != self.name:
-                print("cached pointer {:#x} in {} belongs to wrong kmem cache {}"
-                      .format(ac_ptr, acs[ac_ptr], ac_obj_slab.kmem_cache.name))
+                msg = ("cached pointer {:#x} in {} belongs to wrong kmem cache {}"
+                       .format(ac_ptr, acs[ac_ptr], ac_obj_slab.kmem_cache.name))
             else:
                 ac_obj_obj = ac_obj_slab.contains_obj(ac_ptr)
+                yield from ac_obj_slab.pop_findings()
                 if ac_obj_obj[0] is False and ac_obj_obj[2] is None:
-                    print("cached pointer {:#x} in {} is not allocated: {}".format(
-                        ac_ptr, acs[ac_ptr], ac_obj_obj))
+                    msg = ("cached pointer {:#x} in {} is not allocated: {}"
+                           .format(ac_ptr, acs[ac_ptr], ac_obj_obj))
                 elif ac_obj_obj[1] != ac_ptr:
-                    print("cached pointer {:#x} in {} has wrong offset: ({}, {:#x}, {})"
-                          .format(ac_ptr, acs[ac_ptr], ac_obj_obj[0],
-                                  ac_obj_obj[1], ac_obj_obj[2]))
+                    msg = ("cached pointer {:#x} in {} has wrong offset: ({}, {:#x}, {})"
+                           .format(ac_ptr, acs[ac_ptr], ac_obj_obj[0],
+                                   ac_obj_obj[1], ac_obj_obj[2]))
+            if msg is not None:
+                yield SlabFinding(FINDING_ARRAY_CACHE, self.name, msg)
+
+    def check(self) -> Iterator[SlabFinding]:
+        """
+        Check the consistency of the cache
+
+        The slab lists of every node are walked and each slab is checked,
+        followed by the array caches.  Runs of consistent slabs and of
+        slabs on the wrong list are summarized.
+
+        Yields:
+            SlabFinding: The findings, in the order they are found
+        """
+        # The array caches are used while checking the slabs, but their
+        # findings are reported last
+        self.__array_caches(report=False)
+        self.__reported_caches = set()
 
-    def check_all(self) -> None:
         for (nid, node) in self.__get_nodelists():
             try:
                 # This is version and architecture specific
                 lock = int(node["list_lock"]["rlock"]["raw_lock"]["slock"])
-                if lock != 0:
-                    print(col_error("unexpected lock value in kmem_list3 {:#x}: {:#x}"
-                                    .format(int(node.address), lock)))
             except gdb.error:
-                print("Can't check lock state -- locking implementation unknown.")
+                yield SlabFinding(FINDING_INFO, self.name,
+                                  "Can't check lock state -- locking implementation unknown.",
+                                  error=False)
+            else:
+                if lock != 0:
+                    yield SlabFinding(FINDING_NODE, self.name,
+                                      "unexpected lock value in kmem_list3 {:#x}: {:#x}"
+                                      .format(int(node.address), lock))
             free_declared = int(node["free_objects"])
-            free_counted = self.__check_slabs(node, slab_partial, nid)
-            free_counted += self.__check_slabs(node, slab_full, nid)
-            free_counted += self.__check_slabs(node, slab_free, nid)
+            free_counted = yield from self.__check_slabs(node, slab_partial, nid)
+            free_counted += yield from self.__check_slabs(node, slab_full, nid)
+            free_counted += yield from self.__check_slabs(node, slab_free, nid)
             if free_declared != free_counted:
-                print(col_error("free objects mismatch on node %d: declared=%d counted=%d" %
-                                (nid, free_declared, free_counted)))
-        self.check_array_caches()
+                yield SlabFinding(FINDING_NODE, self.name,
+                                  "free objects mismatch on node %d: declared=%d counted=%d" %
+                                  (nid, free_declared, free_counted))
+        yield from self.check_array_caches()
+
+    def check_all(self) -> None:
+        """Check the consistency of the cache and print the findings"""
+        print_findings(self.check())
+
+class _SlabRuns:
+    """
+    Summarize runs of consistent slabs and of slabs on the wrong list
+
+    Args:
+        cache: The name of the kmem cache
+    """
+    __slots__ = ('cache', 'num_ok', 'first_ok', 'last_ok', 'num_misplaced',
+                 'last_misplaced')
+
+    def __init__(self, cache: str) -> None:
+        self.cache = cache
+        self.num_ok = 0
+        self.first_ok = 0
+        self.last_ok = 0
+        self.num_misplaced = 0
+        self.last_misplaced: Optional[SlabFinding] = None
+
+    def ok(self, addr: int) -> None:
+        if not self.num_ok:
+            self.first_ok = addr
+        self.num_ok += 1
+        self.last_ok = addr
+
+    def end_ok(self) -> Iterator[SlabFinding]:
+        if self.num_ok:
+            yield SlabFinding(FINDING_OK, self.cache,
+                              "{} slab objects were ok between {:#x} and {:#x}"
+                              .format(self.num_ok, self.first_ok,
+                                      self.last_ok), error=False)
+            self.num_ok = 0
+
+    def misplaced(self, finding: SlabFinding) -> Iterator[SlabFinding]:
+        # The first slab of a run is reported as it is found
+        if not self.num_misplaced:
+            yield finding
+        self.num_misplaced += 1
+        self.last_misplaced = finding
+
+    def end_misplaced(self) -> Iterator[SlabFinding]:
+        if self.num_misplaced and self.last_misplaced is not None:
+            yield SlabFinding(FINDING_MISPLACED, self.cache,
+                              "{} slab objects were misplaced, printing the last:"
+                              .format(self.num_misplaced))
+            yield self.last_misplaced
+        self.num_misplaced = 0
+        self.last_misplaced = None
 
 class KmemCacheNotFound(RuntimeError):
     """The specified kmem_cache could not be found."""
@@ -667,7 +1084,13 @@ def kmem_cache_get_all() -> ValuesView[KmemCache]:
     return kmem_caches.values()
 
 def slab_from_obj_addr(addr: int) -> Union[Slab, None]:
-    page = page_from_addr(addr).compound_head()
+    pfn = (addr - Page.directmap_base) // Page.PAGE_SIZE
+    head = compound_heads([pfn])[0]
+    if head is None:
+        # Let gdb raise the error callers expect for unreadable pages
+        page = page_from_addr(addr).compound_head()
+    else:
+        page = pfn_to_page(head)
     if not page.is_slab():
         return None
 
@@ -1,10 +1,12 @@
 # -*- coding: utf-8 -*-
 # vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
 
-from typing import Union, Tuple, List, Iterator, Dict, Optional
+from typing import Union, Tuple, List, Iterator, Dict, Optional, Sequence
 
 import uuid
+import struct
 
+import crash
 from crash.util.symbols import Types
 from crash.exceptions import MissingTypeError, MissingSymbolError
 from crash.exceptions import ArgumentTypeError, NotStructOrUnionError
@@ -492,3 +494,121 @@ def decode_uuid_t(value: gdb.Value) -> uuid.UUID:
         member = '__u_bits'
 
     return decode_uuid(value[member])
+
+def target_byteorder() -> str:
+    """
+    Returns the byte order of the target
+
+    Returns:
+        str: ``'little'`` or ``'big'``, suitable for use with
+        :meth:`int.from_bytes`
+    """
+    try:
+        return crash.current_target().byteorder
+    except ValueError:
+        endian = str(gdb.execute("show endian", to_string=True))
+        return 'big' if 'big endian' in endian else 'little'
+
+def read_scatter(ranges: Sequence[Tuple[int, int]]) -> List[Optional[bytes]]:
+    """
+    Read many small ranges of memory in one call
+
+    When the current target is a kdump target, the ranges are read in
+    bulk with each page decoded only once.  Otherwise, each range is
+    read separately from the selected inferior.
+
+    Args:
+        ranges (list of (int, int)): The (address, length) pairs to read
+
+    Returns:
+        list of bytes: The contents of each range, in the order requested.
+        Ranges that could not be read are returned as None.
+    """
+    try:
+        return crash.current_target().read_scatter(ranges)
+    except ValueError:
+        pass
+
+    inferior = gdb.selected_inferior()
+    results: List[Optional[bytes]] = list()
+    for (addr, length) in ranges:
+        try:
+            results.append(inferior.read_memory(addr, length).tobytes())
+        except gdb.MemoryError:
+            results.append(None)
+    return results
+
+_word_codes = {1: 'B', 2: 'H', 4: 'I', 8: 'Q'}
+
+def _word_struct(size: int, count: int = 1) -> struct.Struct:
+    try:
+        code = _word_codes[size]
+    except KeyError:
+        raise ValueError(f"cannot decode {size}-byte integers")
+    prefix = '>' if target_byteorder() == 'big' else '<'
+    return struct.Struct(f"{prefix}{count}{code}")
+
+def unpack_words(buf: bytes, size: int = 8) -> Tuple[int, ...]:
+    """
+    Decode a buffer holding an array of unsigned integers
+
+    Args:
+        buf (bytes): The raw contents of the array, as read from the
+            target.  Trailing bytes that do not make up a whole integer
+            are ignored.
+        size (int, optional, default=8): The size of each integer in bytes
+
+    Returns:
+        tuple of int: The decoded integers, in target byte order
+
+    Raises:
+        ValueError: size is not 1, 2, 4, or 8
+    """
+    return _word_struct(size, len(buf) // size).unpack_from(buf)
+
+def read_words(addrs: Sequence[int], size: int = 8) -> List[Optional[int]]:
+    """
+    Read many unsigned integers of the same size in one call
+
+    Args:
+        addrs (list of int): The addresses of the integers to read
+        size (int, optional, default=8): The size of each integer in bytes
+
+    Returns:
+        list of int: The value at each address, in the order requested.
+        Values that could not be read are returned as None.
+
+    Raises:
+        ValueError: size is not 1, 2, 4, or 8
+    """
+    word = _word_struct(size)
+    results: List[Optional[int]] = list()
+    for buf in read_scatter([(addr, size) for addr in addrs]):
+        if buf is None:
+            results.append(None)
+        else:
+            results.append(word.unpack(buf)[0])
+    return results
+
+def read_array(addr: int, count: int, size: int = 8) -> Tuple[int, ...]:
+    """
+    Read an array of unsigned integers in one read
+
+    Args:
+        addr (int): The address of the first integer
+        count (int): The number of integers to read
+        size (int, optional, default=8): The size of each integer in bytes
+
+    Returns:
+        tuple of int: The decoded integers, in target byte order
+
+    Raises:
+        ValueError: size is not 1, 2, 4, or 8
+        gdb.MemoryError: The array could not be read
+    """
+    if count <= 0:
+        return ()
+    buf = read_scatter([(addr, count * size)])[0]
+    if buf is None:
+        raise gdb.MemoryError(f"Cannot access memory at address {addr:#x}")
+    return unpack_words(buf, size)
@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+
+class ELFError(Exception):
+    pass
@@ -37,3 +37,4 @@ class kdumpfile(object):
         return addrxlat.System()
 
 KDUMP_KVADDR = 0
+KDUMP_KPHYSADDR = 1
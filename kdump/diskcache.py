@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+"""
+The kdump.diskcache module keeps decoded dump pages in a file next to
+other sessions' so that opening the same dump again does not decode the
+same pages again.
+
+The cache file starts with a header containing a magic number, the page
+size, and the number of pages.  It is followed by the page contents,
+most recently used first, and then by the page addresses in the same
+order.
+
+Sessions map the cache file read-only when the dump is opened and write
+the pages they touched when it is closed.  Only the addresses of the
+pages are remembered during the session; their contents are read back
+when the file is written.  Writers take an exclusive lock, merge their
+pages with the current file, and atomically replace it, so sessions
+running at the same time never see a partial file and keep reading the
+version they mapped.
+"""
+
+from typing import Callable, Dict, List, Optional
+
+import os
+import mmap
+import fcntl
+import struct
+import hashlib
+from collections import OrderedDict
+
+# 256 MiB worth of 4k pages
+DEFAULT_DISK_CACHE_PAGES = 65536
+
+_MAGIC = b'CRPYPGC2'
+_HEADER = struct.Struct('<8sIQ')
+
+# Reads a page to be written to the cache file, or returns None
+PageReader = Callable[[int], Optional[bytes]]
+
+class _CacheFile:
+    """A read-only mapping of a cache file"""
+    def __init__(self, path: str, page_size: int) -> None:
+        self.index: Dict[int, int] = dict()
+        self.addrs: List[int] = list()
+        self.data_offset = 0
+        self.page_size = page_size
+        self._mmap: Optional[mmap.mmap] = None
+
+        try:
+            with open(path, 'rb') as f:
+                header = f.read(_HEADER.size)
+                if len(header) != _HEADER.size:
+                    return
+                (magic, fpage_size, count) = _HEADER.unpack(header)
+                if magic != _MAGIC or fpage_size != page_size:
+                    return
+
+                self.data_offset = _HEADER.size
+                size = os.fstat(f.fileno()).st_size
+                if size != self.data_offset + count * (page_size + 8):
+                    return
+
+                f.seek(self.data_offset + count * page_size)
+                addrs = f.read(count * 8)
+                if len(addrs) != count * 8:
+                    return
+                if count:
+                    self._mmap = mmap.mmap(f.fileno(), 0,
+                                           access=mmap.ACCESS_READ)
+        except OSError:
+            return
+
+        self.addrs = list(struct.unpack(f"<{count}Q", addrs))
+        self.index = {addr: i for (i, addr) in enumerate(self.addrs)}
+
+    def __contains__(self, pageaddr: int) -> bool:
+        return pageaddr in self.index
+
+    def read(self, pageaddr: int) -> Optional[bytes]:
+        try:
+            i = self.index[pageaddr]
+        except KeyError:
+            return None
+        assert self._mmap is not None
+        offset = self.data_offset + i * self.page_size
+        return self._mmap[offset:offset + self.page_size]
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self.index = dict()
+        self.addrs = list()
+
+class DiskPageCache:
+    """
+    A persistent cache of decoded pages shared between sessions
+
+    The addresses of pages read from the cache or recorded as newly
+    decoded are kept in a most-recently-used list for this session.
+    :meth:`flush` merges that list with the current cache file and trims
+    the result to the configured size.  Pages used by this session are
+    kept first, then the pages other sessions used most recently.  The
+    contents of newly decoded pages are read back by the caller when the
+    file is written, so they are not kept in memory twice.
+
+    Args:
+        path: The path of the cache file
+        page_size: The size of a page in the dump
+        max_pages (optional, default=DEFAULT_DISK_CACHE_PAGES): The
+            maximum number of pages kept in the cache file
+
+    Attributes:
+        hits (int): The number of pages found in the cache file
+        misses (int): The number of pages not found in the cache file
+    """
+    def __init__(self, path: str, page_size: int,
+                 max_pages: int = DEFAULT_DISK_CACHE_PAGES) -> None:
+        self.path = path
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self._file = _CacheFile(path, page_size)
+        # Whether each page was decoded by this session, by address
+        self._touched: 'OrderedDict[int, bool]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def dump_key(filename: str, identity: str) -> str:
+        """
+        Build the name identifying the cache for a dump file
+
+        Args:
+            filename: The path to the dump file
+            identity: A string identifying the crashed kernel, such as
+                the build id from the vmcoreinfo
+
+        Returns:
+            str: A name that changes whenever the dump file does
+        """
+        st = os.stat(filename)
+        key = f"{identity}:{st.st_size}:{st.st_mtime_ns}"
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def for_dump(cls, cache_dir: str, filename: str, identity: str,
+                 page_size: int,
+                 max_pages: int = DEFAULT_DISK_CACHE_PAGES) -> 'DiskPageCache':
+        """
+        Open the cache for a dump file
+
+        Args:
+            cache_dir: The directory holding the cache files
+            filename: The path to the dump file
+            identity: A string identifying the crashed kernel
+            page_size: The size of a page in the dump
+            max_pages (optional, default=DEFAULT_DISK_CACHE_PAGES): The
+                maximum number of pages kept in the cache file
+
+        Returns:
+            DiskPageCache: The cache for the dump
+        """
+        key = cls.dump_key(filename, identity)
+        return cls(os.path.join(cache_dir, f"{key}.pages"), page_size,
+                   max_pages)
+
+    def __len__(self) -> int:
+        return len(self._file.index)
+
+    def _touch(self, pageaddr: int, decoded: bool) -> None:
+        if pageaddr in self._touched:
+            self._touched.move_to_end(pageaddr)
+            if decoded:
+                self._touched[pageaddr] = True
+            return
+
+        self._touched[pageaddr] = decoded
+        while len(self._touched) > self.max_pages:
+            self._touched.popitem(last=False)
+
+    def lookup(self, pageaddr: int) -> Optional[bytes]:
+        """
+        Look up a page in the cache file
+
+        Args:
+            pageaddr: The page-aligned address of the page
+
+        Returns:
+            bytes: The contents of the page, or None if it is not cached
+        """
+        page = self._file.read(pageaddr)
+        if page is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._touch(pageaddr, False)
+        return page
+
+    def record(self, pageaddr: int) -> None:
+        """
+        Remember a newly decoded page so it is written on :meth:`flush`
+
+        Args:
+            pageaddr: The page-aligned address of the page
+        """
+        if self.max_pages:
+            self._touch(pageaddr, True)
+
+    def _read(self, pageaddr: int, current: _CacheFile,
+              read_page: PageReader) -> Optional[bytes]:
+        page = self._file.read(pageaddr)
+        if page is None:
+            page = current.read(pageaddr)
+        if page is None and self._touched.get(pageaddr):
+            page = read_page(pageaddr)
+        return page
+
+    def _merge(self, current: _CacheFile) -> List[int]:
+        order = [pageaddr for pageaddr in reversed(self._touched)
+                 if pageaddr in self._file or pageaddr in current or
+                 self._touched[pageaddr]]
+        seen = set(order)
+
+        for pageaddr in current.addrs:
+            if len(order) >= self.max_pages:
+                break
+            if pageaddr not in seen:
+                order.append(pageaddr)
+
+        return order[:self.max_pages]
+
+    def flush(self, read_page: PageReader) -> None:
+        """
+        Write the pages used by this session to the cache file
+
+        The current cache file is locked, merged with this session's
+        pages, and replaced atomically.
+
+        Args:
+            read_page: Returns the contents of a page decoded by this
+                session, or None if it can't be read any more
+
+        Raises:
+            OSError: The cache file could not be written
+        """
+        if not self._touched or not self.max_pages:
+            return
+
+        cache_dir = os.path.dirname(self.path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        with open(f"{self.path}.lock", 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+            current = _CacheFile(self.path, self.page_size)
+            try:
+                order = self._merge(current)
+
+                tmp = f"{self.path}.{os.getpid()}.tmp"
+                try:
+                    written = list()
+                    with open(tmp, 'wb') as f:
+                        f.write(_HEADER.pack(_MAGIC, self.page_size, 0))
+                        for pageaddr in order:
+                            page = self._read(pageaddr, current, read_page)
+                            if page is None or len(page) != self.page_size:
+                                continue
+                            f.write(page)
+                            written.append(pageaddr)
+                        f.write(struct.pack(f"<{len(written)}Q", *written))
+                        f.seek(0)
+                        f.write(_HEADER.pack(_MAGIC, self.page_size,
+                                             len(written)))
+                    if written:
+                        os.replace(tmp, self.path)
+                    else:
+                        os.unlink(tmp)
+                except OSError:
+                    try:
+                        os.unlink(tmp)
+                    except OSError:
+                        pass
+                    raise
+            finally:
+                current.close()
+
+        self._touched.clear()
+
+    def close(self) -> None:
+        """Release the mapping of the cache file without writing it"""
+        self._file.close()
+        self._touched.clear()
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+"""
+The kdump.iostats module collects statistics about the reads the
+kdumpfile target serves and attributes them to the command that caused
+them.
+"""
+
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from collections import Counter
+
+# Reads not issued on behalf of a crash-python command
+OTHER = '(gdb)'
+
+# Bucket 0 holds reads under 1us, bucket n holds [2^(n-1), 2^n) us.
+# The last bucket collects everything from ~8s up.
+HISTOGRAM_BUCKETS = 25
+
+class LatencyHistogram:
+    """
+    A histogram of read latencies with power-of-two microsecond buckets
+    """
+    def __init__(self) -> None:
+        self.buckets: List[int] = [0] * HISTOGRAM_BUCKETS
+
+    def add(self, seconds: float) -> None:
+        """
+        Add a latency to the histogram
+
+        Args:
+            seconds: The time taken by the read
+        """
+        bucket = int(seconds * 1000000).bit_length()
+        if bucket >= HISTOGRAM_BUCKETS:
+            bucket = HISTOGRAM_BUCKETS - 1
+        self.buckets[bucket] += 1
+
+    def merge(self, other: 'LatencyHistogram') -> None:
+        """
+        Add the counts of another histogram to this one
+
+        Args:
+            other: The histogram to add
+        """
+        for (i, count) in enumerate(other.buckets):
+            self.buckets[i] += count
+
+    @staticmethod
+    def bucket_range(bucket: int) -> Tuple[int, Optional[int]]:
+        """
+        Returns the latencies covered by a bucket
+
+        Args:
+            bucket: The index of the bucket
+
+        Returns:
+            (int, int): The lowest and one past the highest latency in
+            microseconds.  The upper bound of the last bucket is None.
+        """
+        low = 1 << (bucket - 1) if bucket else 0
+        if bucket == HISTOGRAM_BUCKETS - 1:
+            return (low, None)
+        return (low, 1 << bucket)
+
+    def __len__(self) -> int:
+        return sum(self.buckets)
+
+    def __iter__(self) -> Iterator[Tuple[int, Optional[int], int]]:
+        """Yields (low, high, count) for every non-empty bucket"""
+        for (i, count) in enumerate(self.buckets):
+            if count:
+                (low, high) = self.bucket_range(i)
+                yield (low, high, count)
+
+    def percentile(self, pct: float) -> int:
+        """
+        Returns an upper bound for a percentile of the latencies
+
+        Args:
+            pct: The percentile, from 0 to 100
+
+        Returns:
+            int: The upper bound in microseconds of the bucket containing
+            the percentile, or 0 if the histogram is empty
+        """
+        total = len(self)
+        if not total:
+            return 0
+
+        wanted = total * pct / 100
+        seen = 0
+        for (i, count) in enumerate(self.buckets):
+            seen += count
+            if count and seen >= wanted:
+                (low, high) = self.bucket_range(i)
+                return high if high is not None else low
+        return 0
+
+class IOStats:
+    """
+    Read statistics for one command
+
+    Attributes:
+        invocations (int): The number of times the command was run
+        reads (int): The number of reads served by the target
+        bytes (int): The number of bytes requested
+        hits (int): The number of pages found in the page cache
+        misses (int): The number of pages that had to be decoded
+        seconds (float): The total time spent serving reads
+        errors (Counter): The number of failed reads by exception name
+        latency (LatencyHistogram): The distribution of read latencies
+    """
+    def __init__(self) -> None:
+        self.invocations = 0
+        self.reads = 0
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.seconds = 0.0
+        self.errors: Counter = Counter()
+        self.latency = LatencyHistogram()
+
+    @property
+    def hit_rate(self) -> float:
+        """The fraction of pages found in the page cache"""
+        pages = self.hits + self.misses
+        if not pages:
+            return 0.0
+        return self.hits / pages
+
+    def merge(self, other: 'IOStats') -> None:
+        """
+        Add the statistics of another command to these
+
+        Args:
+            other: The statistics to add
+        """
+        self.invocations += other.invocations
+        self.reads += other.reads
+        self.bytes += other.bytes
+        self.hits += other.hits
+        self.misses += other.misses
+        self.seconds += other.seconds
+        self.errors.update(other.errors)
+        self.latency.merge(other.latency)
+
+class IOProfiler:
+    """
+    Attribute target reads to the commands that issued them
+
+    Commands call :meth:`begin` and :meth:`end` around their execution.
+    Commands may run other commands; reads are attributed to the one
+    that started most recently.  Reads made outside of any command are
+    attributed to :data:`OTHER`.
+
+    Recording is off by default, since timing every read slows down
+    the reads themselves.
+
+    Attributes:
+        enabled (bool): Whether reads are being recorded
+        profiles (dict): The :obj:`IOStats` for each command, by name
+    """
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self.profiles: Dict[str, IOStats] = dict()
+        self._stack: List[str] = list()
+
+    def _profile(self, name: str) -> IOStats:
+        try:
+            return self.profiles[name]
+        except KeyError:
+            stats = IOStats()
+            self.profiles[name] = stats
+            return stats
+
+    @property
+    def current(self) -> IOStats:
+        """The statistics reads are currently attributed to"""
+        if self._stack:
+            return self._profile(self._stack[-1])
+        return self._profile(OTHER)
+
+    def begin(self, name: str) -> None:
+        """
+        Start attributing reads to a command
+
+        Args:
+            name: The name of the command
+        """
+        self._profile(name).invocations += 1
+        self._stack.append(name)
+
+    def end(self) -> None:
+        """Stop attributing reads to the most recently started command"""
+        if self._stack:
+            self._stack.pop()
+
+    def record(self, length: int, seconds: float, hits: int = 0,
+               misses: int = 0) -> None:
+        """
+        Record a read
+
+        Args:
+            length: The number of bytes requested
+            seconds: The time taken to serve the read
+            hits (optional, default=0): The number of pages found in the
+                page cache
+            misses (optional, default=0): The number of pages that had
+                to be decoded
+        """
+        stats = self.current
+        stats.reads += 1
+        stats.bytes += length
+        stats.hits += hits
+        stats.misses += misses
+        stats.seconds += seconds
+        stats.latency.add(seconds)
+
+    def error(self, exc: Exception) -> None:
+        """
+        Record a failed read
+
+        Args:
+            exc: The exception the read failed with
+        """
+        self.current.errors[type(exc).__name__] += 1
+
+    def total(self) -> IOStats:
+        """
+        Returns the statistics for all commands combined
+
+        Returns:
+            IOStats: The sum of all profiles
+        """
+        total = IOStats()
+        for stats in self.profiles.values():
+            total.merge(stats)
+        return total
+
+    def reset(self) -> None:
+        """Forget all recorded statistics"""
+        self.profiles = dict()
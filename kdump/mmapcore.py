@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+"""
+The kdump.mmapcore module serves reads from ELF-format dumps, such as
+those saved from ``/proc/vmcore``, directly out of a memory mapping of
+the file.  The data in these dumps is stored uncompressed in the
+``PT_LOAD`` segments, so there is nothing for libkdumpfile to decode.
+"""
+
+from typing import Callable, List, Optional, Tuple
+
+import mmap
+from bisect import bisect_right
+
+from elftools.common.exceptions import ELFError
+from elftools.elf.elffile import ELFFile
+
+PT_LOAD = 'PT_LOAD'
+
+ELF_MAGIC = b'\x7fELF'
+
+# (start address, end address, file offset)
+Segment = Tuple[int, int, int]
+
+class SegmentMap:
+    """
+    Map an address space onto ranges of a memory-mapped file
+
+    Args:
+        buf: A view of the whole mapped file
+        segments: The (start, end, file offset) triplets describing
+            which address ranges are present in the file.  The end
+            address is exclusive.
+    """
+    def __init__(self, buf: memoryview, segments: List[Segment]) -> None:
+        self._buf = buf
+        self._set_segments(segments)
+
+    def _set_segments(self, segments: List[Segment]) -> None:
+        segments = sorted(s for s in segments if s[1] > s[0])
+        self._segments = segments
+        self._starts = [s[0] for s in segments]
+        self._last = segments[0] if segments else (0, 0, 0)
+
+    def __len__(self) -> int:
+        return len(self._segments)
+
+    @property
+    def segments(self) -> List[Segment]:
+        """The (start, end, file offset) triplets in address order"""
+        return list(self._segments)
+
+    def view(self, addr: int, length: int) -> Optional[memoryview]:
+        """
+        Return the file contents backing an address range without copying
+
+        Args:
+            addr: The first address of the range
+            length: The number of bytes in the range
+
+        Returns:
+            memoryview: A view of the mapped file, or None if the range
+            is not entirely contained in one segment
+        """
+        (start, end, offset) = self._last
+        if not start <= addr or not addr + length <= end:
+            i = bisect_right(self._starts, addr) - 1
+            if i < 0:
+                return None
+            (start, end, offset) = self._segments[i]
+            if addr + length > end:
+                return None
+            self._last = self._segments[i]
+
+        offset += addr - start
+        return self._buf[offset:offset + length]
+
+    def verify(self, check: Callable[[int, memoryview], bool]) -> None:
+        """
+        Drop the segments that fail a consistency check
+
+        Args:
+            check: Called with the start address and the contents of
+                the first bytes of each segment.  Segments for which it
+                returns False are removed from the map.
+        """
+        keep = list()
+        for segment in self._segments:
+            (start, end, offset) = segment
+            length = min(end - start, mmap.PAGESIZE)
+            if check(start, self._buf[offset:offset + length]):
+                keep.append(segment)
+        self._set_segments(keep)
+
+class MappedCore:
+    """
+    A memory mapping of an ELF-format dump file
+
+    The ``PT_LOAD`` program headers are used to build one map for
+    virtual and one for physical addresses.  Only the part of each
+    segment that is present in the file is mapped; the remainder is
+    left to libkdumpfile.
+
+    Args:
+        filename: The path to the dump file
+
+    Raises:
+        ValueError: The file is not in ELF format or contains no
+            loadable segments
+        OSError: The file could not be opened or mapped
+    """
+    def __init__(self, filename: str) -> None:
+        vsegments: List[Segment] = list()
+        psegments: List[Segment] = list()
+
+        with open(filename, 'rb') as f:
+            if f.read(len(ELF_MAGIC)) != ELF_MAGIC:
+                raise ValueError(f"{filename} is not an ELF file")
+            f.seek(0)
+
+            try:
+                for segment in ELFFile(f).iter_segments():
+                    if segment['p_type'] != PT_LOAD:
+                        continue
+                    offset = segment['p_offset']
+                    size = segment['p_filesz']
+                    vaddr = segment['p_vaddr']
+                    paddr = segment['p_paddr']
+                    # Unknown addresses are recorded as 0 or -1
+                    if vaddr not in (0, (1 << 64) - 1, (1 << 32) - 1):
+                        vsegments.append((vaddr, vaddr + size, offset))
+                    psegments.append((paddr, paddr + size, offset))
+            except ELFError as e:
+                raise ValueError(f"{filename}: {str(e)}")
+
+            if not psegments:
+                raise ValueError(f"{filename} contains no loadable segments")
+
+            # The mapping stays valid after the file is closed
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._buf = memoryview(self._mmap)
+        self.vaddr = SegmentMap(self._buf, vsegments)
+        self.paddr = SegmentMap(self._buf, psegments)
+
+    @staticmethod
+    def is_elf(filename: str) -> bool:
+        """
+        Returns whether a file is in ELF format
+
+        Args:
+            filename: The path to the file
+
+        Returns:
+            bool: Whether the file starts with the ELF magic number
+        """
+        try:
+            with open(filename, 'rb') as f:
+                return f.read(len(ELF_MAGIC)) == ELF_MAGIC
+        except OSError:
+            return False
+
+    def close(self) -> None:
+        """Release the mapping"""
+        self.vaddr = SegmentMap(memoryview(b''), list())
+        self.paddr = SegmentMap(memoryview(b''), list())
+        try:
+            self._buf.release()
+            self._mmap.close()
+        except BufferError:
+            # A caller still holds a view; the mapping goes away with it
+            pass
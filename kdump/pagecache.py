@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+"""
+The kdump.pagecache module contains the caches the kdumpfile target
+uses to avoid asking libkdumpfile to decode the same page repeatedly.
+"""
+
+from typing import Optional, List
+
+from bisect import bisect_right
+from collections import OrderedDict
+
+# 32 MiB worth of 4k pages
+DEFAULT_CACHE_PAGES = 8192
+
+class PageCache:
+    """
+    A size-bounded LRU cache of decoded dump pages
+
+    Pages are keyed by their page-aligned address.  When the cache is
+    full, the least recently used page is evicted to make room for the
+    new one.
+
+    Args:
+        capacity (optional, default=DEFAULT_CACHE_PAGES): The maximum
+            number of pages to keep.  A capacity of 0 disables the cache.
+
+    Attributes:
+        hits (int): The number of lookups served from the cache
+        misses (int): The number of lookups that were not cached
+        evictions (int): The number of pages evicted to make room
+    """
+    def __init__(self, capacity: int = DEFAULT_CACHE_PAGES) -> None:
+        if capacity < 0:
+            raise ValueError("cache capacity must not be negative")
+        self.capacity = capacity
+        self._pages: 'OrderedDict[int, bytes]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def __contains__(self, pageaddr: int) -> bool:
+        return pageaddr in self._pages
+
+    def lookup(self, pageaddr: int) -> Optional[bytes]:
+        """
+        Look up a page and mark it as most recently used
+
+        Args:
+            pageaddr: The page-aligned address of the page
+
+        Returns:
+            bytes: The contents of the page, or None if it is not cached
+        """
+        try:
+            page = self._pages[pageaddr]
+        except KeyError:
+            self.misses += 1
+            return None
+
+        self._pages.move_to_end(pageaddr)
+        self.hits += 1
+        return page
+
+    def insert(self, pageaddr: int, page: bytes) -> None:
+        """
+        Add a page to the cache, evicting the least recently used page
+        if the cache is full
+
+        Args:
+            pageaddr: The page-aligned address of the page
+            page: The contents of the page
+        """
+        if not self.capacity:
+            return
+
+        self._pages[pageaddr] = page
+        self._pages.move_to_end(pageaddr)
+        while len(self._pages) > self.capacity:
+            self._pages.popitem(last=False)
+            self.evictions += 1
+
+    def resize(self, capacity: int) -> None:
+        """
+        Change the capacity of the cache, evicting pages if required
+
+        Args:
+            capacity: The new maximum number of pages to keep
+        """
+        if capacity < 0:
+            raise ValueError("cache capacity must not be negative")
+        self.capacity = capacity
+        while len(self._pages) > capacity:
+            self._pages.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self) -> None:
+        """Drop all cached pages"""
+        self._pages.clear()
+
+    def reset_stats(self) -> None:
+        """Reset the hit, miss, and eviction counters"""
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+class MissingPageSet:
+    """
+    A set of page numbers known to be absent from the dump
+
+    Pages filtered out by makedumpfile tend to come in long runs, so
+    the set is kept as sorted, non-overlapping, half-open ranges of
+    page numbers.  Adjacent ranges are merged as pages are added.
+
+    Attributes:
+        hits (int): The number of lookups that found a missing page
+    """
+    def __init__(self) -> None:
+        self._starts: List[int] = list()
+        self._ends: List[int] = list()
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return sum(end - start
+                   for (start, end) in zip(self._starts, self._ends))
+
+    def __contains__(self, pagenr: int) -> bool:
+        i = bisect_right(self._starts, pagenr) - 1
+        return i >= 0 and pagenr < self._ends[i]
+
+    @property
+    def nr_ranges(self) -> int:
+        """The number of disjoint page ranges in the set"""
+        return len(self._starts)
+
+    def add(self, pagenr: int) -> None:
+        """
+        Mark a page as missing
+
+        Args:
+            pagenr: The number of the page (address >> page shift)
+        """
+        i = bisect_right(self._starts, pagenr) - 1
+        if i >= 0 and pagenr < self._ends[i]:
+            return
+
+        joins_left = i >= 0 and self._ends[i] == pagenr
+        joins_right = (i + 1 < len(self._starts) and
+                       self._starts[i + 1] == pagenr + 1)
+
+        if joins_left and joins_right:
+            self._ends[i] = self._ends[i + 1]
+            del self._starts[i + 1]
+            del self._ends[i + 1]
+        elif joins_left:
+            self._ends[i] = pagenr + 1
+        elif joins_right:
+            self._starts[i + 1] = pagenr
+        else:
+            self._starts.insert(i + 1, pagenr)
+            self._ends.insert(i + 1, pagenr + 1)
+
+    def check(self, first: int, last: int) -> bool:
+        """
+        Test whether any page in the range is known to be missing
+
+        A positive result is counted in :attr:`hits`.
+
+        Args:
+            first: The number of the first page in the range
+            last: The number of the last page in the range (inclusive)
+
+        Returns:
+            bool: True if any page in the range is missing
+        """
+        i = bisect_right(self._starts, last) - 1
+        if i >= 0 and first < self._ends[i]:
+            self.hits += 1
+            return True
+        return False
+
+    def clear(self) -> None:
+        """Forget all missing pages"""
+        self._starts = list()
+        self._ends = list()
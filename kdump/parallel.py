@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+"""
+The kdump.parallel module decodes large ranges of a compressed dump on
+several threads at once.
+
+libkdumpfile releases the GIL while it reads and decompresses pages, so
+splitting a large read into runs of pages and handing each run to a
+separate thread scales with the number of CPUs.  A libkdumpfile context
+must not be used by more than one thread at a time, so every worker
+thread opens the dump for itself.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from kdumpfile import kdumpfile
+
+DEFAULT_READ_THREADS = min(4, os.cpu_count() or 1)
+
+# Pages per run handed to a worker thread
+DEFAULT_CHUNK_PAGES = 64
+
+class ParallelReader:
+    """
+    Read large ranges from a dump using a pool of threads
+
+    Args:
+        filename: The path to the dump file
+        threads (optional, default=DEFAULT_READ_THREADS): The number of
+            worker threads
+        page_size (optional, default=4096): The size of a page in the dump
+        chunk_pages (optional, default=DEFAULT_CHUNK_PAGES): The number
+            of pages each worker reads at a time.  Reads shorter than two
+            runs are not split.
+        attrs (optional, default=None): Attributes to set on the
+            libkdumpfile context opened by each worker
+
+    Raises:
+        ValueError: The number of threads or pages per run is not positive
+    """
+    def __init__(self, filename: str, threads: int = DEFAULT_READ_THREADS,
+                 page_size: int = 4096,
+                 chunk_pages: int = DEFAULT_CHUNK_PAGES,
+                 attrs: Optional[Dict[str, Any]] = None) -> None:
+        if threads < 1:
+            raise ValueError("at least one read thread is required")
+        if chunk_pages < 1:
+            raise ValueError("runs must contain at least one page")
+
+        self.filename = filename
+        self.threads = threads
+        self.page_size = page_size
+        self.chunk_pages = chunk_pages
+        self.attrs = dict(attrs) if attrs else dict()
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=threads,
+                                            thread_name_prefix='kdump-read')
+
+    @property
+    def chunk_size(self) -> int:
+        """The number of bytes each worker reads at a time"""
+        return self.chunk_pages * self.page_size
+
+    @property
+    def min_pages(self) -> int:
+        """The smallest read, in pages, that is worth splitting"""
+        return self.chunk_pages * 2
+
+    def _context(self) -> kdumpfile:
+        try:
+            return self._local.kdump
+        except AttributeError:
+            pass
+
+        ctx = kdumpfile(file=self.filename)
+        for (name, value) in self.attrs.items():
+            # pylint: disable=unsupported-assignment-operation
+            ctx.attr[name] = value
+        self._local.kdump = ctx
+        return ctx
+
+    def _read_chunk(self, addrspace: int, addr: int, length: int) -> bytes:
+        return self._context().read(addrspace, addr, length)
+
+    def read(self, addrspace: int, addr: int, length: int) -> bytes:
+        """
+        Read a range from the dump, splitting it across the worker threads
+
+        The range is split on run boundaries so each worker decodes whole
+        pages.  If more than one run fails, the exception raised is the
+        one for the lowest address, as it would be for a serial read.
+
+        Args:
+            addrspace: The libkdumpfile address space, e.g.
+                ``KDUMP_KVADDR``
+            addr: The address to start reading at
+            length: The number of bytes to read
+
+        Returns:
+            bytes: The contents of the range
+
+        Raises:
+            kdumpfile.exceptions.EOFException: The range extends beyond
+                the end of the dump
+            addrxlat.exceptions.NoDataError: Part of the range is not
+                present in the dump
+            kdumpfile.exceptions.AddressTranslationException: Part of
+                the range could not be translated
+        """
+        chunk_size = self.chunk_size
+        end = addr + length
+
+        starts: List[int] = [addr]
+        boundary = (addr // chunk_size + 1) * chunk_size
+        while boundary < end:
+            starts.append(boundary)
+            boundary += chunk_size
+
+        if len(starts) == 1:
+            return self._read_chunk(addrspace, addr, length)
+
+        ends = starts[1:] + [end]
+        futures = [self._executor.submit(self._read_chunk, addrspace,
+                                         start, stop - start)
+                   for (start, stop) in zip(starts, ends)]
+
+        try:
+            return b''.join(future.result() for future in futures)
+        finally:
+            # Don't decode the rest of the range if part of it failed
+            for future in futures:
+                future.cancel()
+
+    def close(self) -> None:
+        """Stop the worker threads"""
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+"""
+The kdump.readahead module detects sequential and strided page access
+patterns so the kdumpfile target can decode pages before they are
+requested.
+"""
+
+from typing import List, Optional, Set, Tuple
+
+DEFAULT_READAHEAD_PAGES = 32
+
+# Page runs to prefetch, as (first page number, stride, count)
+Prefetch = Tuple[int, int, int]
+
+class _Stream:
+    __slots__ = ('last', 'stride', 'next', 'window')
+
+    def __init__(self, pagenr: int, window: int) -> None:
+        self.last = pagenr
+        self.stride = 0
+        self.next = pagenr
+        self.window = window
+
+class ReadAhead:
+    """
+    Track page access streams and decide what to prefetch
+
+    A stream is a series of page accesses separated by a constant
+    stride, e.g. a walk through ``mem_map`` or through objects laid
+    out in consecutive pages.  Once a stride has been seen twice in a
+    row, the pages that follow are handed back to the caller to be
+    prefetched.  The prefetch window starts small and doubles each time
+    the stream keeps up with it, up to the maximum window size.
+
+    Args:
+        max_window (optional, default=DEFAULT_READAHEAD_PAGES): The
+            largest number of pages to prefetch at once.  A window of 0
+            disables read-ahead.
+        min_window (optional, default=4): The number of pages prefetched
+            when a stream is first detected
+        max_stride (optional, default=16): The largest distance in pages
+            between accesses that is still considered a stream
+        max_streams (optional, default=4): The number of streams to track
+            at once
+
+    The caller reports each page it actually loads into its cache with
+    :meth:`prefetched`.  Pages of a window that were already cached or
+    could not be read are not counted.
+
+    Attributes:
+        issued (int): The number of pages loaded into the cache by
+            read-ahead
+        used (int): The number of prefetched pages that were later read
+    """
+    def __init__(self, max_window: int = DEFAULT_READAHEAD_PAGES,
+                 min_window: int = 4, max_stride: int = 16,
+                 max_streams: int = 4) -> None:
+        if max_window < 0:
+            raise ValueError("read-ahead window must not be negative")
+        self.max_window = max_window
+        self.min_window = max(1, min_window)
+        self.max_stride = max_stride
+        self.max_streams = max_streams
+        self._streams: List[_Stream] = list()
+        self._pending: Set[int] = set()
+        self._loaded: Set[int] = set()
+        self.issued = 0
+        self.used = 0
+
+    @property
+    def accuracy(self) -> float:
+        """The fraction of prefetched pages that were later read"""
+        if not self.issued:
+            return 0.0
+        return self.used / self.issued
+
+    @property
+    def _initial_window(self) -> int:
+        return min(self.min_window, self.max_window)
+
+    def _find_stream(self, pagenr: int) -> Optional[_Stream]:
+        candidate = None
+        for stream in self._streams:
+            delta = pagenr - stream.last
+            if delta == stream.stride:
+                return stream
+            if candidate is None and 0 < abs(delta) <= self.max_stride:
+                candidate = stream
+        return candidate
+
+    def access(self, pagenr: int, hit: bool = False) -> Optional[Prefetch]:
+        """
+        Record an access to a page
+
+        Args:
+            pagenr: The number of the page being read
+            hit (optional, default=False): Whether the page was already
+                cached.  Cached pages only advance a stream if they were
+                prefetched.
+
+        Returns:
+            (int, int, int): The first page number, stride, and number of
+            pages to prefetch, or None if nothing should be prefetched
+        """
+        if not self.max_window:
+            return None
+
+        if hit:
+            if pagenr in self._loaded:
+                self._loaded.remove(pagenr)
+                self.used += 1
+            if pagenr not in self._pending:
+                return None
+            self._pending.remove(pagenr)
+
+        stream = self._find_stream(pagenr)
+        if stream is None:
+            if len(self._streams) >= self.max_streams:
+                del self._streams[0]
+            self._streams.append(_Stream(pagenr, self._initial_window))
+            return None
+
+        # Keep the most recently used stream at the end
+        self._streams.remove(stream)
+        self._streams.append(stream)
+
+        delta = pagenr - stream.last
+        if delta == 0:
+            return None
+
+        stream.last = pagenr
+        if delta != stream.stride:
+            stream.stride = delta
+            stream.next = pagenr + delta
+            stream.window = self._initial_window
+            return None
+
+        ahead = (stream.next - pagenr) // delta
+        if ahead <= 0:
+            stream.next = pagenr + delta
+            ahead = 1
+        if ahead > stream.window // 2:
+            return None
+
+        start = stream.next
+        count = stream.window
+        if delta < 0:
+            count = min(count, start // -delta + 1)
+        if count <= 0:
+            return None
+
+        stream.next = start + count * delta
+        stream.window = min(stream.window * 2, self.max_window)
+
+        # Forget prefetched pages nobody read rather than grow forever
+        if len(self._pending) > self.max_window * self.max_streams * 4:
+            self._pending.clear()
+            self._loaded.clear()
+        self._pending.update(range(start, stream.next, delta))
+
+        return (start, delta, count)
+
+    def prefetched(self, pagenr: int) -> None:
+        """
+        Record that a page was loaded into the cache by read-ahead
+
+        Args:
+            pagenr: The number of the page
+        """
+        self._loaded.add(pagenr)
+        self.issued += 1
+
+    def resize(self, max_window: int) -> None:
+        """
+        Change the maximum read-ahead window
+
+        Args:
+            max_window: The largest number of pages to prefetch at once.
+                A window of 0 disables read-ahead.
+        """
+        if max_window < 0:
+            raise ValueError("read-ahead window must not be negative")
+        self.max_window = max_window
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """Forget all tracked streams and prefetched pages"""
+        self._streams = list()
+        self._pending = set()
+        self._loaded = set()
+
+    def reset_stats(self) -> None:
+        """Reset the issued and used counters"""
+        self.issued = 0
+        self.used = 0
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+"""
+The kdump.replay module provides a target that serves reads from a
+snapshot recorded with :meth:`kdump.target.Target.start_recording`
+instead of from the original dump.
+"""
+
+from typing import Optional
+
+from kdump.target import Target, MissingPageError
+from kdump.pagecache import DEFAULT_CACHE_PAGES
+from kdump.snapshot import Snapshot, SPACE_PHYS
+
+import gdb
+
+class ReplayTarget(Target):
+    """
+    A target that only serves the pages saved in a snapshot
+
+    Reads of pages that were not read while recording fail as if the
+    pages were missing from the dump.
+
+    Args:
+        debug (optional, default=False): Whether to report failed reads
+        cache_pages (optional, default=DEFAULT_CACHE_PAGES): The number
+            of decompressed pages to keep in memory
+    """
+    _shortname = "kdumpsnapshot"
+    _longname = "Use a crash-python snapshot file as a target"
+
+    def __init__(self, debug: bool = False,
+                 cache_pages: int = DEFAULT_CACHE_PAGES) -> None:
+        self.snapshot: Optional[Snapshot] = None
+        super().__init__(debug=debug, cache_pages=cache_pages,
+                         readahead_pages=0, use_mmap=False, read_threads=1)
+
+    # pylint: disable=unused-argument
+    def open(self, filename: str, from_tty: bool) -> None:
+        if not gdb.objfiles():
+            raise gdb.GdbError("kdumpsnapshot target requires kernel to be already loaded for symbol resolution")
+        try:
+            snapshot = Snapshot(filename)
+        except (OSError, ValueError) as e:
+            raise gdb.GdbError("Failed to open `{}': {}"
+                               .format(filename, str(e)))
+
+        self.snapshot = snapshot
+        # The saved attributes stand in for the dump's, e.g. for the
+        # registers of the active tasks
+        self.kdump = snapshot # type: ignore
+
+        self.page_size = snapshot.page_size
+        self.page_shift = self.page_size.bit_length() - 1
+        endian = str(gdb.execute("show endian", to_string=True))
+        self.byteorder = 'big' if 'big endian' in endian else 'little'
+        self.page_cache.invalidate()
+        self.missing_pages.clear()
+        for pagenr in snapshot.missing:
+            self.missing_pages.add(pagenr)
+        self.phys_cache.invalidate()
+        self.missing_phys_pages.clear()
+        for pagenr in snapshot.missing_phys:
+            self.missing_phys_pages.add(pagenr)
+
+        self._load_kernel()
+
+    def close(self) -> None:
+        super().close()
+        if self.snapshot is not None:
+            self.snapshot.close()
+            self.snapshot = None
+
+    def _read_page(self, pageaddr: int) -> bytes:
+        page = self.page_cache.lookup(pageaddr)
+        if page is None:
+            assert self.snapshot is not None
+            page = self.snapshot.read(pageaddr)
+            if page is None:
+                self.missing_pages.add(pageaddr >> self.page_shift)
+                raise MissingPageError(pageaddr, self.page_size)
+            self.page_cache.insert(pageaddr, page)
+
+        if self.recorder is not None:
+            self.recorder.add(pageaddr, page)
+        return page
+
+    def read_memory(self, addr: int, length: int) -> bytes:
+        """
+        Read kernel virtual memory from the snapshot
+
+        Args:
+            addr: The kernel virtual address to start reading at
+            length: The number of bytes to read
+
+        Returns:
+            bytes: The contents of the requested memory range
+
+        Raises:
+            :obj:`.MissingPageError`: The range contains a page that is
+                not in the snapshot
+        """
+        first = addr >> self.page_shift
+        last = (addr + length - 1) >> self.page_shift
+        if self.missing_pages.check(first, last):
+            raise MissingPageError(addr, length)
+
+        return self._read_cached(addr, length)
+
+    def _read_phys_page(self, pageaddr: int) -> bytes:
+        page = self.phys_cache.lookup(pageaddr)
+        if page is None:
+            assert self.snapshot is not None
+            page = self.snapshot.read(pageaddr, SPACE_PHYS)
+            if page is None:
+                self.missing_phys_pages.add(pageaddr >> self.page_shift)
+                raise MissingPageError(pageaddr, self.page_size)
+            self.phys_cache.insert(pageaddr, page)
+
+        if self.recorder is not None:
+            self.recorder.add(pageaddr, page, SPACE_PHYS)
+        return page
+
+    def _read_phys(self, paddr: int, length: int) -> bytes:
+        first = paddr >> self.page_shift
+        last = (paddr + length - 1) >> self.page_shift
+        if self.missing_phys_pages.check(first, last):
+            raise MissingPageError(paddr, length)
+
+        return self._read_cached(paddr, length, self._read_phys_page)
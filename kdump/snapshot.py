@@ -0,0 +1,349 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+"""
+The kdump.snapshot module stores the pages read during a session in a
+compact file that can be replayed later without the original dump.
+
+A snapshot file starts with a header containing a magic number, the
+format version, the page size, the size of the metadata, and the number
+of pages.  It is followed by the metadata as JSON, an index of
+(address space, page address, offset, compressed length) entries sorted
+by address, and finally the zlib-compressed page contents.  Pages read
+by kernel virtual address and by physical address are kept apart.  The
+metadata holds the dump attributes needed to set up a session, such as
+the vmcoreinfo lines and the registers of each CPU, and the pages that
+were found to be missing from the dump.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import os
+import json
+import mmap
+import zlib
+import struct
+
+_MAGIC = b'CRPYSNP1'
+_VERSION = 2
+_HEADER = struct.Struct('<8sIIQQ')
+_INDEX = struct.Struct('<BQQI')
+
+# Address spaces of the saved pages
+SPACE_KVADDR = 0
+SPACE_PHYS = 1
+
+# The attribute subtrees saved from the dump
+SNAPSHOT_ATTRS = ('arch', 'cpu', 'linux')
+
+AttrValue = Any
+
+class SnapshotFormatError(ValueError):
+    """The file is not a snapshot or is damaged"""
+    _fmt = "{} is not a valid snapshot: {}"
+    def __init__(self, path: str, reason: str) -> None:
+        super().__init__(self._fmt.format(path, reason))
+        self.path = path
+        self.reason = reason
+
+def flatten_attrs(attrs: Any, prefix: str = '') -> Dict[str, AttrValue]:
+    """
+    Flatten a tree of libkdumpfile attributes into dotted names
+
+    Values that cannot be stored as JSON, like address translation
+    objects, are left out.
+
+    Args:
+        attrs: An attribute directory or any other mapping
+        prefix (optional, default=''): The dotted name of the directory
+
+    Returns:
+        dict: The attribute values by full dotted name
+    """
+    flat: Dict[str, AttrValue] = dict()
+    try:
+        items = list(attrs.items())
+    except (AttributeError, KeyError, TypeError, OSError):
+        return flat
+
+    for (name, value) in items:
+        key = f"{prefix}{name}"
+        if hasattr(value, 'items'):
+            flat.update(flatten_attrs(value, key + '.'))
+        elif isinstance(value, (int, float, str)):
+            flat[key] = value
+    return flat
+
+class SnapshotAttrs:
+    """
+    A read-only view of saved attributes that behaves like a libkdumpfile
+    attribute directory
+
+    Both ``attrs['linux.vmcoreinfo.lines.KERNELOFFSET']`` and
+    ``attrs.cpu[0].reg`` style lookups are supported.
+
+    Args:
+        attrs: The attribute values by full dotted name
+        prefix (optional, default=''): The dotted name of this directory
+    """
+    def __init__(self, attrs: Dict[str, AttrValue], prefix: str = '') -> None:
+        self._attrs = attrs
+        self._prefix = prefix
+
+    def __getitem__(self, name: Any) -> Any:
+        key = f"{self._prefix}{name}"
+        try:
+            return self._attrs[key]
+        except KeyError:
+            pass
+
+        key += '.'
+        for attr in self._attrs:
+            if attr.startswith(key):
+                return SnapshotAttrs(self._attrs, key)
+        raise KeyError(key[:-1])
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __contains__(self, name: Any) -> bool:
+        key = f"{self._prefix}{name}"
+        if key in self._attrs:
+            return True
+
+        key += '.'
+        return any(attr.startswith(key) for attr in self._attrs)
+
+    def get(self, name: Any, default: Any = None) -> Any:
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def keys(self) -> List[str]:
+        names: List[str] = list()
+        start = len(self._prefix)
+        for attr in self._attrs:
+            if attr.startswith(self._prefix):
+                name = attr[start:].split('.', 1)[0]
+                if name not in names:
+                    names.append(name)
+        return names
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def items(self) -> List[Tuple[str, Any]]:
+        return [(name, self[name]) for name in self.keys()]
+
+class SnapshotWriter:
+    """
+    Collect pages and write them to a snapshot file
+
+    Args:
+        path: The path of the snapshot file to write
+        page_size: The size of a page in the dump
+        attrs: The dump attributes by full dotted name
+
+    Attributes:
+        missing (set of int): The numbers of virtual pages that were
+            missing from the dump
+        missing_phys (set of int): The numbers of physical pages that
+            were missing from the dump
+    """
+    def __init__(self, path: str, page_size: int,
+                 attrs: Dict[str, AttrValue]) -> None:
+        self.path = path
+        self.page_size = page_size
+        self.attrs = attrs
+        self.missing: Set[int] = set()
+        self.missing_phys: Set[int] = set()
+        self._pages: Dict[Tuple[int, int], bytes] = dict()
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def __contains__(self, pageaddr: int) -> bool:
+        return (SPACE_KVADDR, pageaddr) in self._pages
+
+    def add(self, pageaddr: int, page: bytes,
+            space: int = SPACE_KVADDR) -> None:
+        """
+        Add a page to the snapshot
+
+        Pages already in the snapshot are not compressed again.
+
+        Args:
+            pageaddr: The page-aligned address of the page
+            page: The contents of the page
+            space (optional, default=SPACE_KVADDR): The address space
+                of the page, :data:`SPACE_KVADDR` or :data:`SPACE_PHYS`
+        """
+        key = (space, pageaddr)
+        if key not in self._pages:
+            self._pages[key] = zlib.compress(page)
+
+    def add_missing(self, pagenr: int, space: int = SPACE_KVADDR) -> None:
+        """
+        Record that a page is missing from the dump
+
+        Args:
+            pagenr: The number of the page
+            space (optional, default=SPACE_KVADDR): The address space
+                of the page, :data:`SPACE_KVADDR` or :data:`SPACE_PHYS`
+        """
+        if space == SPACE_PHYS:
+            self.missing_phys.add(pagenr)
+        else:
+            self.missing.add(pagenr)
+
+    def write(self) -> None:
+        """
+        Write the snapshot file
+
+        The file is written under a temporary name and renamed into
+        place, so an existing snapshot is never left half-written.
+
+        Raises:
+            OSError: The file could not be written
+        """
+        meta = json.dumps({'attrs': self.attrs,
+                           'missing': sorted(self.missing),
+                           'missing_phys': sorted(self.missing_phys)})
+
+        keys = sorted(self._pages)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(_HEADER.pack(_MAGIC, _VERSION, self.page_size,
+                                     len(meta), len(keys)))
+                f.write(meta.encode('utf-8'))
+                offset = 0
+                for key in keys:
+                    length = len(self._pages[key])
+                    f.write(_INDEX.pack(key[0], key[1], offset, length))
+                    offset += length
+                for key in keys:
+                    f.write(self._pages[key])
+            os.replace(tmp, self.path)
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+class Snapshot:
+    """
+    A snapshot file opened for replay
+
+    Args:
+        path: The path of the snapshot file
+
+    Attributes:
+        page_size (int): The size of a page in the dump
+        attr (SnapshotAttrs): The saved dump attributes
+        missing (set of int): The numbers of virtual pages that were
+            missing from the dump
+        missing_phys (set of int): The numbers of physical pages that
+            were missing from the dump
+
+    Raises:
+        SnapshotFormatError: The file is not a snapshot
+        OSError: The file could not be opened
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._index: Dict[Tuple[int, int], Tuple[int, int]] = dict()
+        self._mmap: Optional[mmap.mmap] = None
+
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER.size)
+            if len(header) != _HEADER.size:
+                raise SnapshotFormatError(path, "file is too short")
+            (magic, version, page_size, meta_len, count) = \
+                _HEADER.unpack(header)
+            if magic != _MAGIC:
+                raise SnapshotFormatError(path, "bad magic number")
+            if version != _VERSION:
+                raise SnapshotFormatError(path,
+                                          f"unsupported version {version}")
+
+            try:
+                meta = json.loads(f.read(meta_len).decode('utf-8'))
+            except ValueError as e:
+                raise SnapshotFormatError(path, str(e))
+
+            index = f.read(count * _INDEX.size)
+            if len(index) != count * _INDEX.size:
+                raise SnapshotFormatError(path, "index is truncated")
+
+            data_offset = _HEADER.size + meta_len + len(index)
+            for (space, pageaddr, offset, length) in _INDEX.iter_unpack(index):
+                self._index[(space, pageaddr)] = (data_offset + offset, length)
+
+            if count:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.page_size = page_size
+        self.attr = SnapshotAttrs(meta.get('attrs', dict()))
+        self.missing: Set[int] = set(meta.get('missing', list()))
+        self.missing_phys: Set[int] = set(meta.get('missing_phys', list()))
+
+    @staticmethod
+    def is_snapshot(path: str) -> bool:
+        """
+        Returns whether a file is a snapshot
+
+        Args:
+            path: The path to the file
+
+        Returns:
+            bool: Whether the file starts with the snapshot magic number
+        """
+        try:
+            with open(path, 'rb') as f:
+                return f.read(len(_MAGIC)) == _MAGIC
+        except OSError:
+            return False
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, pageaddr: int) -> bool:
+        return (SPACE_KVADDR, pageaddr) in self._index
+
+    def read(self, pageaddr: int,
+             space: int = SPACE_KVADDR) -> Optional[bytes]:
+        """
+        Read a page from the snapshot
+
+        Args:
+            pageaddr: The page-aligned address of the page
+            space (optional, default=SPACE_KVADDR): The address space
+                of the page, :data:`SPACE_KVADDR` or :data:`SPACE_PHYS`
+
+        Returns:
+            bytes: The contents of the page, or None if the page was not
+            recorded
+        """
+        try:
+            (offset, length) = self._index[(space, pageaddr)]
+        except KeyError:
+            return None
+        assert self._mmap is not None
+        return zlib.decompress(self._mmap[offset:offset + length])
+
+    def close(self) -> None:
+        """Release the mapping of the snapshot file"""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._index = dict()
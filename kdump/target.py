@@ -1,31 +1,85 @@
 # -*- coding: utf-8 -*-
 # vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
 
-from typing import Tuple, Callable
+from typing import Tuple, Callable, List, Sequence, Dict, Optional
 
+import os
 import sys
+import time
+import atexit
 
-from kdumpfile import kdumpfile, KDUMP_KVADDR
+from kdumpfile import kdumpfile, KDUMP_KVADDR, KDUMP_KPHYSADDR
 from kdumpfile.exceptions import AddressTranslationException, EOFException
 import addrxlat.exceptions
 
+from kdump.pagecache import PageCache, MissingPageSet, DEFAULT_CACHE_PAGES
+from kdump.readahead import ReadAhead, DEFAULT_READAHEAD_PAGES
+from kdump.mmapcore import MappedCore
+from kdump.diskcache import DiskPageCache, DEFAULT_DISK_CACHE_PAGES
+from kdump.parallel import ParallelReader, DEFAULT_READ_THREADS
+from kdump.iostats import IOProfiler
+from kdump.snapshot import SnapshotWriter, flatten_attrs, SNAPSHOT_ATTRS
+from kdump.snapshot import SPACE_PHYS
+
 import gdb
 
 TargetFetchRegisters = Callable[[gdb.InferiorThread, gdb.Register], None]
 
 PTID = Tuple[int, int, int]
 
+class MissingPageError(LookupError):
+    """The range contains a page already known to be missing from the dump"""
+    _fmt = "{:d} bytes at {:#x} are not available (page previously found missing)"
+    def __init__(self, addr: int, length: int) -> None:
+        super().__init__(self._fmt.format(length, addr))
+        self.addr = addr
+        self.length = length
+
+# The exceptions the read methods raise for memory that is not available
+READ_ERRORS = (EOFException,
+               addrxlat.exceptions.NoDataError, # pylint: disable=no-member
+               AddressTranslationException, MissingPageError)
+
 class Target(gdb.Target):
 
     _fetch_registers: TargetFetchRegisters
 
-    def __init__(self, debug: bool = False) -> None:
+    _shortname = "kdumpfile"
+    _longname = "Use a Linux kernel kdump file as a target"
+
+    def __init__(self, debug: bool = False,
+                 cache_pages: int = DEFAULT_CACHE_PAGES,
+                 readahead_pages: int = DEFAULT_READAHEAD_PAGES,
+                 use_mmap: bool = True,
+                 disk_cache_dir: Optional[str] = None,
+                 disk_cache_pages: int = DEFAULT_DISK_CACHE_PAGES,
+                 read_threads: int = DEFAULT_READ_THREADS,
+                 phys_cache_pages: int = DEFAULT_CACHE_PAGES) -> None:
         super().__init__()
         self.debug = debug
-        self.shortname = "kdumpfile"
-        self.longname = "Use a Linux kernel kdump file as a target"
+        self.shortname = self._shortname
+        self.longname = self._longname
         self.kdump: kdumpfile
         self.base_offset = 0
+        self.page_size = 4096
+        self.page_shift = 12
+        self.byteorder = sys.byteorder
+        self.page_cache = PageCache(cache_pages)
+        self.missing_pages = MissingPageSet()
+        self.phys_cache = PageCache(phys_cache_pages)
+        self.missing_phys_pages = MissingPageSet()
+        self.readahead = ReadAhead(readahead_pages)
+        self.use_mmap = use_mmap
+        self.mapped: Optional[MappedCore] = None
+        if disk_cache_dir is None:
+            disk_cache_dir = os.environ.get('CRASH_PYTHON_PAGE_CACHE')
+        self.disk_cache_dir = disk_cache_dir
+        self.disk_cache_pages = disk_cache_pages
+        self.disk_cache: Optional[DiskPageCache] = None
+        self.read_threads = read_threads
+        self.parallel: Optional[ParallelReader] = None
+        self.iostats = IOProfiler()
+        self.recorder: Optional[SnapshotWriter] = None
 
         self.register()
 
@@ -44,6 +98,25 @@ class Target(gdb.Target):
         # pylint: disable=unsupported-assignment-operation
         self.kdump.attr['addrxlat.ostype'] = 'linux'
 
+        try:
+            # pylint: disable=no-member
+            self.page_size = int(self.kdump.attr.get('arch.page_size', 4096))
+        except (TypeError, ValueError):
+            pass
+        self.page_shift = self.page_size.bit_length() - 1
+        endian = str(gdb.execute("show endian", to_string=True))
+        self.byteorder = 'big' if 'big endian' in endian else 'little'
+        self.page_cache.invalidate()
+        self.missing_pages.clear()
+        self.phys_cache.invalidate()
+        self.missing_phys_pages.clear()
+        self.readahead.invalidate()
+        self._open_mapping(filename)
+        self._open_disk_cache(filename)
+        self._open_parallel(filename)
+        self._load_kernel()
+
+    def _load_kernel(self) -> None:
         KERNELOFFSET = "linux.vmcoreinfo.lines.KERNELOFFSET"
         try:
             attr = self.kdump.attr.get(KERNELOFFSET, "0") # pylint: disable=no-member
@@ -72,38 +145,638 @@ class Target(gdb.Target):
             self.unregister()
         except RuntimeError:
             pass
+        # The pages to write are read back from the page cache
+        self._close_disk_cache()
+        self.page_cache.invalidate()
+        self.missing_pages.clear()
+        self.phys_cache.invalidate()
+        self.missing_phys_pages.clear()
+        self.readahead.invalidate()
+        if self.mapped is not None:
+            self.mapped.close()
+            self.mapped = None
+        self._close_parallel()
+        self._finish_recording()
         del self.kdump
 
+    def start_recording(self, filename: str) -> None:
+        """
+        Start saving every page read from the dump to a snapshot file
+
+        While recording, all reads go through the page cache so that
+        each page is captured, even for dumps that are otherwise served
+        from a mapping of the file.  The snapshot is written when
+        :meth:`stop_recording` is called, the target is closed, or gdb
+        exits.
+
+        Args:
+            filename: The path of the snapshot file to write
+        """
+        self.stop_recording()
+
+        attrs = dict()
+        # pylint: disable=no-member
+        for name in SNAPSHOT_ATTRS:
+            try:
+                attrs.update(flatten_attrs(self.kdump.attr[name], name + '.'))
+            except KeyError:
+                pass
+
+        self.recorder = SnapshotWriter(filename, self.page_size, attrs)
+        # Pages that are already cached must be read again to be captured
+        self.page_cache.invalidate()
+        self.phys_cache.invalidate()
+        # gdb may exit without closing the target
+        atexit.register(self._finish_recording)
+
+    def stop_recording(self) -> int:
+        """
+        Stop recording and write the snapshot file
+
+        Returns:
+            int: The number of pages written, or 0 if not recording
+
+        Raises:
+            OSError: The snapshot file could not be written
+        """
+        recorder = self.recorder
+        if recorder is None:
+            return 0
+
+        self.recorder = None
+        atexit.unregister(self._finish_recording)
+        recorder.write()
+        return len(recorder)
+
+    def _finish_recording(self) -> None:
+        try:
+            self.stop_recording()
+        except OSError as e:
+            print("Failed to write snapshot: {}".format(str(e)),
+                  file=sys.stderr)
+
+    def _check_segment(self, addr: int, data: memoryview) -> bool:
+        try:
+            return self.kdump.read(KDUMP_KVADDR, addr, len(data)) == data
+        # pylint: disable=no-member
+        except (EOFException, addrxlat.exceptions.NoDataError,
+                AddressTranslationException):
+            return False
+
+    def _open_mapping(self, filename: str) -> None:
+        if self.mapped is not None:
+            self.mapped.close()
+            self.mapped = None
+
+        # Only ELF dumps store the pages uncompressed in the file
+        if not self.use_mmap or not MappedCore.is_elf(filename):
+            return
+
+        try:
+            mapped = MappedCore(filename)
+        except (ValueError, OSError) as e:
+            if self.debug:
+                print("Not mapping {}: {}".format(filename, str(e)),
+                      file=sys.stderr)
+            return
+
+        # Make sure the segment addresses agree with libkdumpfile before
+        # trusting them for virtual address reads
+        mapped.vaddr.verify(self._check_segment)
+        self.mapped = mapped
+
+    def _open_disk_cache(self, filename: str) -> None:
+        self._close_disk_cache()
+
+        # Mapped dumps have nothing to decode
+        if self.disk_cache_dir is None or self.mapped is not None:
+            return
+
+        # pylint: disable=no-member
+        attr = self.kdump.attr
+        identity = attr.get('linux.vmcoreinfo.lines.BUILD-ID', '')
+        if not identity:
+            identity = "{}:{}".format(
+                attr.get('linux.vmcoreinfo.lines.OSRELEASE', ''),
+                attr.get('linux.vmcoreinfo.lines.CRASHTIME', ''))
+
+        try:
+            self.disk_cache = DiskPageCache.for_dump(self.disk_cache_dir,
+                                                     filename, str(identity),
+                                                     self.page_size,
+                                                     self.disk_cache_pages)
+        except OSError as e:
+            print("Not using page cache in {}: {}"
+                  .format(self.disk_cache_dir, str(e)), file=sys.stderr)
+            return
+
+        # gdb may exit without closing the target
+        atexit.register(self._flush_disk_cache)
+
+    def _flush_disk_cache(self) -> None:
+        if self.disk_cache is None:
+            return
+        try:
+            self.disk_cache.flush(self._disk_cache_page)
+        except OSError as e:
+            print("Failed to write page cache {}: {}"
+                  .format(self.disk_cache.path, str(e)), file=sys.stderr)
+
+    def _disk_cache_page(self, pageaddr: int) -> Optional[bytes]:
+        # Pages still in the page cache don't have to be decoded again
+        page = self.page_cache.lookup(pageaddr)
+        if page is not None:
+            return page
+        try:
+            return self.kdump.read(KDUMP_KVADDR, pageaddr, self.page_size)
+        except READ_ERRORS:
+            return None
+
+    def _close_disk_cache(self) -> None:
+        if self.disk_cache is None:
+            return
+        self._flush_disk_cache()
+        self.disk_cache.close()
+        self.disk_cache = None
+        atexit.unregister(self._flush_disk_cache)
+
+    def _open_parallel(self, filename: str) -> None:
+        self._close_parallel()
+
+        # Mapped dumps have nothing to decode
+        if self.read_threads < 2 or self.mapped is not None:
+            return
+
+        self.parallel = ParallelReader(filename, self.read_threads,
+                                       self.page_size,
+                                       attrs={'addrxlat.ostype': 'linux'})
+
+    def _close_parallel(self) -> None:
+        if self.parallel is not None:
+            self.parallel.close()
+            self.parallel = None
+
     @classmethod
     def report_error(cls, addr: int, length: int, error: Exception) -> None:
         print("Error while reading {:d} bytes from {:#x}: {}"
               .format(length, addr, str(error)),
               file=sys.stderr)
 
+    def _decode_page(self, pageaddr: int) -> bytes:
+        page = None
+        if self.disk_cache is not None:
+            page = self.disk_cache.lookup(pageaddr)
+        if page is None:
+            page = self.kdump.read(KDUMP_KVADDR, pageaddr, self.page_size)
+            if self.disk_cache is not None:
+                self.disk_cache.record(pageaddr)
+        return page
+
+    def _decode_run(self, pageaddr: int, count: int) -> bool:
+        try:
+            buf = self.kdump.read(KDUMP_KVADDR, pageaddr,
+                                  count << self.page_shift)
+        # pylint: disable=no-member
+        except (EOFException, addrxlat.exceptions.NoDataError,
+                AddressTranslationException):
+            return False
+
+        for i in range(count):
+            start = i << self.page_shift
+            page = buf[start:start + self.page_size]
+            self.page_cache.insert(pageaddr + start, page)
+            self.readahead.prefetched((pageaddr + start) >> self.page_shift)
+            if self.disk_cache is not None:
+                self.disk_cache.record(pageaddr + start)
+        return True
+
+    def _prefetch_run(self, pagenr: int, count: int) -> bool:
+        pageaddr = pagenr << self.page_shift
+
+        # Pages that are already cached or in the disk cache are not
+        # decoded again; only the runs of pages between them are read
+        first = 0
+        for i in range(count + 1):
+            if i < count:
+                addr = pageaddr + (i << self.page_shift)
+                if addr not in self.page_cache:
+                    if self.disk_cache is None:
+                        continue
+                    page = self.disk_cache.lookup(addr)
+                    if page is None:
+                        continue
+                    self.page_cache.insert(addr, page)
+                    self.readahead.prefetched(pagenr + i)
+
+            if i > first:
+                if not self._decode_run(pageaddr + (first << self.page_shift),
+                                        i - first):
+                    return False
+            first = i + 1
+        return True
+
+    def _prefetch(self, pagenr: int, stride: int, count: int) -> None:
+        # Never let read-ahead push out most of what is cached
+        count = min(count, self.page_cache.capacity // 4)
+
+        # Sequential runs are read with a single call when possible
+        if stride == 1 and count > 1:
+            if self._prefetch_run(pagenr, count):
+                return
+
+        for i in range(count):
+            nr = pagenr + i * stride
+            pageaddr = nr << self.page_shift
+            if pageaddr in self.page_cache or nr in self.missing_pages:
+                continue
+            try:
+                page = self._decode_page(pageaddr)
+            # pylint: disable=no-member
+            except (addrxlat.exceptions.NoDataError,
+                    AddressTranslationException):
+                self.missing_pages.add(nr)
+                continue
+            except EOFException:
+                break
+            self.page_cache.insert(pageaddr, page)
+            self.readahead.prefetched(nr)
+
+    def _read_page(self, pageaddr: int) -> bytes:
+        page = self.page_cache.lookup(pageaddr)
+        if page is not None:
+            if self.recorder is not None:
+                self.recorder.add(pageaddr, page)
+            if self.readahead.max_window:
+                prefetch = self.readahead.access(pageaddr >> self.page_shift,
+                                                 hit=True)
+                if prefetch is not None:
+                    self._prefetch(*prefetch)
+            return page
+
+        try:
+            page = self._decode_page(pageaddr)
+        # pylint: disable=no-member
+        except (addrxlat.exceptions.NoDataError,
+                AddressTranslationException):
+            # Translation and filtering both work on whole pages
+            self.missing_pages.add(pageaddr >> self.page_shift)
+            if self.recorder is not None:
+                self.recorder.add_missing(pageaddr >> self.page_shift)
+            raise
+        self.page_cache.insert(pageaddr, page)
+        if self.recorder is not None:
+            self.recorder.add(pageaddr, page)
+
+        if self.readahead.max_window:
+            prefetch = self.readahead.access(pageaddr >> self.page_shift)
+            if prefetch is not None:
+                self._prefetch(*prefetch)
+        return page
+
+    def _read_cached(self, addr: int, length: int,
+                     read_page: Optional[Callable[[int], bytes]] = None
+                    ) -> bytes:
+        if read_page is None:
+            read_page = self._read_page
+
+        pageaddr = addr & ~(self.page_size - 1)
+        start = addr - pageaddr
+
+        # Most reads are for a few bytes within a single page
+        if start + length <= self.page_size:
+            return read_page(pageaddr)[start:start + length]
+
+        chunks: List[bytes] = []
+        end = addr + length
+        while pageaddr < end:
+            page = read_page(pageaddr)
+            chunks.append(page[start:min(self.page_size, end - pageaddr)])
+            pageaddr += self.page_size
+            start = 0
+
+        return b''.join(chunks)
+
+    def read_memory(self, addr: int, length: int) -> bytes:
+        """
+        Read kernel virtual memory from the dump
+
+        Reads from ELF dumps are served from the mapped file when
+        possible.  Large reads from compressed dumps are split into runs
+        of pages that are decoded on several threads.  Small reads are
+        served from the page cache.  Reads that would displace a large
+        part of the cache go to libkdumpfile directly.  Reads touching a
+        page that has already failed to read fail immediately without
+        calling into libkdumpfile.
+
+        Pages decoded through the page cache, including the ones read
+        ahead, are shared with other sessions through the persistent
+        page cache if one is open.  Reads decoded on several threads or
+        going to libkdumpfile directly don't use it, so that a single
+        large scan doesn't push out the pages that are shared.
+
+        Args:
+            addr: The kernel virtual address to start reading at
+            length: The number of bytes to read
+
+        Returns:
+            bytes: The contents of the requested memory range
+
+        Raises:
+            kdumpfile.exceptions.EOFException: The range extends beyond
+                the end of the dump
+            addrxlat.exceptions.NoDataError: The range is not
+                present in the dump
+            kdumpfile.exceptions.AddressTranslationException: The range
+                could not be translated
+            :obj:`.MissingPageError`: The range contains a page that
+                is already known to be unavailable
+        """
+        if self.mapped is not None and self.recorder is None:
+            view = self.mapped.vaddr.view(addr, length)
+            if view is not None:
+                return view.tobytes()
+
+        first = addr >> self.page_shift
+        last = (addr + length - 1) >> self.page_shift
+        if self.missing_pages.check(first, last):
+            raise MissingPageError(addr, length)
+
+        # Every page has to pass through the recorder
+        if self.recorder is not None:
+            return self._read_cached(addr, length)
+
+        if self.parallel is not None and \
+           last - first >= self.parallel.min_pages:
+            return self.parallel.read(KDUMP_KVADDR, addr, length)
+
+        if last - first < self.page_cache.capacity // 2:
+            try:
+                return self._read_cached(addr, length)
+            except EOFException:
+                # The last page of a truncated dump may be only partially
+                # readable; the exact range may still be available.
+                pass
+
+        try:
+            return self.kdump.read(KDUMP_KVADDR, addr, length)
+        # pylint: disable=no-member
+        except (addrxlat.exceptions.NoDataError, AddressTranslationException):
+            if first == last:
+                self.missing_pages.add(first)
+            raise
+
+    def _read_phys_page(self, pageaddr: int) -> bytes:
+        page = self.phys_cache.lookup(pageaddr)
+        if page is None:
+            try:
+                page = self.kdump.read(KDUMP_KPHYSADDR, pageaddr,
+                                       self.page_size)
+            # pylint: disable=no-member
+            except (addrxlat.exceptions.NoDataError,
+                    AddressTranslationException):
+                self.missing_phys_pages.add(pageaddr >> self.page_shift)
+                if self.recorder is not None:
+                    self.recorder.add_missing(pageaddr >> self.page_shift,
+                                              SPACE_PHYS)
+                raise
+            self.phys_cache.insert(pageaddr, page)
+
+        if self.recorder is not None:
+            self.recorder.add(pageaddr, page, SPACE_PHYS)
+        return page
+
+    def _read_phys(self, paddr: int, length: int) -> bytes:
+        if self.mapped is not None and self.recorder is None:
+            view = self.mapped.paddr.view(paddr, length)
+            if view is not None:
+                return view.tobytes()
+
+        first = paddr >> self.page_shift
+        last = (paddr + length - 1) >> self.page_shift
+        if self.missing_phys_pages.check(first, last):
+            raise MissingPageError(paddr, length)
+
+        if self.recorder is not None:
+            return self._read_cached(paddr, length, self._read_phys_page)
+
+        if self.parallel is not None and \
+           last - first >= self.parallel.min_pages:
+            return self.parallel.read(KDUMP_KPHYSADDR, paddr, length)
+
+        if last - first < self.phys_cache.capacity // 2:
+            try:
+                return self._read_cached(paddr, length, self._read_phys_page)
+            except EOFException:
+                pass
+
+        try:
+            return self.kdump.read(KDUMP_KPHYSADDR, paddr, length)
+        # pylint: disable=no-member
+        except (addrxlat.exceptions.NoDataError, AddressTranslationException):
+            if first == last:
+                self.missing_phys_pages.add(first)
+            raise
+
+    def read_phys(self, paddr: int, length: int) -> bytes:
+        """
+        Read physical memory from the dump
+
+        Physical reads skip the translation from kernel virtual
+        addresses and use a page cache of their own.  Reads from ELF
+        dumps are served from the mapped file when possible, and large
+        reads from compressed dumps are decoded on several threads.
+
+        Args:
+            paddr: The physical address to start reading at
+            length: The number of bytes to read
+
+        Returns:
+            bytes: The contents of the requested memory range
+
+        Raises:
+            kdumpfile.exceptions.EOFException: The range extends beyond
+                the end of the dump
+            addrxlat.exceptions.NoDataError: The range is not
+                present in the dump
+            :obj:`.MissingPageError`: The range contains a page that
+                is already known to be unavailable
+        """
+        iostats = self.iostats
+        if not iostats.enabled:
+            return self._read_phys(paddr, length)
+
+        hits = self.phys_cache.hits
+        misses = self.phys_cache.misses
+        start = time.perf_counter()
+        try:
+            return self._read_phys(paddr, length)
+        finally:
+            iostats.record(length, time.perf_counter() - start,
+                           self.phys_cache.hits - hits,
+                           self.phys_cache.misses - misses)
+
+    def read_pfn_range(self, start_pfn: int, count: int) -> bytes:
+        """
+        Read a run of physical pages from the dump
+
+        Args:
+            start_pfn: The number of the first page frame
+            count: The number of page frames to read
+
+        Returns:
+            bytes: The contents of the pages
+
+        Raises:
+            kdumpfile.exceptions.EOFException: The range extends beyond
+                the end of the dump
+            addrxlat.exceptions.NoDataError: The range is not
+                present in the dump
+            :obj:`.MissingPageError`: The range contains a page that
+                is already known to be unavailable
+        """
+        return self.read_phys(start_pfn << self.page_shift,
+                              count << self.page_shift)
+
+    def _read_batched(self, addr: int, length: int,
+                      pages: Dict[int, Optional[bytes]]) -> Optional[bytes]:
+        pageaddr = addr & ~(self.page_size - 1)
+        start = addr - pageaddr
+        end = addr + length
+
+        chunks: List[bytes] = []
+        while pageaddr < end:
+            try:
+                page = pages[pageaddr]
+            except KeyError:
+                page = None
+                if (pageaddr >> self.page_shift) not in self.missing_pages:
+                    try:
+                        page = self._read_page(pageaddr)
+                    # pylint: disable=no-member
+                    except (EOFException, addrxlat.exceptions.NoDataError,
+                            AddressTranslationException, MissingPageError):
+                        pass
+                pages[pageaddr] = page
+
+            if page is None:
+                return None
+
+            chunks.append(page[start:min(self.page_size, end - pageaddr)])
+            pageaddr += self.page_size
+            start = 0
+
+        if len(chunks) == 1:
+            return chunks[0]
+        return b''.join(chunks)
+
+    def read_scatter(self, ranges: Sequence[Tuple[int, int]]
+                    ) -> List[Optional[bytes]]:
+        """
+        Read many small ranges of kernel virtual memory in one call
+
+        The ranges are visited in address order so that every page is
+        decoded at most once per call, regardless of the state of the
+        page cache.  A range that cannot be read does not prevent the
+        others from being read.
+
+        Args:
+            ranges: A sequence of (address, length) pairs to read
+
+        Returns:
+            list of bytes: The contents of each range, in the order
+            requested.  Ranges that could not be read are returned as
+            None.
+        """
+        iostats = self.iostats
+        if not iostats.enabled:
+            return self._read_scatter(ranges)
+
+        hits = self.page_cache.hits
+        misses = self.page_cache.misses
+        start = time.perf_counter()
+        try:
+            return self._read_scatter(ranges)
+        finally:
+            iostats.record(sum(length for (addr, length) in ranges),
+                           time.perf_counter() - start,
+                           self.page_cache.hits - hits,
+                           self.page_cache.misses - misses)
+
+    def _read_scatter(self, ranges: Sequence[Tuple[int, int]]
+                     ) -> List[Optional[bytes]]:
+        results: List[Optional[bytes]] = [None] * len(ranges)
+        pages: Dict[int, Optional[bytes]] = dict()
+
+        for i in sorted(range(len(ranges)), key=lambda i: ranges[i][0]):
+            (addr, length) = ranges[i]
+            if self.mapped is not None and self.recorder is None:
+                view = self.mapped.vaddr.view(addr, length)
+                if view is not None:
+                    results[i] = view.tobytes()
+                    continue
+
+            data = self._read_batched(addr, length, pages)
+            if data is None:
+                # A page at the end of a truncated dump may still hold
+                # the part we need.
+                try:
+                    data = self.read_memory(addr, length)
+                # pylint: disable=no-member
+                except (EOFException, addrxlat.exceptions.NoDataError,
+                        AddressTranslationException, MissingPageError) as e:
+                    if self.iostats.enabled:
+                        self.iostats.error(e)
+            results[i] = data
+
+        return results
+
+    def _xfer_error(self, addr: int, length: int, error: Exception) -> None:
+        if self.debug:
+            self.report_error(addr, length, error)
+        if self.iostats.enabled:
+            self.iostats.error(error)
+
+    def _xfer_memory(self, readbuf: bytearray, offset: int, ln: int) -> int:
+        if self.mapped is not None and self.recorder is None:
+            view = self.mapped.vaddr.view(offset, ln)
+            if view is not None:
+                readbuf[:] = view
+                return ln
+        try:
+            readbuf[:] = self.read_memory(offset, ln)
+        except EOFException as e:
+            self._xfer_error(offset, ln, e)
+            raise gdb.TargetXferEOF(str(e))
+        except addrxlat.exceptions.NoDataError as e: # pylint: disable=no-member
+            self._xfer_error(offset, ln, e)
+            raise gdb.TargetXferUnavailable(str(e))
+        except AddressTranslationException as e:
+            self._xfer_error(offset, ln, e)
+            raise gdb.TargetXferUnavailable(str(e))
+        except MissingPageError as e:
+            self._xfer_error(offset, ln, e)
+            raise gdb.TargetXferUnavailable(str(e))
+        return ln
+
     # pylint: disable=unused-argument
     def xfer_partial(self, obj: int, annex: str, readbuf: bytearray,
                      writebuf: bytearray, offset: int, ln: int) -> int:
-        ret = -1
-        if obj == self.TARGET_OBJECT_MEMORY:
-            try:
-                r = self.kdump.read(KDUMP_KVADDR, offset, ln)
-                readbuf[:] = r
-                ret = ln
-            except EOFException as e:
-                if self.debug:
-                    self.report_error(offset, ln, e)
-                raise gdb.TargetXferEOF(str(e))
-            except addrxlat.exceptions.NoDataError as e: # pylint: disable=no-member
-                if self.debug:
-                    self.report_error(offset, ln, e)
-                raise gdb.TargetXferUnavailable(str(e))
-            except AddressTranslationException as e:
-                if self.debug:
-                    self.report_error(offset, ln, e)
-                raise gdb.TargetXferUnavailable(str(e))
-        else:
+        if obj != self.TARGET_OBJECT_MEMORY:
             raise IOError("Unknown obj type")
-        return ret
+
+        iostats = self.iostats
+        if not iostats.enabled:
+            return self._xfer_memory(readbuf, offset, ln)
+
+        hits = self.page_cache.hits
+        misses = self.page_cache.misses
+        start = time.perf_counter()
+        try:
+            return self._xfer_memory(readbuf, offset, ln)
+        finally:
+            iostats.record(ln, time.perf_counter() - start,
+                           self.page_cache.hits - hits,
+                           self.page_cache.misses - misses)
 
     # pylint: disable=unused-argument
     def thread_alive(self, ptid: PTID) -> bool:
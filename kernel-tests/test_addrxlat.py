@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+import unittest
+import gdb
+
+import addrxlat
+
+from crash.addrxlat import get_translation, TranslationContext
+
+class TestAddressTranslation(unittest.TestCase):
+    def setUp(self):
+        self.trans = get_translation()
+        self.trans.invalidate()
+        self.addr = int(gdb.lookup_symbol('modules', None)[0].value().address)
+
+    def conv(self, addr):
+        fulladdr = addrxlat.FullAddress(addrxlat.KVADDR, addr)
+        fulladdr.conv(addrxlat.KPHYSADDR, self.trans.context,
+                      self.trans.system)
+        return fulladdr.addr
+
+    def test_singleton(self):
+        self.assertTrue(get_translation() is self.trans)
+
+    def test_translate(self):
+        self.assertEqual(self.trans.translate(self.addr), self.conv(self.addr))
+
+    def test_cached(self):
+        self.trans.translate(self.addr)
+        misses = self.trans.misses
+        for offset in range(0, 4096, 8):
+            addr = (self.addr & ~4095) + offset
+            self.assertEqual(self.trans.translate(addr), self.conv(addr))
+        self.assertEqual(self.trans.misses, misses)
+
+    def test_translate_many(self):
+        addrs = [self.addr + i * 4096 for i in range(16)]
+        result = self.trans.translate_many(addrs)
+        self.assertEqual(result, [self.conv(addr) for addr in addrs])
+
+    def test_cached_context(self):
+        self.assertIsInstance(self.trans.context, TranslationContext)
+
+    def test_matches_kdumpfile(self):
+        kdump = self.trans.target.kdump
+        fulladdr = addrxlat.FullAddress(addrxlat.KVADDR, self.addr)
+        fulladdr.conv(addrxlat.KPHYSADDR, kdump.get_addrxlat_ctx(),
+                      kdump.get_addrxlat_sys())
+        self.assertEqual(self.trans.translate(self.addr), fulladdr.addr)
+
+    def test_not_translated(self):
+        result = self.trans.translate_many([0])
+        self.assertIsNone(result[0])
+
+class TestTranslationContext(unittest.TestCase):
+    def setUp(self):
+        self.ctx = TranslationContext()
+        self.addr = int(gdb.lookup_symbol('modules', None)[0].value().address)
+
+    def read_gdb(self, addr, typename):
+        ptype = gdb.lookup_type(typename).pointer()
+        return int(gdb.Value(addr).cast(ptype).dereference())
+
+    def test_read64(self):
+        for offset in range(0, 64, 8):
+            faddr = addrxlat.FullAddress(addrxlat.KVADDR, self.addr + offset)
+            self.assertEqual(self.ctx.cb_read64(faddr),
+                             self.read_gdb(self.addr + offset, 'unsigned long'))
+
+    def test_read32(self):
+        faddr = addrxlat.FullAddress(addrxlat.KVADDR, self.addr + 4)
+        self.assertEqual(self.ctx.cb_read32(faddr),
+                         self.read_gdb(self.addr + 4, 'unsigned int'))
+
+    def test_read_phys(self):
+        phys = get_translation().translate(self.addr)
+        faddr = addrxlat.FullAddress(addrxlat.KPHYSADDR, phys)
+        self.assertEqual(self.ctx.cb_read64(faddr),
+                         self.read_gdb(self.addr, 'unsigned long'))
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+import unittest
+import io
+import sys
+
+from crash.commands.iostat import IOStatCommand
+from crash.commands.lsmod import ModuleCommand
+
+class TestCommandsIOStat(unittest.TestCase):
+    def setUp(self):
+        self.stdout = sys.stdout
+        sys.stdout = io.StringIO()
+        IOStatCommand().invoke("--on")
+
+    def tearDown(self):
+        IOStatCommand().invoke("--off")
+        sys.stdout = self.stdout
+
+    def output(self):
+        return sys.stdout.getvalue()
+
+    def test_iostat(self):
+        ModuleCommand().invoke("")
+        IOStatCommand().invoke("")
+        output = self.output()
+        self.assertTrue("pylsmod" in output)
+
+    def test_iostat_select(self):
+        ModuleCommand().invoke("")
+        IOStatCommand().invoke("-l -e lsmod")
+        output = self.output()
+        self.assertTrue("pylsmod: read latency" in output)
+
+    def test_iostat_reset(self):
+        ModuleCommand().invoke("")
+        IOStatCommand().invoke("-r")
+        sys.stdout = io.StringIO()
+        IOStatCommand().invoke("lsmod")
+        output = self.output()
+        self.assertTrue("No statistics for lsmod" in output)
+
+    def test_iostat_off(self):
+        IOStatCommand().invoke("--off")
+        IOStatCommand().invoke("-r")
+        ModuleCommand().invoke("")
+        IOStatCommand().invoke("--on")
+        sys.stdout = io.StringIO()
+        IOStatCommand().invoke("lsmod")
+        output = self.output()
+        self.assertTrue("No statistics for lsmod" in output)
@@ -1,15 +1,18 @@
 # -*- coding: utf-8 -*-
 # vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
 import unittest
-import gdb
 import io
+import json
+import os
 import sys
 
 from decorators import skip_without_symbol
 from decorators import skip_with_symbol
 
-from crash.commands.kmem import KmemCommand
+from crash.commands.kmem import KmemCommand, check_kmem_cache
+from crash.parallel import run_parallel
 from crash.commands import CommandLineError, CommandError
+from crash.types.pagestats import HAVE_NUMPY
 
 class TestCommandsKmem(unittest.TestCase):
     def setUp(self):
@@ -50,6 +53,52 @@ class TestCommandsKmem(unittest.TestCase):
         with self.assertRaises(CommandError):
             self.command.invoke_uncaught("-s unknown_cache")
 
+    def test_kmem_s_json(self):
+        """`kmem -s inode_cache -o json' prints one finding per line"""
+        self.command.invoke_uncaught("-s inode_cache -o json")
+        lines = self.output().splitlines()
+        self.assertTrue(len(lines) > 0)
+        for line in lines:
+            finding = json.loads(line)
+            self.assertEqual(finding['cache'], 'inode_cache')
+            self.assertIn('kind', finding)
+
+    def test_kmem_json_without_s(self):
+        """`kmem -o json' raises CommandLineError"""
+        with self.assertRaises(CommandLineError):
+            self.command.invoke_uncaught("-z -o json")
+
+    def test_kmem_s_workers_invalid(self):
+        """`kmem -s -j 0' raises CommandLineError"""
+        with self.assertRaises(CommandLineError):
+            self.command.invoke_uncaught("-s -j 0")
+
+    def test_kmem_s_workers_one_cache(self):
+        """`kmem -s inode_cache -j 2' raises CommandLineError"""
+        with self.assertRaises(CommandLineError):
+            self.command.invoke_uncaught("-s inode_cache -j 2")
+
+    def test_kmem_s_workers_small(self):
+        """Worker sessions report the same findings for a cache"""
+        if not os.environ.get('CRASH_PYTHON_GDBINIT'):
+            self.skipTest("not running in a session started by pycrash")
+        serial = check_kmem_cache('inode_cache')
+        found = run_parallel('crash.commands.kmem:check_kmem_cache',
+                             ['inode_cache', 'inode_cache'], 2)
+        self.assertEqual(found, [serial, serial])
+
+    @unittest.skipUnless(os.environ.get('CRASH_PYTHON_SLOW_TESTS'),
+                         "takes a huge amount of time on a real core")
+    def test_kmem_s_workers(self):
+        """`kmem -s -j 2' produces the same output as `kmem -s'"""
+        if not os.environ.get('CRASH_PYTHON_GDBINIT'):
+            self.skipTest("not running in a session started by pycrash")
+        self.command.invoke_uncaught("-s")
+        serial = self.output()
+        sys.stdout = io.StringIO()
+        self.command.invoke_uncaught("-s -j 2")
+        self.assertEqual(self.output(), serial)
+
     def test_kmem_sz(self):
         """`kmem -s -z' raises CommandLineError"""
         with self.assertRaises(CommandLineError):
@@ -109,6 +158,25 @@ class TestCommandsKmem(unittest.TestCase):
         with self.assertRaises(CommandLineError):
             self.command.invoke_uncaught("-V invalid")
 
+    @unittest.skipUnless(HAVE_NUMPY, "NumPy is not available")
+    def test_kmem_p(self):
+        """`kmem -p' produces valid output"""
+        self.command.invoke_uncaught("-p")
+        output = self.output()
+        self.assertTrue("PG_slab" in output)
+        self.assertTrue("NODE" in output)
+
+    @unittest.skipIf(HAVE_NUMPY, "NumPy is available")
+    def test_kmem_p_without_numpy(self):
+        """`kmem -p' raises CommandError without NumPy"""
+        with self.assertRaises(CommandError):
+            self.command.invoke_uncaught("-p")
+
+    def test_kmem_pz(self):
+        """`kmem -p -z' raises CommandLineError"""
+        with self.assertRaises(CommandLineError):
+            self.command.invoke_uncaught("-p -z")
+
     def test_kmem_vz(self):
         """`kmem -V -z' raises CommandLineError"""
         with self.assertRaises(CommandLineError):
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+import unittest
+import gdb
+import io
+import sys
+
+from decorators import bad_command_line
+
+from crash.commands.ptov import PTOVCommand
+from crash.addrxlat import get_translation
+from crash.reversemap import get_reverse_map, SOURCE_DIRECT
+
+class TestCommandsPTOV(unittest.TestCase):
+    def setUp(self):
+        self.stdout = sys.stdout
+        self.redirected = io.StringIO()
+        sys.stdout = self.redirected
+        self.command = PTOVCommand()
+        addr = int(gdb.lookup_symbol('modules', None)[0].value().address)
+        self.phys = get_translation().translate(addr)
+
+    def tearDown(self):
+        sys.stdout = self.stdout
+
+    def output(self):
+        return self.redirected.getvalue()
+
+    @bad_command_line
+    def test_ptov_empty(self):
+        """Test `ptov`"""
+        self.command.invoke_uncaught("")
+
+    @bad_command_line
+    def test_ptov_symname(self):
+        """Test `ptov <symname>`"""
+        self.command.invoke_uncaught("modules")
+
+    def test_ptov_addr(self):
+        """Test `ptov <addr>`"""
+        self.command.invoke_uncaught(f"{self.phys:x}")
+        self.assertTrue(SOURCE_DIRECT in self.output())
+
+    def test_ptov_roundtrip(self):
+        """Test that ptov results translate back"""
+        self.command.invoke_uncaught(f"-p 1 {self.phys:x}")
+        trans = get_translation()
+        mappings = get_reverse_map().lookup(self.phys)
+        self.assertTrue(len(mappings) > 0)
+        for (vaddr, source, pid) in mappings:
+            if pid is None:
+                self.assertEqual(trans.translate(vaddr), self.phys)
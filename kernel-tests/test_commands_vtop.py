@@ -3,12 +3,16 @@
 import unittest
 import gdb
 import io
+import os
 import sys
+import json
+import tempfile
 
-from decorators import bad_command_line, unimplemented
+from decorators import bad_command_line
 
 from crash.commands.vtop import VTOPCommand
 from crash.commands import CommandError, CommandLineError
+from crash.addrxlat import get_translation
 from crash.exceptions import DelayedAttributeError
 
 class TestCommandsVTOP(unittest.TestCase):
@@ -59,7 +63,90 @@ class TestCommandsVTOP(unittest.TestCase):
         """`Test vtop -k -u <addr>`"""
         self.command.invoke_uncaught(f"-k -u {self.addr:#x}")
         
-    @unimplemented
     def test_vtop_addr_c(self):
         """Test `vtop -c <addr>`"""
         self.command.invoke_uncaught(f"-c {self.addr:#x}")
+        self.assertTrue(self.output_lines() > 0)
+
+    def test_vtop_pid_addr_c(self):
+        """Test `vtop -c 1 <addr>`"""
+        self.command.invoke_uncaught(f"-c 1 {self.addr:#x}")
+        phys = get_translation().translate(self.addr)
+        self.assertTrue(f"{phys:x}" in self.output())
+
+    @bad_command_line
+    def test_vtop_bad_task_c(self):
+        """Test `vtop -c <symname> <addr>`"""
+        self.command.invoke_uncaught(f"-c modules {self.addr:#x}")
+
+    @bad_command_line
+    def test_vtop_addr_c_u(self):
+        """Test `vtop -c -u 1 <addr>`"""
+        self.command.invoke_uncaught(f"-c -u 1 {self.addr:#x}")
+
+    def test_vtop_kernel_thread_c(self):
+        """Test `vtop -c 2 <addr>`"""
+        self.command.invoke_uncaught(f"-c 2 {self.addr:#x}")
+        self.assertTrue("KERNEL THREAD" in self.output())
+        self.assertFalse("PAGE DIRECTORY: 0\n" in self.output())
+        phys = get_translation().translate(self.addr)
+        self.assertTrue(f"{phys:x}" in self.output())
+
+    def test_vtop_mappings(self):
+        """Test `vtop -c 1 -m`"""
+        self.command.invoke_uncaught("-c 1 -m")
+        lines = self.output().splitlines()[2:]
+        self.assertTrue(len(lines) > 0)
+        last = 0
+        for line in lines:
+            (vstart, vend, pstart, pend) = [int(field, 16)
+                                            for field in line.split()[:4]]
+            self.assertTrue(last <= vstart < vend)
+            self.assertEqual(vend - vstart, pend - pstart)
+            last = vend
+
+    def test_vtop_batch_file(self):
+        """Test `vtop -f <file>`"""
+        addrs = [self.addr + 4096, self.addr]
+        with tempfile.NamedTemporaryFile('w', delete=False) as f:
+            f.write("# addresses\n")
+            f.write(" ".join(f"{addr:x}" for addr in addrs) + "\n")
+        try:
+            self.command.invoke_uncaught(f"-f {f.name}")
+        finally:
+            os.unlink(f.name)
+
+        lines = self.output().splitlines()
+        self.assertEqual(len(lines), 3)
+        trans = get_translation()
+        for (addr, line) in zip(sorted(addrs), lines[1:]):
+            fields = line.split("\t")
+            self.assertEqual(int(fields[0], 16), addr)
+            self.assertEqual(int(fields[1], 16), trans.translate(addr))
+
+    def test_vtop_batch_json(self):
+        """Test `vtop -o json <addr>`"""
+        self.command.invoke_uncaught(f"-o json {self.addr:#x} 0")
+        lines = self.output().splitlines()
+        self.assertEqual(len(lines), 2)
+        unmapped = json.loads(lines[0])
+        self.assertIsNone(unmapped['physical'])
+        entry = json.loads(lines[1])
+        self.assertEqual(int(entry['physical'], 16),
+                         get_translation().translate(self.addr))
+
+    def test_vtop_batch_duplicates(self):
+        """Test `vtop -o tsv <addr> <addr>`"""
+        self.command.invoke_uncaught(f"-o tsv {self.addr:#x} {self.addr:x}")
+        lines = self.output().splitlines()
+        self.assertEqual(len(lines), 2)
+
+    @bad_command_line
+    def test_vtop_batch_bad_address(self):
+        """Test `vtop -o tsv <symname>`"""
+        self.command.invoke_uncaught("-o tsv modules")
+
+    @bad_command_line
+    def test_vtop_batch_user(self):
+        """Test `vtop -u -o tsv <addr>`"""
+        self.command.invoke_uncaught(f"-u -o tsv {self.addr:#x}")
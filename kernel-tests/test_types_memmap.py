@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+import unittest
+
+from crash.types.page import Page
+from crash.types.memmap import MemMapReader, for_each_page_chunk
+
+class TestMemMap(unittest.TestCase):
+    def setUp(self):
+        self.reader = MemMapReader(chunk_pages=512)
+
+    def test_read_matches_page(self):
+        chunks = list(self.reader.read(0x1000, 512))
+        self.assertTrue(len(chunks) > 0)
+        for chunk in chunks:
+            for pfn in list(chunk.pfns())[::37]:
+                page = Page.pfn_to_page(pfn)
+                idx = pfn - chunk.start_pfn
+                self.assertEqual(chunk.flags[idx], int(page['flags']))
+                self.assertEqual(chunk.mapping[idx], int(page['mapping']))
+
+    def test_chunks_ordered(self):
+        last = 0
+        count = 0
+        for chunk in self.reader.chunks(0, 0x4000):
+            self.assertTrue(chunk.start_pfn >= last)
+            self.assertTrue(len(chunk) <= 512)
+            last = chunk.end_pfn
+            count += len(chunk)
+        self.assertTrue(0 < count <= 0x4000)
+
+    def test_for_each_page_chunk(self):
+        chunk = next(for_each_page_chunk(0, 64))
+        self.assertTrue(len(chunk) <= 64)
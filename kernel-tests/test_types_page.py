@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+import unittest
+import gdb
+
+from crash.types.page import Page, get_section_index, for_each_page
+from crash.types.page import pfn_to_page, page_from_addr
+from crash.types.page import compound_heads, get_compound_head_index
+
+class TestSectionIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = get_section_index()
+        if self.index is None:
+            self.skipTest("kernel does not use memory sections")
+
+    def test_cached(self):
+        self.assertTrue(get_section_index() is self.index)
+
+    def test_ranges(self):
+        ranges = self.index.pfn_ranges()
+        self.assertTrue(len(ranges) > 0)
+        last = -1
+        for (start, end) in ranges:
+            self.assertTrue(last < start < end)
+            self.assertTrue(self.index.is_valid(start))
+            self.assertTrue(self.index.is_valid(end - 1))
+            last = end
+
+    def test_page_address(self):
+        (start, end) = self.index.pfn_ranges()[0]
+        for pfn in (start, start + 1, end - 1):
+            page = Page.pfn_to_page(pfn)
+            self.assertEqual(self.index.page_address(pfn),
+                             int(page.address))
+
+    def test_for_each_page(self):
+        (start, end) = self.index.pfn_ranges()[0]
+        page = next(iter(for_each_page()))
+        self.assertEqual(int(page.address), self.index.page_address(start))
+
+class TestPage(unittest.TestCase):
+    def setUp(self):
+        self.pfn = 0x1000
+
+    def test_cached(self):
+        page = pfn_to_page(self.pfn)
+        self.assertTrue(pfn_to_page(self.pfn) is page)
+        addr = Page.directmap_base + self.pfn * Page.PAGE_SIZE + 8
+        self.assertTrue(page_from_addr(addr) is page)
+
+    def test_slots(self):
+        page = pfn_to_page(self.pfn)
+        with self.assertRaises(AttributeError):
+            page.unknown = 1
+
+    def test_fields(self):
+        page = pfn_to_page(self.pfn)
+        obj = Page.pfn_to_page(self.pfn)
+        self.assertEqual(page.address, int(obj.address))
+        self.assertEqual(page.flags, int(obj['flags']))
+        self.assertEqual(page.is_anon(), bool(int(obj['mapping']) & 1))
+        self.assertEqual(int(page.gdb_obj.address), page.address)
+
+    def test_compound_head(self):
+        page = pfn_to_page(self.pfn)
+        head = page.compound_head()
+        if not page.is_tail():
+            self.assertTrue(head is page)
+        else:
+            self.assertFalse(head.is_tail())
+
+class TestCompoundHeads(unittest.TestCase):
+    def setUp(self):
+        self.pfns = list(range(0x1000, 0x1400))
+
+    def test_matches_page(self):
+        heads = compound_heads(self.pfns)
+        self.assertEqual(len(heads), len(self.pfns))
+        for (pfn, head) in zip(self.pfns, heads):
+            try:
+                page = pfn_to_page(pfn)
+            except gdb.MemoryError:
+                self.assertIsNone(head)
+                continue
+            self.assertEqual(head, page.compound_head().pfn)
+
+    def test_order(self):
+        pfns = list(reversed(self.pfns))
+        self.assertEqual(compound_heads(pfns),
+                         list(reversed(compound_heads(self.pfns))))
+
+    def test_memoized(self):
+        index = get_compound_head_index()
+        heads = compound_heads(self.pfns)
+        tails = [pfn for (pfn, head) in zip(self.pfns, heads)
+                 if head is not None and head != pfn]
+        if not tails:
+            self.skipTest("no tail pages in range")
+        pages_read = index.pages_read
+        self.assertEqual(compound_heads(tails),
+                         [index.lookup(pfn) for pfn in tails])
+        self.assertEqual(index.pages_read, pages_read)
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+import unittest
+
+from crash.types.node import for_each_nid
+from crash.types.slab import kmem_cache_from_name, KmemCacheNotFound
+from crash.types.slab import slab_partial, slab_full
+
+class TestSlab(unittest.TestCase):
+    def setUp(self):
+        try:
+            self.cache = kmem_cache_from_name('inode_cache')
+        except KmemCacheNotFound:
+            self.skipTest("no inode_cache")
+
+    def slabs(self):
+        for nid in for_each_nid():
+            node = self.cache.gdb_obj[self.cache.nodelists_name][nid]
+            if int(node) == 0:
+                continue
+            for slabtype in (slab_partial, slab_full):
+                for slab in self.cache.get_slabs_of_type(node.dereference(),
+                                                         slabtype):
+                    yield slab
+                    break
+
+    def test_allocated_objects(self):
+        for slab in self.slabs():
+            allocated = list(slab.get_allocated_objects())
+            expected = [obj for obj in slab.get_objects()
+                        if slab.contains_obj(obj)[0]]
+            self.assertEqual(allocated, expected)
+
+    def test_bitmaps(self):
+        for slab in self.slabs():
+            full = (1 << self.cache.objs_per_slab) - 1
+            allocated = slab.allocated_map()
+            self.assertEqual(allocated & slab.free_map, 0)
+            self.assertEqual(allocated | slab.free_map |
+                             slab.array_cache_map(), full)
+            self.assertEqual(len(slab.free), slab.num_free)
+
+class TestArrayCaches(unittest.TestCase):
+    def setUp(self):
+        try:
+            self.cache = kmem_cache_from_name('inode_cache')
+        except KmemCacheNotFound:
+            self.skipTest("no inode_cache")
+
+    def test_lookup(self):
+        acs = self.cache.get_array_caches()
+        addrs = list(self.cache.array_cache_addrs)
+        self.assertEqual(addrs, sorted(acs))
+        for (addr, entry) in acs.items():
+            self.assertTrue(self.cache.array_cache_entry(addr) is entry)
+            self.assertIsNone(self.cache.array_cache_entry(addr + 1))
+
+    def test_objects_in_range(self):
+        addrs = list(self.cache.array_cache_addrs)
+        if not addrs:
+            self.skipTest("array caches are empty")
+        self.assertEqual(list(self.cache.array_cache_objects(addrs[0],
+                                                             addrs[-1] + 1)),
+                         addrs)
@@ -15,6 +15,9 @@ setup(
     python_requires='>=3.6',
 
     install_requires = [ 'pyelftools' ],
+    extras_require = {
+        'pagestats' : [ 'numpy' ],
+    },
 
     author = "Jeff Mahoney",
     author_email = "jeffm@suse.com",
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+"""
+Measure how checking all kmem caches scales with the number of worker
+sessions used by ``kmem -s -j``.
+
+Every run starts a fresh pycrash session and times only the kmem
+command, so the time needed to start the worker sessions is included
+but the time to start the interactive one is not.  The reports of all
+runs are compared with the first one; they must be identical.
+
+usage: bench-parallel-kmem.py [-j 1,2,4,8] [-p PYCRASH]
+                              <vmlinux> <vmcore> [-- pycrash options]
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import argparse
+import os
+import subprocess
+import sys
+
+MARK = 'bench-parallel-kmem:'
+
+def run(pycrash: List[str], workers: int) -> Tuple[float, str]:
+    script = "\n".join([
+        "python import time; start = time.perf_counter()",
+        f"kmem -s -j {workers}",
+        f"python print('{MARK}', time.perf_counter() - start)",
+        "quit",
+        "",
+    ])
+    proc = subprocess.run(pycrash, input=script, stdout=subprocess.PIPE,
+                          universal_newlines=True, check=True)
+
+    elapsed: Optional[float] = None
+    report: List[str] = list()
+    in_report = False
+    for line in proc.stdout.splitlines():
+        if line.startswith(MARK):
+            elapsed = float(line[len(MARK):])
+        elif "Checking all kmem caches..." in line:
+            in_report = True
+        elif in_report:
+            report.append(line)
+            if line.startswith("Checking done."):
+                in_report = False
+
+    if elapsed is None or not report:
+        raise RuntimeError("kmem -s -j {} did not complete:\n{}"
+                           .format(workers, proc.stdout[-2000:]))
+    return (elapsed, "\n".join(report))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="parallel kmem benchmark")
+    parser.add_argument('vmlinux')
+    parser.add_argument('vmcore')
+    parser.add_argument('options', nargs='*',
+                        help="options passed to pycrash, after --")
+    parser.add_argument('-j', '--workers', default='1,2,4,8',
+                        help="comma-separated worker counts to compare")
+    parser.add_argument('-p', '--pycrash',
+                        default=os.path.join(os.path.dirname(__file__), '..',
+                                             'pycrash'),
+                        help="the pycrash script to run")
+
+    args = parser.parse_args()
+    pycrash = [args.pycrash] + args.options + [args.vmlinux, args.vmcore]
+    counts = [int(x) for x in args.workers.split(',')]
+
+    baseline = None
+    reports: Dict[int, str] = dict()
+    print("{:>8} {:>12} {:>8}".format("workers", "seconds", "speedup"))
+    for workers in counts:
+        (elapsed, reports[workers]) = run(pycrash, workers)
+        if baseline is None:
+            baseline = elapsed
+        print("{:>8d} {:>12.3f} {:>7.2f}x"
+              .format(workers, elapsed, baseline / elapsed))
+
+    first = reports[counts[0]]
+    for (workers, report) in reports.items():
+        if report != first:
+            print(f"report with {workers} workers differs from the report "
+                  f"with {counts[0]}", file=sys.stderr)
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+"""
+Measure how reading a large range from a compressed dump scales with the
+number of decoding threads.
+
+Every run uses a fresh reader, so the libkdumpfile contexts start with
+empty caches and each page is decompressed during the measurement.
+
+usage: bench-parallel-read.py [-t 1,2,4,8] [-a ADDR] [-l LENGTH]
+                              [--kvaddr] [-r REPEAT] <vmcore>
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# pylint: disable=wrong-import-position
+from kdumpfile import KDUMP_KPHYSADDR, KDUMP_KVADDR
+
+from kdump.parallel import ParallelReader
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="parallel read benchmark")
+    parser.add_argument('vmcore')
+    parser.add_argument('-t', '--threads', default='1,2,4,8',
+                        help="comma-separated thread counts to compare")
+    parser.add_argument('-a', '--address', type=lambda x: int(x, 0),
+                        default=0x1000000,
+                        help="start address (default: 16 MiB)")
+    parser.add_argument('-l', '--length', type=lambda x: int(x, 0),
+                        default=256 << 20,
+                        help="bytes to read (default: 256 MiB)")
+    parser.add_argument('--kvaddr', action='store_true',
+                        help="the address is a kernel virtual address")
+    parser.add_argument('-c', '--chunk-pages', type=int, default=64,
+                        help="pages per run handed to a thread")
+    parser.add_argument('-r', '--repeat', type=int, default=3)
+
+    args = parser.parse_args()
+
+    addrspace = KDUMP_KVADDR if args.kvaddr else KDUMP_KPHYSADDR
+    counts = [int(x) for x in args.threads.split(',')]
+
+    baseline = None
+    print("{:>8} {:>12} {:>10} {:>8}".format("threads", "seconds",
+                                             "MiB/s", "speedup"))
+    for threads in counts:
+        best = None
+        for _ in range(args.repeat):
+            reader = ParallelReader(args.vmcore, threads,
+                                    chunk_pages=args.chunk_pages,
+                                    attrs={'addrxlat.ostype': 'linux'})
+            start = time.perf_counter()
+            data = reader.read(addrspace, args.address, args.length)
+            elapsed = time.perf_counter() - start
+            reader.close()
+
+            if len(data) != args.length:
+                raise RuntimeError("short read: {} of {} bytes"
+                                   .format(len(data), args.length))
+            if best is None or elapsed < best:
+                best = elapsed
+
+        assert best is not None
+        if baseline is None:
+            baseline = best
+        print("{:>8d} {:>12.3f} {:>10.1f} {:>7.2f}x"
+              .format(threads, best, args.length / best / (1 << 20),
+                      baseline / best))
+
+if __name__ == '__main__':
+    main()
@@ -8,6 +8,9 @@ Options:
 -t <test_match> | --tests <test_match>
     test_match is a pathname-style wildcard expression to specify
     which tests to run
+
+Set CRASH_PYTHON_SLOW_TESTS=1 in the environment to also run the tests
+that take a long time on a real dump.
 END
 }
 
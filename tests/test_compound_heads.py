@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+
+import unittest
+
+import crash.types.page
+from crash.types.page import Page, CompoundHeadIndex
+
+class TestCompoundHeadIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = CompoundHeadIndex(None)
+
+    def test_lookup(self):
+        self.index.add(0x200, 0x208)
+        self.index.add(0x100, 0x104)
+        self.assertEqual(len(self.index), 2)
+        self.assertEqual(self.index.lookup(0x100), 0x100)
+        self.assertEqual(self.index.lookup(0x103), 0x100)
+        self.assertEqual(self.index.lookup(0x207), 0x200)
+        self.assertIsNone(self.index.lookup(0x104))
+        self.assertIsNone(self.index.lookup(0xff))
+        self.assertIsNone(self.index.lookup(0x208))
+
+    def test_extend(self):
+        self.index.add(0x100, 0x102)
+        self.index.add(0x100, 0x105)
+        self.index.add(0x100, 0x103)
+        self.assertEqual(len(self.index), 1)
+        self.assertEqual(self.index.lookup(0x104), 0x100)
+        self.assertIsNone(self.index.lookup(0x105))
+
+    def test_large_order(self):
+        self.index.add(0x40000, 0x80000)
+        self.assertEqual(self.index.lookup(0x7ffff), 0x40000)
+        self.assertIsNone(self.index.lookup(0x80000))
+
+    def test_evict(self):
+        saved = crash.types.page.COMPOUND_RANGE_ENTRIES
+        crash.types.page.COMPOUND_RANGE_ENTRIES = 8
+        try:
+            for head in range(0, 0x100, 0x10):
+                self.index.add(head, head + 2)
+        finally:
+            crash.types.page.COMPOUND_RANGE_ENTRIES = saved
+        self.assertTrue(0 < len(self.index) <= 8)
+        self.assertIsNone(self.index.lookup(0x1))
+        self.assertEqual(self.index.lookup(0xf1), 0xf0)
+
+class TestTailHeadAddress(unittest.TestCase):
+    def setUp(self):
+        self.saved = (Page.PG_tail, Page.compound_head_name)
+
+    def tearDown(self):
+        (Page.PG_tail, Page.compound_head_name) = self.saved
+
+    def test_head_bit(self):
+        Page.PG_tail = -1
+        Page.compound_head_name = 'compound_head'
+        self.assertEqual(Page.tail_head_address(0, 0xffffea0000001001),
+                         0xffffea0000001000)
+        self.assertIsNone(Page.tail_head_address(0, 0xffffea0000001000))
+
+    def test_first_page(self):
+        Page.PG_tail = 1 << 14 | 1 << 18
+        Page.compound_head_name = 'first_page'
+        self.assertEqual(Page.tail_head_address(Page.PG_tail | 1,
+                                                0xffffea0000001000),
+                         0xffffea0000001000)
+        self.assertIsNone(Page.tail_head_address(1 << 14,
+                                                 0xffffea0000001000))
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+
+import unittest
+import os
+import tempfile
+
+from kdump.diskcache import DiskPageCache
+
+PAGE_SIZE = 64
+
+def page(n):
+    return bytes([n & 0xff]) * PAGE_SIZE
+
+def read_page(pageaddr):
+    return page(pageaddr // PAGE_SIZE)
+
+class TestDiskPageCache(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'cache', 'dump.pages')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_empty(self):
+        cache = DiskPageCache(self.path, PAGE_SIZE)
+        self.assertEqual(len(cache), 0)
+        self.assertIsNone(cache.lookup(0x1000))
+        self.assertEqual(cache.misses, 1)
+        # Nothing recorded, nothing written
+        cache.flush(read_page)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_roundtrip(self):
+        cache = DiskPageCache(self.path, PAGE_SIZE)
+        for i in range(4):
+            cache.record(i * PAGE_SIZE)
+        cache.flush(read_page)
+        cache.close()
+
+        cache = DiskPageCache(self.path, PAGE_SIZE)
+        self.assertEqual(len(cache), 4)
+        for i in range(4):
+            self.assertEqual(cache.lookup(i * PAGE_SIZE), page(i))
+        self.assertEqual(cache.hits, 4)
+        cache.close()
+
+    def test_page_size_mismatch(self):
+        cache = DiskPageCache(self.path, PAGE_SIZE)
+        cache.record(0)
+        cache.flush(read_page)
+        cache.close()
+
+        cache = DiskPageCache(self.path, PAGE_SIZE * 2)
+        self.assertEqual(len(cache), 0)
+        cache.close()
+
+    def test_short_page_ignored(self):
+        cache = DiskPageCache(self.path, PAGE_SIZE)
+        cache.record(0)
+        cache.flush(lambda pageaddr: b'short')
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_unreadable_page_skipped(self):
+        cache = DiskPageCache(self.path, PAGE_SIZE)
+        cache.record(0)
+        cache.record(PAGE_SIZE)
+        cache.flush(lambda pageaddr: read_page(pageaddr) if pageaddr else None)
+        cache.close()
+
+        cache = DiskPageCache(self.path, PAGE_SIZE)
+        self.assertEqual(len(cache), 1)
+        self.assertIsNone(cache.lookup(0))
+        self.assertEqual(cache.lookup(PAGE_SIZE), page(1))
+        cache.close()
+
+    def test_merge_sessions(self):
+        first = DiskPageCache(self.path, PAGE_SIZE)
+        second = DiskPageCache(self.path, PAGE_SIZE)
+        first.record(0)
+        second.record(PAGE_SIZE)
+        first.flush(read_page)
+        second.flush(read_page)
+        first.close()
+        second.close()
+
+        cache = DiskPageCache(self.path, PAGE_SIZE)
+        self.assertEqual(cache.lookup(0), page(0))
+        self.assertEqual(cache.lookup(PAGE_SIZE), page(1))
+        cache.close()
+
+    def test_trim(self):
+        cache = DiskPageCache(self.path, PAGE_SIZE, max_pages=4)
+        for i in range(4):
+            cache.record(i * PAGE_SIZE)
+        cache.flush(read_page)
+        cache.close()
+
+        # This session's pages are kept ahead of older ones
+        cache = DiskPageCache(self.path, PAGE_SIZE, max_pages=4)
+        self.assertEqual(cache.lookup(0), page(0))
+        cache.record(10 * PAGE_SIZE)
+        cache.record(11 * PAGE_SIZE)
+        cache.flush(read_page)
+        cache.close()
+
+        cache = DiskPageCache(self.path, PAGE_SIZE, max_pages=4)
+        self.assertEqual(len(cache), 4)
+        self.assertIsNotNone(cache.lookup(0))
+        self.assertIsNotNone(cache.lookup(10 * PAGE_SIZE))
+        self.assertIsNotNone(cache.lookup(11 * PAGE_SIZE))
+        # Most recently used of the pages recorded earlier
+        self.assertIsNotNone(cache.lookup(3 * PAGE_SIZE))
+        self.assertIsNone(cache.lookup(1 * PAGE_SIZE))
+        cache.close()
+
+    def test_dump_key(self):
+        dump = os.path.join(self.dir.name, 'vmcore')
+        with open(dump, 'wb') as f:
+            f.write(b'dump')
+        key = DiskPageCache.dump_key(dump, 'build-id')
+        self.assertEqual(key, DiskPageCache.dump_key(dump, 'build-id'))
+        self.assertNotEqual(key, DiskPageCache.dump_key(dump, 'other'))
+
+        st = os.stat(dump)
+        os.utime(dump, ns=(st.st_atime_ns, st.st_mtime_ns + 1000000000))
+        self.assertNotEqual(key, DiskPageCache.dump_key(dump, 'build-id'))
+
+        cache = DiskPageCache.for_dump(self.dir.name, dump, 'build-id',
+                                       PAGE_SIZE)
+        self.assertTrue(cache.path.startswith(self.dir.name))
+        cache.close()
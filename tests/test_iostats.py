@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+
+import unittest
+
+from kdump.iostats import IOProfiler, LatencyHistogram, OTHER
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_buckets(self):
+        hist = LatencyHistogram()
+        hist.add(0.0000001)
+        hist.add(0.000003)
+        hist.add(0.000003)
+        hist.add(100.0)
+        self.assertEqual(len(hist), 4)
+        buckets = list(hist)
+        self.assertEqual(buckets[0], (0, 1, 1))
+        self.assertEqual(buckets[1], (2, 4, 2))
+        self.assertIsNone(buckets[2][1])
+
+    def test_percentile(self):
+        hist = LatencyHistogram()
+        self.assertEqual(hist.percentile(99), 0)
+        for _ in range(99):
+            hist.add(0.000010)
+        hist.add(0.001)
+        self.assertEqual(hist.percentile(50), 16)
+        self.assertEqual(hist.percentile(100), 1024)
+
+class TestIOProfiler(unittest.TestCase):
+    def test_disabled(self):
+        self.assertFalse(IOProfiler().enabled)
+
+    def test_other(self):
+        profiler = IOProfiler()
+        profiler.record(8, 0.001, hits=1)
+        self.assertEqual(profiler.profiles[OTHER].reads, 1)
+        self.assertEqual(profiler.profiles[OTHER].hits, 1)
+
+    def test_nested(self):
+        profiler = IOProfiler()
+        profiler.begin('pyps')
+        profiler.record(8, 0.001)
+        profiler.begin('pytask')
+        profiler.record(16, 0.001, misses=1)
+        profiler.error(KeyError())
+        profiler.end()
+        profiler.record(8, 0.001)
+        profiler.end()
+
+        ps = profiler.profiles['pyps']
+        task = profiler.profiles['pytask']
+        self.assertEqual((ps.invocations, ps.reads, ps.bytes), (1, 2, 16))
+        self.assertEqual((task.reads, task.bytes, task.misses), (1, 16, 1))
+        self.assertEqual(task.errors['KeyError'], 1)
+        self.assertEqual(profiler.total().reads, 3)
+
+    def test_reset(self):
+        profiler = IOProfiler()
+        profiler.begin('pyps')
+        profiler.record(8, 0.001)
+        profiler.reset()
+        profiler.record(8, 0.001)
+        profiler.end()
+        self.assertEqual(profiler.profiles['pyps'].reads, 1)
+        self.assertEqual(profiler.total().reads, 1)
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+
+import unittest
+import os
+import struct
+import tempfile
+
+from kdump.mmapcore import MappedCore, SegmentMap
+
+PT_LOAD = 1
+PT_NOTE = 4
+
+def write_core(path, segments):
+    """Write a minimal little-endian ELF64 core with the given segments"""
+    phoff = 64
+    data_offset = phoff + 56 * len(segments)
+    header = b'\x7fELF' + bytes([2, 1, 1]) + bytes(9)
+    header += struct.pack('<HHIQQQIHHHHHH', 4, 62, 1, 0, phoff, 0, 0,
+                          64, 56, len(segments), 64, 0, 0)
+    phdrs = b''
+    payload = b''
+    for (ptype, vaddr, paddr, data) in segments:
+        phdrs += struct.pack('<IIQQQQQQ', ptype, 0,
+                             data_offset + len(payload), vaddr, paddr,
+                             len(data), len(data), 0)
+        payload += data
+    with open(path, 'wb') as f:
+        f.write(header + phdrs + payload)
+
+class TestMappedCore(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'vmcore')
+        self.seg1 = bytes(range(256)) * 16
+        self.seg2 = b'\xaa' * 4096
+        write_core(self.path, [(PT_NOTE, 0, 0, b'note'),
+                               (PT_LOAD, 0xffff880000000000, 0, self.seg1),
+                               (PT_LOAD, 0, 0x100000, self.seg2)])
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_is_elf(self):
+        self.assertTrue(MappedCore.is_elf(self.path))
+
+    def test_not_elf(self):
+        path = os.path.join(self.dir.name, 'notelf')
+        with open(path, 'wb') as f:
+            f.write(b'KDUMP   ' + bytes(100))
+        self.assertFalse(MappedCore.is_elf(path))
+        with self.assertRaises(ValueError):
+            MappedCore(path)
+
+    def test_segments(self):
+        core = MappedCore(self.path)
+        # The second segment has no virtual address
+        self.assertEqual(len(core.vaddr), 1)
+        self.assertEqual(len(core.paddr), 2)
+        core.close()
+
+    def test_vaddr_view(self):
+        core = MappedCore(self.path)
+        view = core.vaddr.view(0xffff880000000010, 16)
+        self.assertEqual(view.tobytes(), self.seg1[16:32])
+        del view
+        core.close()
+
+    def test_paddr_view(self):
+        core = MappedCore(self.path)
+        view = core.paddr.view(0x100000 + 100, 8)
+        self.assertEqual(view.tobytes(), self.seg2[100:108])
+        del view
+        core.close()
+
+    def test_view_outside(self):
+        core = MappedCore(self.path)
+        self.assertIsNone(core.vaddr.view(0x1000, 8))
+        self.assertIsNone(core.paddr.view(0x100000 + 4090, 16))
+        core.close()
+
+    def test_verify(self):
+        core = MappedCore(self.path)
+        core.vaddr.verify(lambda addr, data: False)
+        self.assertEqual(len(core.vaddr), 0)
+        self.assertIsNone(core.vaddr.view(0xffff880000000010, 16))
+        core.close()
+
+class TestSegmentMap(unittest.TestCase):
+    def test_lookup(self):
+        buf = memoryview(bytes(range(64)))
+        segmap = SegmentMap(buf, [(0x2000, 0x2010, 16), (0x1000, 0x1010, 0)])
+        self.assertEqual(segmap.view(0x1004, 4).tobytes(), bytes([4, 5, 6, 7]))
+        self.assertEqual(segmap.view(0x2000, 2).tobytes(), bytes([16, 17]))
+        self.assertIsNone(segmap.view(0x100c, 8))
+        self.assertIsNone(segmap.view(0x500, 1))
+        self.assertEqual(segmap.segments[0][0], 0x1000)
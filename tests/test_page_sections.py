@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+
+import unittest
+from unittest import mock
+
+import crash.types.page
+from crash.types.page import Page, SectionIndex
+
+PAGE_SIZE = 64
+SECTION_SHIFT = 12
+
+# The struct pages of each section live in separately allocated,
+# unordered chunks, as they do with SPARSEMEM and no vmemmap
+SECTIONS = {
+    0: 0xc000000002000000,
+    1: 0xc000000001000000,
+    5: 0xc000000003000000,
+}
+
+def make_index():
+    index = SectionIndex.__new__(SectionIndex)
+    index.pfn_section_shift = SECTION_SHIFT
+    index._page_size = PAGE_SIZE
+    index._word_mask = (1 << 64) - 1
+    # section_mem_map is encoded relative to the first pfn of memory
+    index.mem_maps = {
+        nr: (start - (nr << SECTION_SHIFT) * PAGE_SIZE) & index._word_mask
+        for (nr, start) in SECTIONS.items()
+    }
+    index._index_mem_maps()
+    return index
+
+class TestSectionIndexReverse(unittest.TestCase):
+    def setUp(self):
+        self.index = make_index()
+
+    def test_round_trip(self):
+        for nr in SECTIONS:
+            for pfn in [nr << SECTION_SHIFT, (nr << SECTION_SHIFT) + 0x123,
+                        ((nr + 1) << SECTION_SHIFT) - 1]:
+                addr = self.index.page_address(pfn)
+                self.assertEqual(self.index.pfn_of_page(addr), pfn)
+
+    def test_not_a_page(self):
+        start = SECTIONS[1]
+        self.assertIsNone(self.index.pfn_of_page(start - PAGE_SIZE))
+        self.assertIsNone(self.index.pfn_of_page(start + 8))
+        end = start + (PAGE_SIZE << SECTION_SHIFT)
+        self.assertIsNone(self.index.pfn_of_page(end))
+
+class TestSparsememPageAddress(unittest.TestCase):
+    def setUp(self):
+        self.saved = Page.sparsemem
+        Page.sparsemem = True
+        self.index = make_index()
+        patcher = mock.patch.object(crash.types.page, 'get_section_index',
+                                    return_value=self.index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        Page.sparsemem = self.saved
+
+    def test_pfn_from_address(self):
+        pfn = (5 << SECTION_SHIFT) + 7
+        addr = SECTIONS[5] + 7 * PAGE_SIZE
+        self.assertEqual(Page.pfn_from_address(addr), pfn)
+        self.assertIsNone(Page.pfn_from_address(addr + 1))
+
+    def test_from_page_addr_shares_real_pfn(self):
+        pfn = (1 << SECTION_SHIFT) + 0x10
+        addr = SECTIONS[1] + 0x10 * PAGE_SIZE
+        with mock.patch.object(Page, 'lookup') as lookup:
+            Page.from_page_addr(addr)
+        lookup.assert_called_once_with(pfn, None)
+
+class TestSectionMapLastBit(unittest.TestCase):
+    def test_from_debuginfo(self):
+        with mock.patch.object(crash.types.page, 'safe_get_symbol_value',
+                               return_value=6):
+            self.assertEqual(SectionIndex._section_map_last_bit(), 6)
+
+    def test_default(self):
+        with mock.patch.object(crash.types.page, 'safe_get_symbol_value',
+                               return_value=None):
+            self.assertEqual(SectionIndex._section_map_last_bit(),
+                             crash.types.page.SECTION_MAP_LAST_BIT_DEFAULT)
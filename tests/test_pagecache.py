@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+
+import unittest
+
+from kdump.pagecache import PageCache, MissingPageSet
+
+class TestPageCache(unittest.TestCase):
+    def test_lookup_miss(self):
+        cache = PageCache(4)
+        self.assertIsNone(cache.lookup(0x1000))
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(cache.hits, 0)
+
+    def test_lookup_hit(self):
+        cache = PageCache(4)
+        cache.insert(0x1000, b'a' * 16)
+        self.assertEqual(cache.lookup(0x1000), b'a' * 16)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 0)
+
+    def test_lru_eviction(self):
+        cache = PageCache(2)
+        cache.insert(0x1000, b'a')
+        cache.insert(0x2000, b'b')
+        # Touch the first page so the second is the oldest
+        cache.lookup(0x1000)
+        cache.insert(0x3000, b'c')
+        self.assertTrue(0x1000 in cache)
+        self.assertFalse(0x2000 in cache)
+        self.assertTrue(0x3000 in cache)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_disabled(self):
+        cache = PageCache(0)
+        cache.insert(0x1000, b'a')
+        self.assertEqual(len(cache), 0)
+
+    def test_resize(self):
+        cache = PageCache(4)
+        for addr in range(4):
+            cache.insert(addr << 12, b'x')
+        cache.resize(1)
+        self.assertEqual(len(cache), 1)
+        self.assertTrue(3 << 12 in cache)
+        self.assertEqual(cache.evictions, 3)
+
+    def test_negative_capacity(self):
+        with self.assertRaises(ValueError):
+            PageCache(-1)
+
+    def test_invalidate(self):
+        cache = PageCache(4)
+        cache.insert(0x1000, b'a')
+        cache.invalidate()
+        self.assertEqual(len(cache), 0)
+        self.assertIsNone(cache.lookup(0x1000))
+
+class TestMissingPageSet(unittest.TestCase):
+    def test_empty(self):
+        missing = MissingPageSet()
+        self.assertFalse(5 in missing)
+        self.assertFalse(missing.check(0, 100))
+        self.assertEqual(missing.hits, 0)
+
+    def test_add_single(self):
+        missing = MissingPageSet()
+        missing.add(5)
+        self.assertTrue(5 in missing)
+        self.assertFalse(4 in missing)
+        self.assertFalse(6 in missing)
+        self.assertEqual(len(missing), 1)
+
+    def test_merge_adjacent(self):
+        missing = MissingPageSet()
+        missing.add(5)
+        missing.add(7)
+        self.assertEqual(missing.nr_ranges, 2)
+        missing.add(6)
+        self.assertEqual(missing.nr_ranges, 1)
+        missing.add(4)
+        missing.add(8)
+        self.assertEqual(missing.nr_ranges, 1)
+        self.assertEqual(len(missing), 5)
+
+    def test_add_duplicate(self):
+        missing = MissingPageSet()
+        missing.add(5)
+        missing.add(5)
+        self.assertEqual(len(missing), 1)
+
+    def test_check_range(self):
+        missing = MissingPageSet()
+        missing.add(10)
+        missing.add(11)
+        self.assertFalse(missing.check(0, 9))
+        self.assertFalse(missing.check(12, 20))
+        self.assertTrue(missing.check(9, 10))
+        self.assertTrue(missing.check(11, 12))
+        self.assertTrue(missing.check(0, 100))
+        self.assertEqual(missing.hits, 3)
+
+    def test_clear(self):
+        missing = MissingPageSet()
+        missing.add(5)
+        missing.clear()
+        self.assertFalse(5 in missing)
+        self.assertEqual(len(missing), 0)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+
+import unittest
+
+from crash.types.pagestats import PageFlagStats, HAVE_NUMPY
+
+PAGEFLAGS = {
+    'PG_locked': 0,
+    'PG_lru': 5,
+    'PG_slab': 7,
+    'PG_reserved': 10,
+    'PG_head': 15,
+    'PG_checked': 8,
+    'PG_owner_priv_1': 8,
+    '__NR_PAGEFLAGS': 20,
+}
+
+def page_flags(nid, zid, *bits):
+    flags = (nid << 62) | (zid << 60)
+    for bit in bits:
+        flags |= 1 << bit
+    return flags
+
+@unittest.skipUnless(HAVE_NUMPY, "NumPy is not available")
+class TestPageFlagStats(unittest.TestCase):
+    def setUp(self):
+        self.stats = PageFlagStats(PAGEFLAGS, nodes_width=2, zones_width=2,
+                                   bits_per_long=64)
+
+    def test_flags(self):
+        flags = [page_flags(0, 1, 7), page_flags(0, 1, 7, 0),
+                 page_flags(1, 2, 5), page_flags(1, 2, 8)]
+        self.stats.add(flags, [0] * 4, [0] * 4)
+        counts = dict(self.stats.flag_counts())
+        self.assertEqual(counts['PG_slab'], 2)
+        self.assertEqual(counts['PG_locked'], 1)
+        self.assertEqual(counts['PG_lru'], 1)
+        self.assertEqual(counts['PG_checked'], 1)
+        self.assertFalse('PG_owner_priv_1' in counts)
+        self.assertEqual(self.stats.total, 4)
+
+    def test_zones(self):
+        flags = [page_flags(0, 1, 7), page_flags(0, 1, 10),
+                 page_flags(1, 2, 5), page_flags(1, 2, 15),
+                 page_flags(1, 2)]
+        mapping = [0, 0, 0xffff888000001001, 0, 0]
+        compound_head = [0, 0, 0, 0, 0xffffea0000000001]
+        self.stats.add(flags, mapping, compound_head)
+        self.stats.add(flags[:1], mapping[:1], compound_head[:1])
+
+        self.assertEqual(sorted(self.stats.zones), [(0, 1), (1, 2)])
+        zone = self.stats.zones[(0, 1)]
+        self.assertEqual(zone['total'], 3)
+        self.assertEqual(zone['slab'], 2)
+        self.assertEqual(zone['reserved'], 1)
+        zone = self.stats.zones[(1, 2)]
+        self.assertEqual(zone['lru'], 1)
+        self.assertEqual(zone['anon'], 1)
+        self.assertEqual(zone['compound'], 2)
+
+    def test_empty(self):
+        self.stats.add([], [], [])
+        self.assertEqual(self.stats.total, 0)
+        self.assertEqual(self.stats.zones, {})
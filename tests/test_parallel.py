@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+
+import unittest
+import threading
+
+from kdump.parallel import ParallelReader
+
+class FakeReader(ParallelReader):
+    """Return the low byte of each address instead of reading a dump"""
+    def __init__(self, *args, fail_at=None, **kwargs):
+        super().__init__('/does/not/exist', *args, **kwargs)
+        self.fail_at = fail_at
+        self.chunks = []
+        self.threads_used = set()
+        self.lock = threading.Lock()
+
+    def _read_chunk(self, addrspace, addr, length):
+        with self.lock:
+            self.chunks.append((addr, length))
+            self.threads_used.add(threading.get_ident())
+        if self.fail_at is not None and addr <= self.fail_at < addr + length:
+            raise ValueError(addr)
+        return bytes((addr + i) & 0xff for i in range(length))
+
+def expected(addr, length):
+    return bytes((addr + i) & 0xff for i in range(length))
+
+class TestParallelReader(unittest.TestCase):
+    def test_bad_args(self):
+        with self.assertRaises(ValueError):
+            ParallelReader('/does/not/exist', threads=0)
+        with self.assertRaises(ValueError):
+            ParallelReader('/does/not/exist', chunk_pages=0)
+
+    def test_small_read(self):
+        reader = FakeReader(4, page_size=16, chunk_pages=4)
+        self.assertEqual(reader.read(0, 10, 20), expected(10, 20))
+        self.assertEqual(reader.chunks, [(10, 20)])
+        reader.close()
+
+    def test_split(self):
+        reader = FakeReader(4, page_size=16, chunk_pages=4)
+        self.assertEqual(reader.read(0, 10, 1000), expected(10, 1000))
+        chunks = sorted(reader.chunks)
+        self.assertEqual(chunks[0], (10, 54))
+        self.assertEqual(chunks[1], (64, 64))
+        self.assertEqual(chunks[-1], (960, 50))
+        # Runs other than the first start on a run boundary
+        for (addr, length) in chunks[1:]:
+            self.assertEqual(addr % reader.chunk_size, 0)
+        reader.close()
+
+    def test_first_error(self):
+        reader = FakeReader(4, page_size=16, chunk_pages=4, fail_at=200)
+        with self.assertRaises(ValueError) as cm:
+            reader.read(0, 0, 1000)
+        self.assertEqual(cm.exception.args[0], 192)
+        reader.close()
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+
+import unittest
+import json
+import os
+import subprocess
+import tempfile
+from unittest import mock
+
+from crash.parallel import partition, run_jobs, run_parallel, ParallelError
+
+def fail_on_b(job):
+    if job == 'b':
+        raise ValueError(job)
+    return job.upper()
+
+class TestPartition(unittest.TestCase):
+    def test_bad_workers(self):
+        with self.assertRaises(ValueError):
+            partition([1, 2], 0)
+
+    def test_deal(self):
+        self.assertEqual(partition(list('abcde'), 2), [[0, 2, 4], [1, 3]])
+
+    def test_more_workers_than_jobs(self):
+        self.assertEqual(partition(list('ab'), 4), [[0], [1]])
+        self.assertEqual(partition([], 4), [])
+
+class TestRunJobs(unittest.TestCase):
+    def run_spec(self, function, jobs):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            spec_path = os.path.join(tmpdir, 'spec')
+            output = os.path.join(tmpdir, 'results')
+            with open(spec_path, 'w') as spec_file:
+                json.dump({'function': function, 'jobs': jobs,
+                           'output': output}, spec_file)
+            run_jobs(spec_path)
+            with open(output) as result_file:
+                return json.load(result_file)
+
+    def test_results(self):
+        results = self.run_spec('os.path:basename', ['/a/b', '/c'])
+        self.assertEqual(results, [{'result': 'b'}, {'result': 'c'}])
+
+    def test_error(self):
+        results = self.run_spec(f'{__name__}:fail_on_b', ['a', 'b', 'c'])
+        self.assertEqual(results[0], {'result': 'A'})
+        self.assertEqual(results[1], {'error': 'ValueError: b'})
+        self.assertEqual(results[2], {'result': 'C'})
+
+    def test_no_session(self):
+        with mock.patch.dict(os.environ, {'CRASH_PYTHON_GDB': ''}):
+            with self.assertRaises(ParallelError):
+                run_parallel('os.path:basename', ['/a'], 2)
+
+    def test_interrupted_wait_kills_workers(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            gdb_binary = os.path.join(tmpdir, 'gdb')
+            with open(gdb_binary, 'w') as script:
+                script.write("#!/bin/sh\nexec sleep 60\n")
+            os.chmod(gdb_binary, 0o755)
+            gdbinit = os.path.join(tmpdir, 'gdbinit')
+            open(gdbinit, 'w').close()
+
+            started = []
+            class Recording(subprocess.Popen):
+                def __init__(self, *args, **kwargs):
+                    super().__init__(*args, **kwargs)
+                    started.append(self)
+
+            wait = subprocess.Popen.wait
+            interrupted = []
+            def interrupt(proc, *args, **kwargs):
+                if not interrupted:
+                    interrupted.append(proc)
+                    raise KeyboardInterrupt()
+                return wait(proc, *args, **kwargs)
+
+            env = {'CRASH_PYTHON_GDB': gdb_binary,
+                   'CRASH_PYTHON_GDBINIT': gdbinit}
+            with mock.patch.dict(os.environ, env), \
+                 mock.patch.object(subprocess.Popen, 'wait', interrupt), \
+                 mock.patch('subprocess.Popen', Recording):
+                with self.assertRaises(KeyboardInterrupt):
+                    run_parallel('os.path:basename', ['/a', '/b'], 2)
+
+            self.assertEqual(len(started), 2)
+            for proc in started:
+                self.assertIsNotNone(proc.returncode)
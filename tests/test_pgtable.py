@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+
+import unittest
+import struct
+
+from kdump.target import MissingPageError
+from crash.pgtable import PageTableWalker, pte_flag_names
+from crash.pgtable import PAGE_PRESENT, PAGE_RW, PAGE_PSE, PAGE_NX
+from crash.pgtable import PAGE_DIRTY
+
+FIELDS = (12, 9, 9, 9, 9)
+FLAGS = PAGE_PRESENT | PAGE_RW
+
+class FakeMemory:
+    def __init__(self):
+        self.tables = dict()
+        self.reads = 0
+
+    def set(self, table, idx, value):
+        self.tables.setdefault(table, [0] * 512)[idx] = value
+
+    def read_phys(self, paddr, length):
+        self.reads += 1
+        try:
+            table = self.tables[paddr]
+        except KeyError:
+            raise MissingPageError(paddr, length)
+        return struct.pack('<512Q', *table)
+
+class TestPageTableWalker(unittest.TestCase):
+    def setUp(self):
+        self.mem = FakeMemory()
+        # 0xffff888000000000 -> 4k pages at 0x100000
+        self.mem.set(0x1000, 273, 0x2000 | FLAGS)
+        self.mem.set(0x2000, 0, 0x3000 | FLAGS)
+        self.mem.set(0x3000, 0, 0x4000 | FLAGS)
+        self.mem.set(0x4000, 0, 0x100000 | FLAGS | PAGE_NX)
+        self.mem.set(0x4000, 1, 0x101000 | FLAGS)
+        # 0xffff888000200000 -> 2M page at 0x40000000
+        self.mem.set(0x3000, 1, 0x40000000 | FLAGS | PAGE_PSE)
+        # 0xffff888040000000 -> missing PMD table
+        self.mem.set(0x2000, 1, 0x5000 | FLAGS)
+        self.walker = PageTableWalker(0x1000, FIELDS, self.mem.read_phys)
+
+    def test_translate(self):
+        result = self.walker.translate(0xffff888000000123)
+        self.assertEqual(result, (0x100123, 12, 0x100000 | FLAGS | PAGE_NX))
+        result = self.walker.translate(0xffff888000001008)
+        self.assertEqual(result[0], 0x101008)
+
+    def test_huge(self):
+        (phys, shift, pte) = self.walker.translate(0xffff888000212345)
+        self.assertEqual(phys, 0x40012345)
+        self.assertEqual(shift, 21)
+
+    def test_not_mapped(self):
+        self.assertIsNone(self.walker.translate(0xffff888000002000))
+        self.assertIsNone(self.walker.translate(0))
+        self.assertIsNone(self.walker.translate(0xffff888040000000))
+
+    def test_walk(self):
+        entries = self.walker.walk(0xffff888000000000)
+        self.assertEqual([level for (level, entry, pte) in entries],
+                         [3, 2, 1, 0])
+        self.assertEqual(entries[0], (3, 0x1000 + 273 * 8, 0x2000 | FLAGS))
+        self.assertEqual(self.walker.table_name(3), 'PGD')
+        self.assertEqual(self.walker.table_name(0), 'PTE')
+
+    def test_shared_tables(self):
+        for offset in range(0, 0x2000, 0x100):
+            self.walker.translate(0xffff888000000000 + offset)
+        self.assertEqual(self.mem.reads, 4)
+        self.assertEqual(self.walker.tables_read, 4)
+
+    def test_mappings(self):
+        # Contiguous with the 2M page, but the accessed bit doesn't matter
+        self.mem.set(0x3000, 2, 0x40200000 | FLAGS | PAGE_PSE | PAGE_DIRTY)
+        result = list(self.walker.mappings())
+        self.assertEqual(result, [
+            ((0xffff888000000000, 0xffff888000001000),
+             (0x100000, 0x101000), FLAGS | PAGE_NX),
+            ((0xffff888000001000, 0xffff888000002000),
+             (0x101000, 0x102000), FLAGS),
+            ((0xffff888000200000, 0xffff888000600000),
+             (0x40000000, 0x40400000), FLAGS),
+        ])
+
+    def test_mappings_range(self):
+        result = list(self.walker.mappings(0xffff888000201000,
+                                           0xffff888000203000))
+        self.assertEqual(result, [
+            ((0xffff888000201000, 0xffff888000203000),
+             (0x40001000, 0x40003000), FLAGS),
+        ])
+        self.assertEqual(list(self.walker.mappings(0, 1 << 47)), [])
+
+    def test_mappings_skip_empty(self):
+        list(self.walker.mappings())
+        # Only the tables with present entries are read
+        self.assertEqual(self.mem.reads, 5)
+
+    def test_flag_names(self):
+        self.assertEqual(pte_flag_names(FLAGS | PAGE_NX),
+                         ['PRESENT', 'RW', 'NX'])
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+
+import unittest
+
+from kdump.readahead import ReadAhead
+
+class TestReadAhead(unittest.TestCase):
+    def walk(self, readahead, pages):
+        prefetched = set()
+        results = []
+        for pagenr in pages:
+            ret = readahead.access(pagenr, hit=pagenr in prefetched)
+            if ret is not None:
+                (start, stride, count) = ret
+                for nr in range(start, start + stride * count, stride):
+                    if nr not in prefetched:
+                        readahead.prefetched(nr)
+                        prefetched.add(nr)
+                results.append(ret)
+        return results
+
+    def test_disabled(self):
+        readahead = ReadAhead(0)
+        self.assertEqual(self.walk(readahead, range(100)), [])
+        self.assertEqual(readahead.issued, 0)
+
+    def test_sequential(self):
+        readahead = ReadAhead(16, min_window=4)
+        results = self.walk(readahead, range(100, 110))
+        self.assertEqual(results[0], (103, 1, 4))
+        self.assertEqual(results[1], (107, 1, 8))
+
+    def test_window_limit(self):
+        readahead = ReadAhead(8, min_window=4)
+        results = self.walk(readahead, range(1000))
+        for (start, stride, count) in results:
+            self.assertTrue(count <= 8)
+
+    def test_strided(self):
+        readahead = ReadAhead(16, min_window=4)
+        results = self.walk(readahead, range(100, 200, 3))
+        self.assertEqual(results[0], (109, 3, 4))
+
+    def test_reverse(self):
+        readahead = ReadAhead(16, min_window=4)
+        results = self.walk(readahead, range(10, 0, -1))
+        self.assertEqual(results[0], (7, -1, 4))
+        for (start, stride, count) in results:
+            self.assertTrue(start + stride * (count - 1) >= 0)
+
+    def test_same_page(self):
+        readahead = ReadAhead(16)
+        self.assertEqual(self.walk(readahead, [5] * 10), [])
+
+    def test_random(self):
+        readahead = ReadAhead(16)
+        self.assertEqual(self.walk(readahead, [5, 500, 60, 9000, 1, 777]), [])
+
+    def test_accuracy(self):
+        readahead = ReadAhead(16, min_window=4)
+        self.walk(readahead, range(100, 1100))
+        self.assertTrue(readahead.issued > 0)
+        self.assertTrue(readahead.accuracy > 0.9)
+
+    def test_cached_pages_not_issued(self):
+        readahead = ReadAhead(16, min_window=4)
+        for pagenr in range(100, 104):
+            readahead.access(pagenr)
+        self.assertEqual(readahead.issued, 0)
+        readahead.prefetched(104)
+        readahead.access(104, hit=True)
+        self.assertEqual((readahead.issued, readahead.used), (1, 1))
+
+    def test_resize(self):
+        readahead = ReadAhead(16)
+        readahead.resize(0)
+        self.assertEqual(self.walk(readahead, range(100)), [])
+        with self.assertRaises(ValueError):
+            readahead.resize(-1)
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+
+import unittest
+
+from crash.reversemap import ReverseMap, SOURCE_DIRECT, SOURCE_TASK
+
+DIRECT = [
+    ((0xffff888000000000, 0xffff888040000000), (0, 0x40000000), 0x163),
+    ((0xffff888100000000, 0xffff888140000000),
+     (0x100000000, 0x140000000), 0x163),
+]
+
+USER = [
+    ((0x400000, 0x401000), (0x1000, 0x2000), 0x25),
+    ((0x7fff0000, 0x7fff2000), (0x100001000, 0x100003000), 0x27),
+]
+
+class TestReverseMap(unittest.TestCase):
+    def setUp(self):
+        self.rmap = ReverseMap(None)
+
+    def test_lookup(self):
+        self.rmap.add_mappings(SOURCE_DIRECT, iter(DIRECT), SOURCE_DIRECT)
+        self.assertEqual(self.rmap.lookup(0x1234),
+                         [(0xffff888000001234, SOURCE_DIRECT, None)])
+        self.assertEqual(self.rmap.lookup(0x100000008),
+                         [(0xffff888100000008, SOURCE_DIRECT, None)])
+        self.assertEqual(self.rmap.lookup(0x40000000), [])
+
+    def test_overlapping(self):
+        self.rmap.add_mappings(SOURCE_DIRECT, iter(DIRECT), SOURCE_DIRECT)
+        self.rmap.add_mappings(('mm', 1), iter(USER), SOURCE_TASK, 100)
+        self.assertEqual(self.rmap.lookup(0x1010), [
+            (0x400010, SOURCE_TASK, 100),
+            (0xffff888000001010, SOURCE_DIRECT, None),
+        ])
+        self.assertEqual(self.rmap.lookup(0x100002ff8), [
+            (0x7fff1ff8, SOURCE_TASK, 100),
+            (0xffff888100002ff8, SOURCE_DIRECT, None),
+        ])
+
+    def test_incremental(self):
+        self.rmap.add_mappings(('mm', 1), iter(USER), SOURCE_TASK, 100)
+        self.assertEqual(len(self.rmap.lookup(0x1000)), 1)
+        self.rmap.add_mappings(SOURCE_DIRECT, iter(DIRECT), SOURCE_DIRECT)
+        self.assertEqual(len(self.rmap.lookup(0x1000)), 2)
+        self.assertEqual(len(self.rmap), 4)
+
+    def test_source_once(self):
+        self.assertEqual(self.rmap.add_mappings(('mm', 1), iter(USER),
+                                                SOURCE_TASK, 100), 2)
+        self.assertEqual(self.rmap.add_mappings(('mm', 1), iter(USER),
+                                                SOURCE_TASK, 101), 0)
+        self.assertTrue(self.rmap.has_source(('mm', 1)))
+        self.assertEqual(self.rmap.lookup(0x1000), [(0x400000, SOURCE_TASK, 100)])
+
+    def test_large_range_does_not_scan(self):
+        # A direct map covering everything and many small task mappings
+        big = [((0xffff888000000000, 0xffff890000000000),
+                (0, 0x8000000000), 0x163)]
+        small = [((0x400000 + i * 0x1000, 0x401000 + i * 0x1000),
+                  (0x10000000 + i * 0x2000, 0x10001000 + i * 0x2000), 0x25)
+                 for i in range(10000)]
+        self.rmap.add_mappings(SOURCE_DIRECT, iter(big), SOURCE_DIRECT)
+        self.rmap.add_mappings(('mm', 1), iter(small), SOURCE_TASK, 100)
+
+        self.rmap.lookup(0)
+        self.rmap.visited = 0
+        paddr = 0x10000000 + 9000 * 0x2000 + 0x10
+        self.assertEqual(self.rmap.lookup(paddr), [
+            (0x400000 + 9000 * 0x1000 + 0x10, SOURCE_TASK, 100),
+            (0xffff888000000000 + paddr, SOURCE_DIRECT, None),
+        ])
+        self.assertLess(self.rmap.visited, 100)
+
+        # Between the small ranges only the large one matches
+        self.rmap.visited = 0
+        self.assertEqual(len(self.rmap.lookup(paddr + 0x1000)), 1)
+        self.assertLess(self.rmap.visited, 100)
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+
+import unittest
+
+from crash.types.slab import set_bits
+
+class TestSetBits(unittest.TestCase):
+    def test_empty(self):
+        self.assertEqual(list(set_bits(0)), [])
+
+    def test_bits(self):
+        self.assertEqual(list(set_bits(0b1011001)), [0, 3, 4, 6])
+
+    def test_large(self):
+        bitmap = (1 << 4095) | (1 << 64) | 1
+        self.assertEqual(list(set_bits(bitmap)), [0, 64, 4095])
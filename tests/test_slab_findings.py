@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+
+import unittest
+import io
+import json
+from contextlib import redirect_stdout
+
+from crash.types.slab import SlabFinding, FINDING_SLAB, FINDING_MISPLACED
+from crash.types.slab import FINDING_LIST, print_findings
+from crash.types.slab import FINDING_OK, FINDING_NODE, _SlabRuns
+
+class TestSlabFinding(unittest.TestCase):
+    def test_render(self):
+        finding = SlabFinding(FINDING_SLAB, 'kmalloc-64',
+                              'bufctl cycle detected', 0xffff888001000000)
+        self.assertIn("cache kmalloc-64 slab ffff888001000000: "
+                      "bufctl cycle detected", finding.render())
+
+        finding = SlabFinding(FINDING_OK, 'kmalloc-64', 'all good',
+                              error=False)
+        self.assertEqual(finding.render(), 'all good')
+
+    def test_serialize(self):
+        finding = SlabFinding(FINDING_NODE, 'dentry', 'free objects mismatch')
+        data = json.loads(json.dumps(finding.to_dict()))
+        self.assertEqual(data['slab'], None)
+        copy = SlabFinding.from_dict(data)
+        self.assertEqual(repr(copy), repr(finding))
+
+    def test_print(self):
+        found = [SlabFinding(FINDING_LIST, 'dentry', 'list head skipped'),
+                 SlabFinding(FINDING_OK, 'dentry', 'all good', error=False)]
+        with redirect_stdout(io.StringIO()) as output:
+            print_findings(iter(found))
+        self.assertEqual(output.getvalue().splitlines(),
+                         [finding.render() for finding in found])
+
+class TestSlabRuns(unittest.TestCase):
+    def setUp(self):
+        self.runs = _SlabRuns('dentry')
+
+    def test_ok(self):
+        self.assertEqual(list(self.runs.end_ok()), [])
+        for addr in (0x1000, 0x2000, 0x3000):
+            self.runs.ok(addr)
+        (finding,) = list(self.runs.end_ok())
+        self.assertEqual(finding.kind, FINDING_OK)
+        self.assertFalse(finding.error)
+        self.assertIn("3 slab objects were ok between 0x1000 and 0x3000",
+                      finding.details)
+        self.assertEqual(list(self.runs.end_ok()), [])
+
+    def test_misplaced(self):
+        found = [SlabFinding(FINDING_MISPLACED, 'dentry', 'wrong list', addr)
+                 for addr in (0x1000, 0x2000, 0x3000)]
+        reported = list()
+        for finding in found:
+            reported += self.runs.misplaced(finding)
+        self.assertEqual(reported, found[:1])
+
+        summary = list(self.runs.end_misplaced())
+        self.assertEqual(len(summary), 2)
+        self.assertIn("3 slab objects were misplaced", summary[0].details)
+        self.assertTrue(summary[1] is found[2])
+        self.assertEqual(list(self.runs.end_misplaced()), [])
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+# vim:set shiftwidth=4 softtabstop=4 expandtab textwidth=79:
+
+import unittest
+import os
+import tempfile
+
+from kdump.snapshot import Snapshot, SnapshotWriter, SnapshotAttrs
+from kdump.snapshot import SnapshotFormatError, flatten_attrs, SPACE_PHYS
+
+PAGE_SIZE = 4096
+
+ATTRS = {
+    'linux.vmcoreinfo.lines.KERNELOFFSET': '1a000000',
+    'linux.vmcoreinfo.lines.OSRELEASE': '5.3.0',
+    'cpu.0.reg.rip': 0xffffffff81000000,
+    'cpu.0.reg.rsp': 0xffffc90000003f00,
+    'cpu.1.reg.rip': 0xffffffff81000010,
+    'arch.page_size': PAGE_SIZE,
+}
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'session.snap')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def write(self, pages, missing=()):
+        writer = SnapshotWriter(self.path, PAGE_SIZE, ATTRS)
+        for (pageaddr, page) in pages.items():
+            writer.add(pageaddr, page)
+        for pagenr in missing:
+            writer.add_missing(pagenr)
+        writer.write()
+        return writer
+
+    def test_roundtrip(self):
+        pages = {
+            0xffff880000000000: bytes(PAGE_SIZE),
+            0xffff880000001000: bytes(range(256)) * 16,
+        }
+        self.write(pages, missing=[5])
+
+        self.assertTrue(Snapshot.is_snapshot(self.path))
+        snapshot = Snapshot(self.path)
+        self.assertEqual(snapshot.page_size, PAGE_SIZE)
+        self.assertEqual(len(snapshot), 2)
+        for (pageaddr, page) in pages.items():
+            self.assertEqual(snapshot.read(pageaddr), page)
+        self.assertIsNone(snapshot.read(0xffff880000002000))
+        self.assertEqual(snapshot.missing, {5})
+        snapshot.close()
+
+    def test_phys_space(self):
+        writer = SnapshotWriter(self.path, PAGE_SIZE, ATTRS)
+        writer.add(0x1000, b'\1' * PAGE_SIZE)
+        writer.add(0x1000, b'\2' * PAGE_SIZE, SPACE_PHYS)
+        writer.add_missing(7, SPACE_PHYS)
+        writer.write()
+
+        snapshot = Snapshot(self.path)
+        self.assertEqual(snapshot.read(0x1000), b'\1' * PAGE_SIZE)
+        self.assertEqual(snapshot.read(0x1000, SPACE_PHYS), b'\2' * PAGE_SIZE)
+        self.assertIsNone(snapshot.read(0x2000, SPACE_PHYS))
+        self.assertEqual(snapshot.missing, set())
+        self.assertEqual(snapshot.missing_phys, {7})
+        snapshot.close()
+
+    def test_compact(self):
+        pages = {0xffff880000000000 + i * PAGE_SIZE: bytes(PAGE_SIZE)
+                 for i in range(64)}
+        self.write(pages)
+        self.assertTrue(os.stat(self.path).st_size < PAGE_SIZE * 4)
+
+    def test_duplicate_pages(self):
+        writer = SnapshotWriter(self.path, PAGE_SIZE, ATTRS)
+        writer.add(0x1000, b'\1' * PAGE_SIZE)
+        writer.add(0x1000, b'\2' * PAGE_SIZE)
+        self.assertEqual(len(writer), 1)
+        writer.write()
+
+        snapshot = Snapshot(self.path)
+        self.assertEqual(snapshot.read(0x1000), b'\1' * PAGE_SIZE)
+        snapshot.close()
+
+    def test_attrs(self):
+        self.write({})
+        snapshot = Snapshot(self.path)
+        attr = snapshot.attr
+        self.assertEqual(attr.get('linux.vmcoreinfo.lines.KERNELOFFSET', '0'),
+                         '1a000000')
+        self.assertEqual(attr.get('linux.vmcoreinfo.lines.MISSING', '0'), '0')
+        regs = attr.cpu[0].reg
+        self.assertEqual(sorted(regs), ['rip', 'rsp'])
+        self.assertEqual(regs['rip'], 0xffffffff81000000)
+        self.assertEqual(len(attr.cpu), 2)
+        with self.assertRaises(KeyError):
+            attr.cpu[2]
+        self.assertIn(1, attr.cpu)
+        self.assertIn('rip', regs)
+        self.assertNotIn(2, attr.cpu)
+        self.assertNotIn('ri', regs)
+        snapshot.close()
+
+    def test_not_snapshot(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'KDUMP   ' + bytes(100))
+        self.assertFalse(Snapshot.is_snapshot(self.path))
+        with self.assertRaises(SnapshotFormatError):
+            Snapshot(self.path)
+
+    def test_flatten(self):
+        tree = {'cpu': {'0': {'reg': {'rip': 1}}}, 'name': 'x',
+                'obj': object()}
+        self.assertEqual(flatten_attrs(tree), {'cpu.0.reg.rip': 1,
+                                               'name': 'x'})
+        attrs = SnapshotAttrs(flatten_attrs(tree['cpu'], 'cpu.'))
+        self.assertEqual(attrs.cpu[0].reg.rip, 1)
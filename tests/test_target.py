@@ -4,7 +4,9 @@
 import unittest
 import gdb
 import os.path
+import tempfile
 from kdump.target import Target
+from kdump.diskcache import DiskPageCache
 
 class TestTarget(unittest.TestCase):
     def setUp(self):
@@ -32,3 +34,54 @@ class TestTarget(unittest.TestCase):
                 gdb.execute('target kdumpfile tests/vmcore')
             x.unregister()
 
+
+class FakeDump:
+    def __init__(self, page_size):
+        self.page_size = page_size
+        self.reads = []
+
+    def read(self, space, addr, length):
+        self.reads.append((addr, length))
+        return b''.join(bytes([(pageaddr // self.page_size) & 0xff]) *
+                        self.page_size
+                        for pageaddr in range(addr, addr + length,
+                                              self.page_size))
+
+class TestPrefetchDiskCache(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'dump.pages')
+        self.target = Target(read_threads=1)
+        self.page_size = self.target.page_size
+        self.target.kdump = FakeDump(self.page_size)
+        self.target.disk_cache = DiskPageCache(self.path, self.page_size)
+
+    def tearDown(self):
+        self.target.disk_cache.close()
+        self.target.unregister()
+        self.dir.cleanup()
+
+    def reopen(self):
+        self.target._flush_disk_cache()
+        self.target.disk_cache.close()
+        self.target.disk_cache = DiskPageCache(self.path, self.page_size)
+        self.target.page_cache.invalidate()
+        self.target.kdump.reads = []
+
+    def test_prefetch_records(self):
+        self.target._prefetch(0x100, 1, 4)
+        self.target._prefetch(0x200, 2, 2)
+        self.reopen()
+        self.assertEqual(len(self.target.disk_cache), 6)
+
+    def test_prefetch_uses_cached_pages(self):
+        for nr in (0x101, 0x102):
+            self.target.disk_cache.record(nr * self.page_size)
+        self.reopen()
+
+        self.target._prefetch(0x100, 1, 4)
+        self.assertEqual(self.target.kdump.reads,
+                         [(0x100 * self.page_size, self.page_size),
+                          (0x103 * self.page_size, self.page_size)])
+        for nr in range(0x100, 0x104):
+            self.assertIn(nr * self.page_size, self.target.page_cache)
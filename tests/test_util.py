@@ -9,6 +9,7 @@ from crash.util import get_symbol_value, safe_get_symbol_value
 from crash.exceptions import ArgumentTypeError
 from crash.exceptions import NotStructOrUnionError
 from crash.util import InvalidComponentError
+from crash.util import unpack_words, read_words, read_array
 
 def getsym(sym):
     return gdb.lookup_symbol(sym, None)[0].value()
@@ -596,3 +597,28 @@ class TestUtil(unittest.TestCase):
         self.assertTrue(sym.address != container.address)
         with self.assertRaises(NotStructOrUnionError):
             addr = container_of(sym, self.ulong, 'test_member')
+
+    def test_unpack_words(self):
+        buf = bytes(range(16))
+        words = unpack_words(buf, 4)
+        self.assertTrue(len(words) == 4)
+        self.assertTrue(unpack_words(buf[:4], 4)[0] == words[0])
+
+    def test_unpack_words_bad_size(self):
+        with self.assertRaises(ValueError):
+            unpack_words(bytes(6), 3)
+
+    def test_read_words(self):
+        sym = getsym('global_ulong_symbol')
+        words = read_words([int(sym.address)], self.ulongsize)
+        self.assertTrue(words == [int(sym)])
+
+    def test_read_array(self):
+        sym = getsym('global_ulong_symbol')
+        words = read_array(int(sym.address), 1, self.ulongsize)
+        self.assertTrue(words == (int(sym),))
+        self.assertTrue(read_array(int(sym.address), 0) == ())
+
+    def test_read_array_bad_address(self):
+        with self.assertRaises(gdb.MemoryError):
+            read_array(0, 4)